@@ -0,0 +1,221 @@
+"""
+Micro-benchmark of the sensor value extraction over a recorded eSolar payload.
+
+Compares the precompiled value paths of SAJeSolarSensorEntityDescription over
+the PlantData of a plant with the per-entity if-chain the sensors used before
+over the merged payload. Run from the repository root:
+
+    python benchmarks/extraction_benchmark.py
+"""
+
+import json
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.saj_esolar.model import PlantData  # noqa: E402
+from custom_components.saj_esolar.sensor import (  # noqa: E402
+    SENSOR_TYPES,
+    SAJeSolarMeterSensor,
+    _as_battery_direction,
+    _as_power_direction,
+    _as_yes_no,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, f"{name}.json")) as fixture:
+        return json.load(fixture)
+
+
+def merged_payload(sensors):
+    """Merge the recorded responses the same way the integration used to."""
+    data = load_fixture("getPlantDetailInfo")
+    data.update(load_fixture("getUserPlantList"))
+    data.update(load_fixture("findDevicePageList"))
+    data.update(load_fixture("getPlantDetailChart2"))
+    if sensors == "h1":
+        data.update(load_fixture("getStoreOrAcDevicePowerInfo"))
+    if sensors == "saj_sec":
+        for name in (
+            "getPlantMeterModuleList",
+            "findDevicePageList",
+            "getPlantMeterDetailInfo",
+            "getPlantMeterEnergyPreviewInfo",
+            "getPlantMeterChartData",
+        ):
+            data[name] = load_fixture(name)
+    return data
+
+
+def plant_data(sensors):
+    """Return the recorded responses as the PlantData SAJeSolarMeterData builds."""
+    plantData = PlantData(
+        0,
+        load_fixture("getUserPlantList"),
+        load_fixture("getPlantDetailInfo"),
+        findDevicePageList=load_fixture("findDevicePageList"),
+        getPlantDetailChart2=load_fixture("getPlantDetailChart2"),
+    )
+    if sensors == "h1":
+        plantData.getStoreOrAcDevicePowerInfo = load_fixture("getStoreOrAcDevicePowerInfo")
+    if sensors == "saj_sec":
+        plantData.secDevicePageList = load_fixture("findDevicePageList")
+        for name in (
+            "getPlantMeterModuleList",
+            "getPlantMeterDetailInfo",
+            "getPlantMeterEnergyPreviewInfo",
+            "getPlantMeterChartData",
+        ):
+            setattr(plantData, name, load_fixture(name))
+    return plantData
+
+
+# The old if-chain, in its original order: (sensors guard, [(key, container, field, convert)])
+def _plant_list(energy, plant_id):
+    return energy["plantList"][plant_id]
+
+
+LEGACY_CHAIN = (
+    (None, [
+        ("devOnlineNum", ("plantDetail",), "devOnlineNum", _as_yes_no),
+        ("nowPower", ("plantDetail",), "nowPower", float),
+        ("runningState", ("plantDetail",), "runningState", _as_yes_no),
+        ("todayElectricity", ("plantDetail",), "todayElectricity", float),
+        ("monthElectricity", ("plantDetail",), "monthElectricity", float),
+        ("yearElectricity", ("plantDetail",), "yearElectricity", float),
+        ("totalElectricity", ("plantDetail",), "totalElectricity", float),
+        ("todayGridIncome", ("plantDetail",), "todayGridIncome", float),
+        ("income", ("plantDetail",), "income", float),
+        ("selfUseRate", ("plantDetail",), "selfUseRate", None),
+        ("totalBuyElec", ("plantDetail",), "totalBuyElec", float),
+        ("totalConsumpElec", ("plantDetail",), "totalConsumpElec", float),
+        ("totalSellElec", ("plantDetail",), "totalSellElec", float),
+        ("lastUploadTime", ("plantDetail",), "lastUploadTime", None),
+        ("totalPlantTreeNum", ("plantDetail",), "totalPlantTreeNum", None),
+        ("totalReduceCo2", ("plantDetail",), "totalReduceCo2", None),
+        ("currency", _plant_list, "currency", None),
+        ("plantuid", _plant_list, "plantuid", None),
+        ("plantname", _plant_list, "plantname", None),
+        ("currency", _plant_list, "currency", None),
+        ("isOnline", _plant_list, "isOnline", None),
+        ("address", _plant_list, "address", None),
+        ("systemPower", _plant_list, "systempower", None),
+        ("peakPower", (), "peakPower", float),
+        ("status", (), "status", None),
+    ]),
+    ("h1", [
+        ("chargeElec", ("viewBean",), "chargeElec", float),
+        ("dischargeElec", ("viewBean",), "dischargeElec", float),
+        ("buyElec", ("viewBean",), "buyElec", float),
+        ("buyRate", ("viewBean",), "buyRate", None),
+        ("pvElec", ("viewBean",), "pvElec", float),
+        ("selfConsumedEnergy1", ("viewBean",), "selfConsumedEnergy1", float),
+        ("selfConsumedEnergy2", ("viewBean",), "selfConsumedEnergy2", float),
+        ("selfConsumedRate1", ("viewBean",), "selfConsumedRate1", None),
+        ("selfConsumedRate2", ("viewBean",), "selfConsumedRate2", None),
+        ("sellElec", ("viewBean",), "sellElec", float),
+        ("sellRate", ("viewBean",), "sellRate", None),
+        ("useElec", ("viewBean",), "useElec", float),
+        ("batCapcity", ("storeDevicePower",), "batCapcity", float),
+        ("isStorageAlarm", ("storeDevicePower",), "isStorageAlarm", int),
+        ("batCurr", ("storeDevicePower",), "batCurr", float),
+        ("batEnergyPercent", ("storeDevicePower",), "batEnergyPercent", float),
+        ("batteryDirection", ("storeDevicePower",), "batteryDirection", _as_battery_direction),
+        ("batteryPower", ("storeDevicePower",), "batteryPower", float),
+        ("gridDirection", ("storeDevicePower",), "gridDirection", _as_power_direction("Grid Direction")),
+        ("gridPower", ("storeDevicePower",), "gridPower", float),
+        ("h1Online", ("storeDevicePower",), "isOnline", _as_yes_no),
+        ("outPower", ("storeDevicePower",), "outPower", float),
+        ("outPutDirection", ("storeDevicePower",), "outPutDirection", _as_power_direction("outPut Direction")),
+        ("pvDirection", ("storeDevicePower",), "pvDirection", _as_power_direction("pv Direction")),
+        ("pvPower", ("storeDevicePower",), "pvPower", float),
+        ("solarPower", ("storeDevicePower",), "solarPower", float),
+        ("totalLoadPower", ("storeDevicePower",), "totalLoadPower", float),
+    ]),
+    ("saj_sec", [
+        ("pvElec", ("getPlantMeterChartData", "viewBean"), "pvElec", float),
+        ("useElec", ("getPlantMeterChartData", "viewBean"), "useElec", float),
+        ("buyElec", ("getPlantMeterChartData", "viewBean"), "buyElec", float),
+        ("sellElec", ("getPlantMeterChartData", "viewBean"), "sellElec", float),
+        ("selfConsumedEnergy1", ("getPlantMeterChartData", "viewBean"), "selfConsumedEnergy1", float),
+        ("selfConsumedEnergy2", ("getPlantMeterChartData", "viewBean"), "selfConsumedEnergy2", float),
+        ("reduceCo2", ("getPlantMeterChartData", "viewBean"), "reduceCo2", float),
+        ("buyRate", ("getPlantMeterChartData", "viewBean"), "buyRate", None),
+        ("sellRate", ("getPlantMeterChartData", "viewBean"), "sellRate", None),
+        ("selfConsumedRate1", ("getPlantMeterChartData", "viewBean"), "selfConsumedRate1", None),
+        ("selfConsumedRate2", ("getPlantMeterChartData", "viewBean"), "selfConsumedRate2", None),
+        ("plantTreeNum", ("getPlantMeterChartData", "viewBean"), "plantTreeNum", None),
+        ("totalGridPower", ("getPlantMeterChartData", "dataCountList", 3), -1, float),
+        ("totalLoadPower", ("getPlantMeterChartData", "dataCountList", 2), -1, float),
+        ("totalPvgenPower", ("getPlantMeterChartData", "dataCountList", 4), -1, float),
+        ("homeLoadPower", ("getPlantMeterChartData", "dataCountList", 1), -1, float),
+        ("solarLoadPower", ("getPlantMeterChartData", "dataCountList", 2), -1, float),
+        ("exportPower", ("getPlantMeterChartData", "dataCountList", 3), -1, float),
+        ("gridLoadPower", ("getPlantMeterChartData", "dataCountList", 4), -1, float),
+        ("totalPvEnergy", ("getPlantMeterDetailInfo", "plantDetail"), "totalPvEnergy", None),
+        ("totalLoadEnergy", ("getPlantMeterDetailInfo", "plantDetail"), "totalLoadEnergy", None),
+        ("totalBuyEnergy", ("getPlantMeterDetailInfo", "plantDetail"), "totalBuyEnergy", None),
+        ("totalSellEnergy", ("getPlantMeterDetailInfo", "plantDetail"), "totalSellEnergy", None),
+    ]),
+)
+
+
+def _container(energy, path, plant_id):
+    if callable(path):
+        return path(energy, plant_id)
+    for step in path:
+        energy = energy[step]
+    return energy
+
+
+def legacy_update(sensor_type, sensors, plant_id, energy, state):
+    """Emulate the old chain: compare against every key, re-walk the payload per check."""
+    for guard, entries in LEGACY_CHAIN:
+        if guard is not None and sensors != guard:
+            continue
+        for key, path, item, convert in entries:
+            if sensor_type == key:
+                if item == -1 or item in _container(energy, path, plant_id):
+                    if _container(energy, path, plant_id)[item] is not None:
+                        value = _container(energy, path, plant_id)[item]
+                        state = convert(value) if convert else value
+    return state
+
+
+def main():
+    number = 2000
+    for sensors in ("None", "h1", "saj_sec"):
+        energy = merged_payload(sensors)
+        plantData = plant_data(sensors)
+        sensor_entities = [
+            SAJeSolarMeterSensor(description, SimpleNamespace(data=None), sensors, 0)
+            for description in SENSOR_TYPES
+        ]
+        keys = [description.key for description in SENSOR_TYPES]
+
+        def table_refresh():
+            for sensor in sensor_entities:
+                sensor.update_from_data(plantData)
+
+        def legacy_refresh():
+            for key in keys:
+                legacy_update(key, sensors, 0, energy, None)
+
+        table = min(timeit.repeat(table_refresh, number=number, repeat=5)) / number
+        legacy = min(timeit.repeat(legacy_refresh, number=number, repeat=5)) / number
+        print(
+            f"{sensors:>8}: {len(keys)} entities, "
+            f"if-chain {legacy * 1e6:8.1f} us/refresh, "
+            f"table {table * 1e6:8.1f} us/refresh, "
+            f"{legacy / table:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
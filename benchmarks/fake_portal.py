@@ -0,0 +1,157 @@
+"""
+Local stand-in for the eSolar portal, serving the recorded fixtures.
+
+Every endpoint the integration uses answers with the fixture of the same
+name, login and logout manage a session cookie like the portal does. The
+latency, jitter and error rate of the responses can be configured, and the
+session can be dropped every few requests to exercise the re-login. Run from
+the repository root:
+
+    python benchmarks/fake_portal.py --port 8765 --latency 0.05 --jitter 0.02
+
+and point the integration at it with provider_domain: localhost:8765,
+provider_protocol: http, the cookie jar of Home Assistant ignores the session
+cookie of an IP address. GET /_stats returns the request counts per endpoint,
+POST /_reset clears them. The tests serve it as the portal too.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+from collections import Counter
+
+from aiohttp import web
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SESSION_COOKIE = "JSESSIONID"
+
+ENDPOINTS = (
+    "getUserPlantList",
+    "getPlantDetailInfo",
+    "findDevicePageList",
+    "getPlantDetailChart2",
+    "getStoreOrAcDevicePowerInfo",
+    "getPlantMeterModuleList",
+    "getPlantMeterDetailInfo",
+    "getPlantMeterEnergyPreviewInfo",
+    "getPlantMeterChartData",
+)
+
+
+def load_fixtures(path=FIXTURES):
+    """Load the recorded response of every endpoint."""
+    fixtures = {}
+    for name in ENDPOINTS:
+        with open(os.path.join(path, f"{name}.json")) as fixture:
+            fixtures[name] = json.load(fixture)
+    return fixtures
+
+
+class FakePortal(object):
+    """The portal stand-in, its settings and request counters."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, expire_every=0, seed=None, fixtures=None, password=None):
+        """Initialize the stand-in.
+
+        ``latency`` and ``jitter`` are in seconds, ``error_rate`` is the share
+        of data requests answered with a 500 and ``expire_every`` drops the
+        session after that many data requests, 0 never does. With a
+        ``password`` a login with another one is redirected back to the login
+        page, like the portal does, otherwise every login is accepted.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.expire_every = expire_every
+        self.fixtures = fixtures or load_fixtures()
+        self.password = password
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._sessions = set()
+        self._data_requests = 0
+
+    async def _delay(self):
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def handle_login(self, request):
+        self.calls["login"] += 1
+        form = await request.post()
+        await self._delay()
+        if self.password is not None and form.get("password") != self.password:
+            raise web.HTTPFound(request.url.with_query({"error": "1"}))
+        token = secrets.token_hex(16)
+        self._sessions.add(token)
+        response = web.Response(text="<html>eSolar</html>", content_type="text/html")
+        response.set_cookie(SESSION_COOKIE, token)
+        return response
+
+    async def handle_login_page(self, request):
+        return web.Response(text="<html>eSolar login</html>", content_type="text/html")
+
+    async def handle_logout(self, request):
+        self.calls["logout"] += 1
+        self._sessions.discard(request.cookies.get(SESSION_COOKIE))
+        return web.Response(text="<html>bye</html>", content_type="text/html")
+
+    async def handle_endpoint(self, request):
+        name = request.match_info["name"]
+        if name not in self.fixtures:
+            raise web.HTTPNotFound()
+
+        self.calls[name] += 1
+        await self._delay()
+
+        if request.cookies.get(SESSION_COOKIE) not in self._sessions:
+            raise web.HTTPFound(request.url.with_path("/saj/login"))
+
+        self._data_requests += 1
+        if self.expire_every and self._data_requests % self.expire_every == 0:
+            self._sessions.clear()
+        if self._random.random() < self.error_rate:
+            self.calls["errors"] += 1
+            raise web.HTTPInternalServerError()
+
+        return web.json_response(self.fixtures[name])
+
+    async def handle_stats(self, request):
+        return web.json_response(dict(self.calls))
+
+    async def handle_reset(self, request):
+        self.calls.clear()
+        return web.json_response({})
+
+    def make_app(self, path="saj"):
+        """Return the aiohttp application of the stand-in."""
+        app = web.Application()
+        app.router.add_post(f"/{path}/login", self.handle_login)
+        app.router.add_get(f"/{path}/login", self.handle_login_page)
+        app.router.add_post(f"/{path}/logout", self.handle_logout)
+        app.router.add_get("/_stats", self.handle_stats)
+        app.router.add_post("/_reset", self.handle_reset)
+        app.router.add_route("*", f"/{path}/{{tail:.*}}/{{name}}", self.handle_endpoint)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random latency spread in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of data requests failing with a 500")
+    parser.add_argument("--expire-every", type=int, default=0, help="drop the session every N data requests")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    portal = FakePortal(args.latency, args.jitter, args.error_rate, args.expire_every, args.seed)
+    web.run_app(portal.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
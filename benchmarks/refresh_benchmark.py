@@ -0,0 +1,135 @@
+"""
+Benchmark of a full coordinator refresh against the local portal stand-in.
+
+Starts benchmarks/fake_portal.py in a separate process, so only the CPU time
+of the integration is measured, and refreshes SAJeSolarMeterData for the
+default, h1 and saj_sec sensors. The first refresh of every mode logs in and
+fetches the plant metadata, the later ones run like the regular polls.
+Needs Home Assistant installed. Run from the repository root:
+
+    python benchmarks/refresh_benchmark.py --latency 0.05 --jitter 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import aiohttp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.saj_esolar.api import EsolarProvider, EsolarSession  # noqa: E402
+from custom_components.saj_esolar.coordinator import SAJeSolarMeterData  # noqa: E402
+
+MODES = ("None", "h1", "saj_sec")
+
+
+def portal_stats(port, reset=False):
+    """Return the request counts of the stand-in, optionally clearing them."""
+    url = f"http://127.0.0.1:{port}/{'_reset' if reset else '_stats'}"
+    request = urllib.request.Request(url, method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def start_portal(args):
+    """Start the stand-in and wait until it accepts requests."""
+    portal = subprocess.Popen([
+        sys.executable,
+        os.path.join(os.path.dirname(__file__), "fake_portal.py"),
+        "--port", str(args.port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate),
+        "--expire-every", str(args.expire_every),
+        "--seed", "1",
+    ])
+    for _ in range(100):
+        try:
+            portal_stats(args.port)
+            return portal
+        except OSError:
+            time.sleep(0.1)
+    portal.kill()
+    raise RuntimeError("The portal stand-in did not start")
+
+
+async def refresh(coordinator, port):
+    """Refresh once, return (seconds, CPU seconds, requests, success)."""
+    await asyncio.get_running_loop().run_in_executor(None, portal_stats, port, True)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    await coordinator.async_refresh()
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    calls = await asyncio.get_running_loop().run_in_executor(None, portal_stats, port)
+    requests = sum(count for name, count in calls.items() if name != "errors")
+    return wall, cpu, requests, coordinator.last_update_success
+
+
+def summary(label, results):
+    wall = sorted(result[0] for result in results)
+    cpu = [result[1] for result in results]
+    requests = [result[2] for result in results]
+    failed = sum(not result[3] for result in results)
+    p95 = wall[min(len(wall) - 1, int(len(wall) * 0.95))]
+    print(
+        f"{label:>14}: {len(results):4} refreshes, "
+        f"latency mean {statistics.mean(wall) * 1000:7.1f} ms p95 {p95 * 1000:7.1f} ms, "
+        f"{statistics.mean(requests):5.1f} requests, "
+        f"CPU {statistics.mean(cpu) * 1000:6.2f} ms/refresh"
+        + (f", {failed} failed" if failed else "")
+    )
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        provider = EsolarProvider(f"127.0.0.1:{args.port}", "saj", "http")
+
+        for mode in MODES:
+            async with aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session:
+                esolar = EsolarSession(session, provider, "benchmark", "benchmark")
+                coordinator = SAJeSolarMeterData(hass, esolar, mode, [0], provider)
+                cold = [await refresh(coordinator, args.port)]
+                warm = [await refresh(coordinator, args.port) for _ in range(args.refreshes)]
+                summary(f"{mode} cold", cold)
+                summary(f"{mode} warm", warm)
+                await coordinator.async_close()
+
+        await hass.async_stop(force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--refreshes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--expire-every", type=int, default=0)
+    args = parser.parse_args()
+
+    # Injected errors are expected, keep the log out of the results
+    logging.getLogger("custom_components.saj_esolar").setLevel(logging.CRITICAL)
+
+    portal = start_portal(args)
+    try:
+        asyncio.run(run(args))
+    finally:
+        portal.terminate()
+        portal.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,37 @@
 """The SAJ eSolar component."""
 
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
+from homeassistant.core import HomeAssistant
+
+from .accounts import async_check_password
+from .api import EsolarProvider
+from .const import CONF_PROVIDER_DOMAIN, CONF_PROVIDER_PATH, CONF_PROVIDER_PROTOCOL, DOMAIN
+
+PLATFORMS = [Platform.SENSOR]
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up an eSolar account from a config entry."""
+    provider = EsolarProvider(entry.data[CONF_PROVIDER_DOMAIN], entry.data[CONF_PROVIDER_PATH], entry.data[CONF_PROVIDER_PROTOCOL])
+    # Before the platforms, so the entry shows the error
+    async_check_password(hass, provider, entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD])
+    hass.data.setdefault(DOMAIN, {}).setdefault("entries", {})
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    return True
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry and logout when no other entry uses the account."""
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        data = hass.data[DOMAIN]["entries"].pop(entry.entry_id, None)
+        if data is not None:
+            await data.async_close()
+    return unloaded
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
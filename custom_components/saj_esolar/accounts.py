@@ -0,0 +1,64 @@
+"""Share the portal session of an eSolar account between platform entries."""
+
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryError
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .api import EsolarProvider, EsolarSession
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def async_check_password(hass: HomeAssistant, provider: EsolarProvider, username, password):
+    """Raise ConfigEntryError when the session of an account that is set up uses another password.
+
+    The entry would otherwise keep using the first password, the error is
+    shown on the entry until every entry of the account has the same one.
+    """
+    esolar = hass.data.get(DOMAIN, {}).get("accounts", {}).get((provider.host, username))
+    if esolar is not None and esolar.password != password:
+        raise ConfigEntryError(
+            f"Another password is configured for {username} on {provider.host} in an entry that is already set up, "
+            "use the same password in every entry of the account"
+        )
+
+
+def async_get_account(hass: HomeAssistant, provider: EsolarProvider, username, password, verify_ssl=True) -> EsolarSession:
+    """Return the session of an account on a portal, creating it for the first platform entry.
+
+    Every entry for the same provider host and username gets the same
+    session, so the account logs in once, shares its cookies, rate limit and
+    circuit breaker, and identical requests in flight are only sent once.
+    An entry with another password than the session is refused, see
+    async_check_password.
+    """
+    async_check_password(hass, provider, username, password)
+    accounts = hass.data.setdefault(DOMAIN, {}).setdefault("accounts", {})
+    key = (provider.host, username)
+
+    esolar = accounts.get(key)
+    if esolar is None:
+        # Not closed with the config entry that happens to create it, the last user releases it
+        session = async_create_clientsession(hass, verify_ssl=verify_ssl, auto_cleanup=False) #some providers have broken SSL chains
+        esolar = accounts[key] = EsolarSession(session, provider, username, password)
+    return esolar
+
+
+async def async_release_account(hass: HomeAssistant, esolar: EsolarSession):
+    """Stop using the session of an account, the last user logs out and drops it.
+
+    A config entry that is set up again, for example with a new password,
+    then starts from a new session.
+    """
+    await esolar.async_release()
+    if esolar.users > 0:
+        return
+
+    accounts = hass.data.get(DOMAIN, {}).get("accounts", {})
+    for key, account in list(accounts.items()):
+        if account is esolar:
+            del accounts[key]
+            esolar.session.detach()
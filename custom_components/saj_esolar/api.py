@@ -0,0 +1,436 @@
+"""Client for the private api of the eSolar portal."""
+
+import asyncio
+import calendar
+import datetime
+import logging
+import random
+import time
+
+import aiohttp
+from aiohttp import hdrs
+import yarl
+
+from homeassistant.util.json import json_loads
+
+from .const import (
+    ACCOUNT_REQUEST_BURST,
+    ACCOUNT_REQUEST_RATE,
+    BREAKER_COOLDOWN,
+    BREAKER_MAX_COOLDOWN,
+    BREAKER_THRESHOLD,
+    ENDPOINT_TIMEOUTS,
+    REQUEST_RETRIES,
+    REQUEST_TIMEOUT,
+    RETRY_BACKOFF,
+    RETRY_BACKOFF_MAX,
+)
+from .metrics import PortalMetrics, endpoint_name
+
+_LOGGER = logging.getLogger(__name__)
+
+# Answers worth asking again for, the portal is overloaded or restarting
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TransientError(Exception):
+    """The portal answered with an error that may be gone on the next try."""
+
+
+def retry_delay(attempt):
+    """Return the jittered exponential backoff before retry ``attempt``, in seconds."""
+    delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** (attempt - 1)).total_seconds()
+    return random.uniform(delay / 2, delay)
+
+def add_months(sourcedate, months):
+    month = sourcedate.month - 1 + months
+    year = sourcedate.year + month // 12
+    month = month % 12 + 1
+    day = min(sourcedate.day, calendar.monthrange(year,month)[1])
+    return datetime.date(year, month, day)
+
+def add_years(d, years):
+    try:
+        return d.replace(year = d.year + years)
+    except ValueError:
+        return d + (datetime.date(d.year + years, 1, 1) - datetime.date(d.year, 1, 1))
+
+def chart_query(day, deviceSnArr="", clientDate=None):
+    """Return the query of the day chart of ``day`` for getPlantDetailChart2 and getPlantMeterChartData."""
+    clientDate = clientDate or day
+    return (
+        f"chartDateType=1&energyType=0&clientDate={clientDate.strftime('%Y-%m-%d')}&deviceSnArr={deviceSnArr}&chartCountType=2"
+        f"&previousChartDay={day - datetime.timedelta(days=1)}&nextChartDay={day + datetime.timedelta(days=1)}&chartDay={day.strftime('%Y-%m-%d')}"
+        f"&previousChartMonth={add_months(day, -1).strftime('%Y-%m')}&nextChartMonth={add_months(day, 1).strftime('%Y-%m')}&chartMonth={day.strftime('%Y-%m')}"
+        f"&previousChartYear={add_years(day, -1).strftime('%Y')}&nextChartYear={add_years(day, 1).strftime('%Y')}&chartYear={day.strftime('%Y')}"
+    )
+
+def plant_list_payload(clientDate):
+    """Return the form of the getUserPlantList request, every plant of the account."""
+    return f"pageNo=&pageSize=&orderByIndex=&officeId=&clientDate={clientDate}&runningState=&selectInputType=1&plantName=&deviceSn=&type=&countryCode=&isRename=&isTimeError=&systemPowerLeast=&systemPowerMost="
+
+class EsolarProvider(object):
+    """Handless the information of the url of a particular esolar provider (e.g. saj, greenheiss)"""
+    def __init__(self,host,path,protocol):
+         self.host=host
+         self.path=path
+         self.protocol=protocol
+
+    def getBaseDomain(self):
+        return f"{self.protocol}://{self.host}"
+
+    def getBaseUrl(self):
+        return f"{self.getBaseDomain()}/{self.path}"
+
+    def getLoginUrl(self):
+        return f"{self.getBaseUrl()}/login"
+
+    def getPlantListUrl(self):
+        return f"{self.getBaseUrl()}/monitor/site/getUserPlantList"
+
+
+class CircuitBreaker(object):
+    """Stop requesting the portal after repeated failures.
+
+    After BREAKER_THRESHOLD failed requests in a row the breaker opens and
+    requests fail right away. Once the cooldown has passed requests are let
+    through again as a probe, the first success closes the breaker and a
+    failure opens it again with a doubled cooldown, up to BREAKER_MAX_COOLDOWN.
+    """
+
+    def __init__(self):
+        """Initialize the breaker."""
+        self.failures = 0
+        self.cooldown = BREAKER_COOLDOWN
+        self._open_until = None
+
+    @property
+    def state(self):
+        """Return closed, open or half_open."""
+        if self._open_until is None:
+            return "closed"
+        return "half_open" if time.monotonic() >= self._open_until else "open"
+
+    def retry_after(self):
+        """Return the time until the next probe, None when requests are let through."""
+        if self.state != "open":
+            return None
+        return datetime.timedelta(seconds=self._open_until - time.monotonic())
+
+    def allow(self):
+        """Return True when a request may be sent."""
+        return self.state != "open"
+
+    def record_success(self):
+        """Close the breaker after a successful request."""
+        if self._open_until is not None:
+            _LOGGER.info("eSolar portal is responding again")
+        self.failures = 0
+        self.cooldown = BREAKER_COOLDOWN
+        self._open_until = None
+
+    def record_failure(self):
+        """Count a failed request, opening the breaker when needed."""
+        self.failures += 1
+        if self._open_until is not None:
+            self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN)
+        elif self.failures < BREAKER_THRESHOLD:
+            return
+        if self.state != "open":
+            _LOGGER.warning("eSolar portal keeps failing, pausing requests for %s", self.cooldown)
+        self._open_until = time.monotonic() + self.cooldown.total_seconds()
+
+
+class TokenBucket(object):
+    """Limit the request rate of an account while allowing short bursts.
+
+    The bucket holds up to ``burst`` tokens and gains ``rate`` tokens per
+    second, every request takes one and waits for it when the bucket is empty.
+    """
+
+    def __init__(self, rate, burst):
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def async_acquire(self):
+        """Wait for a token and take it."""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1
+
+
+class EsolarSession(object):
+    """Keeps an authenticated eSolar portal session alive across polls.
+
+    The portal session cookie is kept in the aiohttp cookie jar between polls.
+    A new login is only done before the first request and when a response shows
+    that the portal dropped the session (401, a redirect or an HTML login page).
+
+    Platform entries of the same account share one session, see
+    accounts.async_get_account. Identical requests that are in flight at the
+    same time are sent once and all requests of the account share one rate limit.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, provider, username, password):
+        """Initialize the session manager."""
+
+        self.session   = session
+        self._provider = provider
+        self.username  = username
+        self.password  = password
+        self._login_lock = asyncio.Lock()
+        self._login_generation = 0
+        self._logged_in = False
+        self.metrics = PortalMetrics()
+        self.breaker = CircuitBreaker()
+        self.bucket = TokenBucket(ACCOUNT_REQUEST_RATE, ACCOUNT_REQUEST_BURST)
+        self.users = 0
+        self._pending = {}
+
+    @property
+    def headers(self):
+        """Return the headers used for the portal's XHR endpoints."""
+        return {
+            'Connection': 'keep-alive',
+            'sec-ch-ua': '" Not;A Brand";v="99", "Google Chrome";v="91", "Chromium";v="91"',
+            'Accept': 'application/json, text/javascript, */*; q=0.01',
+            'DNT': '1',
+            'X-Requested-With': 'XMLHttpRequest',
+            'sec-ch-ua-mobile': '?0',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.106 Safari/537.36',
+            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+            'Origin': self._provider.host,
+            'Sec-Fetch-Site': 'same-origin',
+            'Sec-Fetch-Mode': 'cors',
+            'Sec-Fetch-Dest': 'empty',
+            'Referer': f"{self._provider.getBaseUrl()}/monitor/home/index",
+            'Accept-Language': 'nl-NL,nl;q=0.9,en-US;q=0.8,en;q=0.7'
+        }
+
+    @property
+    def cookies(self):
+        """Return the portal cookies of the session."""
+        return self.session.cookie_jar.filter_cookies(self._provider.getBaseDomain())
+
+    def acquire(self):
+        """Count a platform entry using the session."""
+        self.users += 1
+        return self
+
+    async def async_release(self):
+        """Stop using the session, the last user logs out."""
+        self.users -= 1
+        if self.users <= 0:
+            await self.async_logout()
+
+    async def async_login(self):
+        """Login to the eSolar portal, returns True when the portal accepted the request."""
+
+        url = self._provider.getLoginUrl()
+        payload = {
+            'lang': 'en',
+            'username': self.username,
+            'password': self.password,
+            'rememberMe': 'true'
+        }
+        headers_login = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Language': 'nl-NL,nl;q=0.9,en-US;q=0.8,en;q=0.7',
+            'Cache-Control': 'max-age=0',
+            'Connection': 'keep-alive',
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Cookie': 'org.springframework.web.servlet.i18n.CookieLocaleResolver.LOCALE=en; op_esolar_lang=en',
+            'DNT': '1',
+            'Host': self._provider.host,
+            'Origin': self._provider.host,
+            'Referer': self._provider.getLoginUrl(),
+            'sec-ch-ua': '" Not;A Brand";v="99", "Google Chrome";v="91", "Chromium";v="91"',
+            'sec-ch-ua-mobile': '?0',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'same-origin',
+            'Sec-Fetch-User': '?1',
+            'Upgrade-Insecure-Requests': '1',
+            'User-Agent'
+            : 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
+        }
+        await self.bucket.async_acquire()
+        start = time.monotonic()
+        response = await self._timed_request("login", start, self.session.post(url, headers=headers_login, data=payload))
+        response.release()
+        self.metrics.endpoint("login").record(response.status, time.monotonic() - start)
+
+        if response.status != 200:
+            _LOGGER.error(f"{response.url} returned {response.status}")
+            self._logged_in = False
+            return False
+        if response.history and response.url.path.endswith("/login"):
+            # A rejected login is redirected back to the login page
+            _LOGGER.error("eSolar portal did not accept the login of %s", self.username)
+            self._logged_in = False
+            return False
+
+        self._logged_in = True
+        self._login_generation += 1
+        return True
+
+    async def _async_relogin(self, generation):
+        """Login again unless another request already did since ``generation``."""
+        async with self._login_lock:
+            if self._logged_in and self._login_generation != generation:
+                return True
+            return await self.async_login()
+
+    async def async_logout(self):
+        """Logout from the eSolar portal and drop the session cookies."""
+        if not self._logged_in:
+            return
+
+        self._logged_in = False
+        response = await self.session.post(f"{self._provider.getBaseUrl()}/logout", headers=self.headers)
+        response.release()
+
+        if response.status != 200:
+            _LOGGER.error(f"{response.url} returned {response.status}")
+
+        # Clear session and cookies
+        self.session.cookie_jar.clear()
+
+    async def _timed_request(self, endpoint, start, request):
+        """Await a request, counting timeouts and connection errors of the endpoint."""
+        try:
+            return await request
+        except asyncio.TimeoutError:
+            self.metrics.endpoint(endpoint).record("timeout", time.monotonic() - start)
+            self.metrics.last_error = endpoint
+            raise
+        except aiohttp.ClientError:
+            self.metrics.endpoint(endpoint).record("error", time.monotonic() - start)
+            self.metrics.last_error = endpoint
+            raise
+
+    def _is_session_expired(self, response):
+        """Return True when the portal answered with its login page instead of data.
+
+        Redirects are not followed, a redirect counts when it points to the login page.
+        """
+        if response.status == 401:
+            return True
+        if response.status in (301, 302, 303, 307, 308):
+            return yarl.URL(response.headers.get(hdrs.LOCATION, "")).path.endswith("/login")
+        return response.status == 200 and response.content_type == "text/html"
+
+    async def async_request_json(self, method, url, data=None):
+        """Request an eSolar endpoint and return its decoded JSON, None on failure.
+
+        A request that is already in flight with the same url and payload is
+        not sent again, its result is shared. The result is only read, never
+        changed, by the callers.
+        """
+        key = (method, str(url), data)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._async_request_with_retries(method, url, data))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+            # The callers may all have given up, like a poll cancelled by unloading the entry
+            pending.add_done_callback(lambda task: task.cancelled() or task.exception())
+        # One caller giving up does not cancel the request for the others
+        return await asyncio.shield(pending)
+
+    async def _async_request_with_retries(self, method, url, data):
+        """Request an endpoint, retrying failures.
+
+        Timeouts, connection errors, 5xx/429 answers and answers that are not
+        JSON are retried with a jittered exponential backoff. Nothing is requested while the circuit
+        breaker is open.
+        """
+        if not self.breaker.allow():
+            return None
+
+        name = endpoint_name(url)
+        timeout = aiohttp.ClientTimeout(total=ENDPOINT_TIMEOUTS.get(name, REQUEST_TIMEOUT).total_seconds())
+        for attempt in range(REQUEST_RETRIES + 1):
+            if attempt:
+                self.metrics.endpoint(name).retries += 1
+                await asyncio.sleep(retry_delay(attempt))
+            try:
+                result = await self._async_request_json(method, url, data, timeout)
+            except (asyncio.TimeoutError, aiohttp.ClientError, TransientError) as err:
+                _LOGGER.debug("Request %s of %s failed: %s", attempt + 1, name, err or type(err).__name__)
+                continue
+
+            if result is None:
+                break
+            self.breaker.record_success()
+            return result
+
+        _LOGGER.warning("eSolar endpoint %s failed after %s attempts", name, attempt + 1)
+        self.breaker.record_failure()
+        return None
+
+    async def _async_request_json(self, method, url, data, timeout):
+        """Request an endpoint once.
+
+        Logs in first when there is no session yet and once more when the
+        portal reports the session as expired.
+        """
+        generation = self._login_generation
+        if not self._logged_in and not await self._async_relogin(generation):
+            return None
+
+        endpoint = self.metrics.endpoint(endpoint_name(url))
+        for attempt in range(2):
+            generation = self._login_generation
+            await self.bucket.async_acquire()
+            start = time.monotonic()
+            response = await self._timed_request(
+                endpoint_name(url),
+                start,
+                self.session.request(method, url, headers=self.headers, data=data, allow_redirects=False, timeout=timeout),
+            )
+
+            if not self._is_session_expired(response):
+                break
+
+            response.release()
+            endpoint.record(response.status if response.status != 200 else "expired", time.monotonic() - start)
+            if attempt:
+                _LOGGER.error(f"{url} still redirects to the login page after logging in again")
+                return None
+
+            _LOGGER.debug("eSolar session expired, logging in again")
+            endpoint.retries += 1
+            if not await self._async_relogin(generation):
+                return None
+
+        if response.status != 200:
+            response.release()
+            endpoint.record(response.status, time.monotonic() - start)
+            self.metrics.last_error = endpoint_name(url)
+            if response.status in RETRY_STATUSES:
+                raise TransientError(f"{response.url} returned {response.status}")
+            _LOGGER.error(f"{response.url} returned {response.status}")
+            return None
+
+        body = await self._timed_request(endpoint_name(url), start, response.read())
+        try:
+            result = json_loads(body)
+        except ValueError as err:
+            # A maintenance page or a cut off answer, like a 5xx it may be gone on the next try
+            endpoint.record("invalid_json", time.monotonic() - start, len(body))
+            self.metrics.last_error = endpoint_name(url)
+            raise TransientError(f"{response.url} did not return JSON: {err}") from err
+        endpoint.record(response.status, time.monotonic() - start, len(body))
+        return result
@@ -0,0 +1,80 @@
+"""Keep the day charts of earlier days on disk."""
+
+import asyncio
+import gzip
+import logging
+import os
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util import slugify
+from homeassistant.util.json import json_loads
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _read_month(path):
+    try:
+        with gzip.open(path, "rb") as file:
+            return json_loads(file.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as err:
+        _LOGGER.warning("Ignoring the archived charts in %s: %s", path, err)
+        return {}
+
+
+def _write_month(path, days):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(f"{path}.tmp", "wb") as file:
+        file.write(json_bytes(days))
+    os.replace(f"{path}.tmp", path)
+
+
+class ChartArchive(object):
+    """Day charts of earlier days, a gzipped JSON file per plant and month.
+
+    The backfill and the export save the charts they fetch, so the export
+    only requests the days that are not archived yet. A month holds the
+    charts per ISO day as SAJeSolarMeterData.async_fetch_day_charts returns
+    them. Only whole days are archived, today's charts still change.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the archive."""
+        self._hass = hass
+        self._locks = {}
+
+    def _path(self, plantuid, month):
+        return self._hass.config.path(DOMAIN, "charts", slugify(plantuid), f"{month}.json.gz")
+
+    def _lock(self, plantuid, month):
+        return self._locks.setdefault((plantuid, month), asyncio.Lock())
+
+    async def async_load_month(self, plantuid, month) -> dict:
+        """Return the archived charts of a month, ``month`` is YYYY-MM."""
+        async with self._lock(plantuid, month):
+            return await self._hass.async_add_executor_job(_read_month, self._path(plantuid, month))
+
+    async def async_save_days(self, plantuid, days):
+        """Add the charts of days, a dict of date to charts, to their months."""
+        months = {}
+        for day, charts in days.items():
+            months.setdefault(day.strftime("%Y-%m"), {})[day.isoformat()] = charts
+
+        for month, charts in months.items():
+            path = self._path(plantuid, month)
+            async with self._lock(plantuid, month):
+                archived = await self._hass.async_add_executor_job(_read_month, path)
+                archived.update(charts)
+                await self._hass.async_add_executor_job(_write_month, path, archived)
+
+
+def async_get_archive(hass: HomeAssistant) -> ChartArchive:
+    """Return the chart archive, shared by every configured account."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if "archive" not in data:
+        data["archive"] = ChartArchive(hass)
+    return data["archive"]
@@ -0,0 +1,181 @@
+"""Backfill the long-term statistics with the day charts of earlier days."""
+
+import asyncio
+import datetime
+import logging
+import time
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt
+
+from .archive import async_get_archive
+from .const import (
+    ATTR_START_DATE,
+    BACKFILL_CHECKPOINT_DAYS,
+    BACKFILL_CONCURRENCY,
+    BACKFILL_REQUEST_INTERVAL,
+    DOMAIN,
+    SERVICE_BACKFILL_STATISTICS,
+)
+from .coordinator import SAJeSolarMeterData
+from .statistics import chart_statistics
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+BACKFILL_SCHEMA = vol.Schema({vol.Required(ATTR_START_DATE): cv.date})
+
+
+class RateLimiter(object):
+    """Space out requests to the portal by a minimum interval."""
+
+    def __init__(self, interval: datetime.timedelta):
+        """Initialize the limiter."""
+        self._interval = interval.total_seconds()
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def async_wait(self):
+        """Wait until the next request is allowed."""
+        async with self._lock:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = time.monotonic() + self._interval
+
+
+class StatisticsBackfill(object):
+    """Rewrite the chart statistics of the plants of a coordinator from a start date.
+
+    The day charts are fetched a few days at a time with bounded concurrency
+    and imported in order, so the energy sums run on from the hours before the
+    start date up to the current hour. The progress is saved after every batch
+    of days and an interrupted backfill continues from there, also after a
+    restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: SAJeSolarMeterData):
+        """Initialize the backfill."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.backfill_{coordinator.storage_key}")
+        self._limiter = RateLimiter(BACKFILL_REQUEST_INTERVAL)
+        self._archive = async_get_archive(hass)
+        self._task = None
+
+    def async_start(self, start=None):
+        """Start a backfill from ``start`` in the background, or continue the saved one."""
+        if self._task is not None and not self._task.done():
+            _LOGGER.warning("A statistics backfill for %s is already running", self._coordinator.username)
+            return
+        self._task = self._hass.async_create_task(self.async_backfill(start))
+
+    async def async_backfill(self, start=None):
+        """Backfill every plant of the coordinator."""
+        checkpoints = await self._store.async_load() or {}
+        if start is None and not checkpoints:
+            return
+
+        if not self._coordinator.statistics.available or not self._coordinator.data:
+            _LOGGER.warning("Cannot backfill the statistics, the recorder or the plant data is not available")
+            return
+
+        for plant_id in sorted(self._coordinator.data):
+            plant = self._coordinator.data[plant_id].plant
+            checkpoint = checkpoints.get(plant["plantuid"])
+            if start is not None and (checkpoint is None or checkpoint["start"] != start.isoformat()):
+                checkpoint = {"start": start.isoformat()}
+            if checkpoint is None:
+                continue
+
+            checkpoints[plant["plantuid"]] = checkpoint
+            await self._async_backfill_plant(plant_id, plant, checkpoint, checkpoints)
+
+    async def _async_backfill_plant(self, plant_id, plant, checkpoint, checkpoints):
+        plantuid = plant["plantuid"]
+        statistics = self._coordinator.statistics
+        start = datetime.date.fromisoformat(checkpoint["start"])
+        today = dt.now().date()
+
+        if "day" in checkpoint:
+            day = datetime.date.fromisoformat(checkpoint["day"]) + datetime.timedelta(days=1)
+            last = {
+                statisticId: (dt.parse_datetime(hour) if hour else None, total)
+                for statisticId, (hour, total) in checkpoint["last"].items()
+            }
+        else:
+            day = start
+            last = await statistics.async_sums_before(plantuid, self._coordinator.day_charts, dt.start_of_local_day(start))
+
+        _LOGGER.info("Backfilling the statistics of plant %s from %s", plantuid, day)
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+        async def fetch_day(chartDay):
+            async with semaphore:
+                await self._limiter.async_wait()
+                return await self._coordinator.async_fetch_day_charts(plant_id, chartDay)
+
+        statistics.pause(plantuid)
+        try:
+            while day <= today:
+                days = [
+                    day + datetime.timedelta(days=offset)
+                    for offset in range(min(BACKFILL_CHECKPOINT_DAYS, (today - day).days + 1))
+                ]
+                results = await asyncio.gather(*(fetch_day(chartDay) for chartDay in days), return_exceptions=True)
+                # Keep the whole days for the export
+                await self._archive.async_save_days(plantuid, {
+                    chartDay: charts
+                    for chartDay, charts in zip(days, results)
+                    if chartDay < today and charts is not None and not isinstance(charts, Exception)
+                })
+
+                for chartDay, charts in zip(days, results):
+                    if charts is None or isinstance(charts, Exception):
+                        _LOGGER.warning("Backfill of plant %s stopped at %s, it continues from there on the next run", plantuid, chartDay)
+                        return
+                    now = dt.utcnow()
+                    for chart in self._coordinator.day_charts:
+                        statistics.async_add(chart_statistics(plant, chart, charts.get(chart), chartDay, now, last))
+                    checkpoint["day"] = chartDay.isoformat()
+
+                checkpoint["last"] = {
+                    statisticId: (hour.isoformat() if hour else None, total)
+                    for statisticId, (hour, total) in last.items()
+                }
+                await self._store.async_save(checkpoints)
+                day = days[-1] + datetime.timedelta(days=1)
+
+            del checkpoints[plantuid]
+            await self._store.async_save(checkpoints)
+            _LOGGER.info("Backfilled the statistics of plant %s from %s", plantuid, start)
+        finally:
+            statistics.resume(plantuid, last if plantuid not in checkpoints else None)
+
+
+def async_register_backfill(hass: HomeAssistant, backfill: StatisticsBackfill):
+    """Register the backfill service, it runs for every configured account.
+
+    Returns a callback that removes the backfill again, for unloading a config entry.
+    """
+    backfills = hass.data.setdefault(DOMAIN, {}).setdefault("backfills", [])
+    backfills.append(backfill)
+
+    @callback
+    def async_remove():
+        backfills.remove(backfill)
+
+    if hass.services.has_service(DOMAIN, SERVICE_BACKFILL_STATISTICS):
+        return async_remove
+
+    async def async_handle_backfill(call: ServiceCall):
+        for backfill in hass.data[DOMAIN]["backfills"]:
+            backfill.async_start(call.data[ATTR_START_DATE])
+
+    hass.services.async_register(DOMAIN, SERVICE_BACKFILL_STATISTICS, async_handle_backfill, schema=BACKFILL_SCHEMA)
+    return async_remove
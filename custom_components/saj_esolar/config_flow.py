@@ -0,0 +1,187 @@
+"""Config flow for the SAJ eSolar integration."""
+
+import asyncio
+import logging
+
+import aiohttp
+import voluptuous as vol
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_PASSWORD, CONF_RESOURCES, CONF_SENSORS, CONF_USERNAME
+from homeassistant.core import callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt, ssl as ssl_util
+
+from .api import EsolarProvider, EsolarSession, TransientError, plant_list_payload
+from .const import (
+    CONF_FORCE_REFRESH,
+    CONF_PLANT_IDS,
+    CONF_PLANTS,
+    CONF_PROMETHEUS,
+    CONF_PROVIDER_DOMAIN,
+    CONF_PROVIDER_PATH,
+    CONF_PROVIDER_PROTOCOL,
+    CONF_PROVIDER_SSL,
+    DEFAULT_PROVIDER_DOMAIN,
+    DEFAULT_PROVIDER_PATH,
+    DEFAULT_PROVIDER_PROTOCOL,
+    DOMAIN,
+    SENSORS_MODES,
+)
+from .sensor import SENSOR_LIST
+
+_LOGGER = logging.getLogger(__name__)
+
+USER_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_USERNAME): str,
+        vol.Required(CONF_PASSWORD): str,
+        vol.Required(CONF_SENSORS, default="None"): vol.In(SENSORS_MODES),
+        vol.Required(CONF_PROVIDER_DOMAIN, default=DEFAULT_PROVIDER_DOMAIN): str,
+        vol.Required(CONF_PROVIDER_PATH, default=DEFAULT_PROVIDER_PATH): str,
+        vol.Required(CONF_PROVIDER_PROTOCOL, default=DEFAULT_PROVIDER_PROTOCOL): vol.In(("https", "http")),
+        vol.Required(CONF_PROVIDER_SSL, default=True): bool,
+    }
+)
+
+
+class InvalidAuth(Exception):
+    """The portal did not accept the login."""
+
+
+class CannotConnect(Exception):
+    """The portal could not be reached or answered with something else than the plant list."""
+
+
+async def async_get_plants(hass, user_input):
+    """Login with the entered account and return its plant list.
+
+    Uses a session with a connector of its own that is closed again, so a
+    failed attempt does not touch the session of an account that is already
+    set up or the connector Home Assistant shares.
+    """
+    provider = EsolarProvider(user_input[CONF_PROVIDER_DOMAIN], user_input[CONF_PROVIDER_PATH], user_input[CONF_PROVIDER_PROTOCOL])
+    ssl_context = ssl_util.get_default_context() if user_input[CONF_PROVIDER_SSL] else ssl_util.get_default_no_verify_context()
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context))
+    esolar = EsolarSession(session, provider, user_input[CONF_USERNAME], user_input[CONF_PASSWORD])
+    try:
+        if not await esolar.async_login():
+            raise InvalidAuth
+        clientDate = dt.now().date().strftime('%Y-%m-%d')
+        plantInfo = await esolar.async_request_json("POST", provider.getPlantListUrl(), plant_list_payload(clientDate))
+        if not isinstance(plantInfo, dict) or not isinstance(plantInfo.get("plantList"), list):
+            raise CannotConnect
+        await esolar.async_logout()
+    except (asyncio.TimeoutError, aiohttp.ClientError, TransientError) as err:
+        raise CannotConnect from err
+    finally:
+        await session.close()
+    return plantInfo["plantList"]
+
+
+class SAJeSolarConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Set up an eSolar account and pick its plants."""
+
+    VERSION = 1
+
+    def __init__(self):
+        """Initialize the flow."""
+        self._user_input = None
+        self._plants = None
+
+    async def async_step_user(self, user_input=None):
+        """Ask for the account and the portal it is on."""
+        errors = {}
+        if user_input is not None:
+            await self.async_set_unique_id(f"{user_input[CONF_PROVIDER_DOMAIN]}_{user_input[CONF_USERNAME]}".lower())
+            self._abort_if_unique_id_configured()
+            try:
+                plants = await async_get_plants(self.hass, user_input)
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except Exception:
+                _LOGGER.exception("Unexpected error while checking the eSolar account")
+                errors["base"] = "unknown"
+            else:
+                plants = {
+                    plant["plantuid"]: {"plantuid": plant["plantuid"], "plantname": plant.get("plantname")}
+                    for plant in plants
+                    if isinstance(plant, dict) and plant.get("plantuid")
+                }
+                if not plants:
+                    errors["base"] = "no_plants"
+                else:
+                    self._user_input = user_input
+                    self._plants = plants
+                    return await self.async_step_plants()
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=self.add_suggested_values_to_schema(USER_SCHEMA, user_input),
+            errors=errors,
+        )
+
+    async def async_step_plants(self, user_input=None):
+        """Pick the plants of the account, a single plant is taken without asking."""
+        errors = {}
+        if len(self._plants) == 1:
+            user_input = {CONF_PLANT_IDS: list(self._plants)}
+
+        if user_input is not None:
+            if not user_input[CONF_PLANT_IDS]:
+                errors["base"] = "no_plants"
+            else:
+                # Stored by plantuid, the order of the plant list can change
+                return self.async_create_entry(
+                    title=self._user_input[CONF_USERNAME],
+                    data={
+                        **self._user_input,
+                        CONF_PLANTS: {plantuid: self._plants[plantuid] for plantuid in self._plants if plantuid in user_input[CONF_PLANT_IDS]},
+                    },
+                )
+
+        return self.async_show_form(
+            step_id="plants",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_PLANT_IDS, default=list(self._plants)): cv.multi_select(
+                        {plantuid: plant["plantname"] or plantuid for plantuid, plant in self._plants.items()}
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow."""
+        return SAJeSolarOptionsFlow()
+
+
+class SAJeSolarOptionsFlow(config_entries.OptionsFlow):
+    """Change the resources and the forced refresh of an account."""
+
+    async def async_step_init(self, user_input=None):
+        """Pick the resources, the forced refresh is in minutes and 0 turns it off."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        # The handler of an options flow is the entry id
+        options = self.hass.config_entries.async_get_entry(self.handler).options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_RESOURCES, default=options.get(CONF_RESOURCES, list(SENSOR_LIST))): cv.multi_select(
+                        {resource: resource for resource in SENSOR_LIST}
+                    ),
+                    vol.Required(CONF_FORCE_REFRESH, default=options.get(CONF_FORCE_REFRESH, 0)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0)
+                    ),
+                    vol.Required(CONF_PROMETHEUS, default=options.get(CONF_PROMETHEUS, False)): bool,
+                }
+            ),
+        )
@@ -0,0 +1,83 @@
+"""Constants for the SAJ eSolar component."""
+
+import datetime
+from typing import Final
+
+DOMAIN: Final = "saj_esolar"
+
+CONF_PLANT_ID: Final = "plant_id"
+CONF_PLANT_IDS: Final = "plant_ids"
+CONF_FORCE_REFRESH: Final = "force_refresh"
+CONF_PROMETHEUS: Final = "prometheus"
+CONF_PLANTS: Final = "plants"
+CONF_PROVIDER_DOMAIN: Final = "provider_domain"
+CONF_PROVIDER_PATH: Final = "provider_path"
+CONF_PROVIDER_PROTOCOL: Final = "provider_protocol"
+CONF_PROVIDER_SSL: Final = "provider_ssl"
+
+DEFAULT_PROVIDER_DOMAIN = "fop.saj-electric.com"
+DEFAULT_PROVIDER_PATH = "saj"
+DEFAULT_PROVIDER_PROTOCOL = "https"
+SENSORS_MODES = ("None", "h1", "saj_sec")
+
+PLANT_IDS_ALL: Final = "all"
+MAX_CONCURRENT_PLANTS = 4
+
+BASE_URL = 'https://fop.saj-electric.com/saj/login'
+
+DEVICE_TYPES = {
+    "Inverter": 0,
+    "Meter": 1,  # TODO: Pending to confirm
+    "Battery": 2,
+    0: "Inverter",
+    1: "Meter",  # TODO: Pending to confirm
+    2: "Battery",
+}
+
+MIN_TIME_BETWEEN_UPDATES = datetime.timedelta(minutes=5)
+MIN_POLL_INTERVAL = datetime.timedelta(minutes=1)
+UPLOAD_INTERVAL = datetime.timedelta(minutes=5)
+UPLOAD_GRACE = datetime.timedelta(seconds=45)
+# Upload gaps the period of the logger is learned from, an hour of 5 minute uploads
+UPLOAD_GAPS = 12
+IDLE_BEFORE_NIGHT = datetime.timedelta(minutes=30)
+NIGHT_POLL_INTERVAL = datetime.timedelta(minutes=30)
+OFFLINE_POLL_INTERVAL = datetime.timedelta(minutes=15)
+OFFLINE_AFTER = datetime.timedelta(minutes=30)
+METADATA_TTL = datetime.timedelta(hours=24)
+
+REQUEST_TIMEOUT = datetime.timedelta(seconds=20)
+ENDPOINT_TIMEOUTS = {
+    "getPlantDetailChart2": datetime.timedelta(seconds=30),
+    "getPlantMeterChartData": datetime.timedelta(seconds=30),
+}
+REQUEST_RETRIES = 2
+RETRY_BACKOFF = datetime.timedelta(seconds=1)
+RETRY_BACKOFF_MAX = datetime.timedelta(seconds=10)
+ACCOUNT_REQUEST_RATE = 1.0  # requests per second
+ACCOUNT_REQUEST_BURST = 15
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = datetime.timedelta(minutes=5)
+BREAKER_MAX_COOLDOWN = datetime.timedelta(hours=1)
+
+SNAPSHOT_VERSION = 3
+SNAPSHOT_MAX_AGE = datetime.timedelta(hours=24)
+SNAPSHOT_SAVE_DELAY = datetime.timedelta(seconds=30)
+
+HISTORY_SIZE = 288  # a day of polls after the 5 minute uploads, the day charts have 144 points
+TREND_WINDOW = datetime.timedelta(minutes=30)
+
+COUNTER_HOLD_MAX = datetime.timedelta(hours=1)
+COUNTER_GUARD_EVENTS = 50
+
+SERVICE_BACKFILL_STATISTICS: Final = "backfill_statistics"
+SERVICE_EXPORT_HISTORY: Final = "export_history"
+ATTR_START_DATE: Final = "start_date"
+ATTR_END_DATE: Final = "end_date"
+BACKFILL_CONCURRENCY = 2
+BACKFILL_REQUEST_INTERVAL = datetime.timedelta(seconds=1)
+BACKFILL_CHECKPOINT_DAYS = 7
+# Days of missed chart hours a poll imports into the statistics, the backfill service adds older ones
+CATCH_UP_DAYS = 7
+
+SENSOR_PREFIX = 'esolar '
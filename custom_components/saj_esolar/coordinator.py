@@ -0,0 +1,764 @@
+"""Coordinator fetching the eSolar portal data for all sensors of the configured plants."""
+
+import asyncio
+import datetime
+from itertools import zip_longest
+import logging
+import time
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt, slugify
+
+from .accounts import async_release_account
+from .api import EsolarSession, chart_query, plant_list_payload
+from .archive import async_get_archive
+from .const import (
+    CATCH_UP_DAYS,
+    DEVICE_TYPES,
+    DOMAIN,
+    MAX_CONCURRENT_PLANTS,
+    METADATA_TTL,
+    MIN_TIME_BETWEEN_UPDATES,
+    PLANT_IDS_ALL,
+    SNAPSHOT_MAX_AGE,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_VERSION,
+)
+from .energy import EnergyIntegrator
+from .guard import CounterGuard
+from .history import SampleHistory
+from .metrics import endpoint_name
+from .model import PlantData
+from .projection import project
+from .scheduler import PollScheduler
+from .statistics import HOUR, ChartStatistics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Plant stage results that come from the metadata cache
+METADATA_RESULTS = ("devicesInfoData", "getPlantMeterModuleList", "findDevicePageList")
+
+# Values that add up over the storage devices or Sec modules of a plant
+SUMMED_STORE_FIELDS = (
+    "batCapcity",
+    "batCurr",
+    "pvPower",
+    "solarPower",
+    "totalLoadPower",
+)
+# Unsigned powers of storeDevicePower and the direction field that gives their sign
+DIRECTED_STORE_FIELDS = {
+    "batteryPower": "batteryDirection",
+    "gridPower": "gridDirection",
+    "outPower": "outPutDirection",
+}
+SUMMED_METER_FIELDS = (
+    "pvElec",
+    "useElec",
+    "buyElec",
+    "sellElec",
+    "selfConsumedEnergy1",
+    "selfConsumedEnergy2",
+    "reduceCo2",
+    "plantTreeNum",
+)
+
+
+def _sum_values(values):
+    """Sum numeric values, skipping None, None when there is no value at all."""
+    values = [float(value) for value in values if value is not None]
+    return sum(values) if values else None
+
+
+def _sum_field(items, name):
+    """Sum a numeric field over several devices, None when no device reports it."""
+    return _sum_values(item.get(name) for item in items)
+
+
+def _signed_sum(devices, name, direction):
+    """Sum an unsigned power over several devices, each signed by its own direction field.
+
+    Returns the size and the direction (-1, 0 or 1) of the sum, None for
+    both when no device reports the power.
+    """
+    values = []
+    for device in devices:
+        if device.get(name) is None:
+            continue
+        try:
+            sign = int(device[direction])
+        except (KeyError, TypeError, ValueError):
+            sign = 1
+        values.append(float(device[name]) * sign)
+    if not values:
+        return None, None
+    total = sum(values)
+    return abs(total), (total > 0) - (total < 0)
+
+
+def aggregate_store_device_power(devices):
+    """Combine the storeDevicePower of several H1 devices into plant totals.
+
+    Power, current and capacity are summed, the battery level is weighted by
+    capacity. The battery, grid and output power are signed by the direction
+    of their device before they are summed, the direction of the total is the
+    sign of the sum. Other directions and flags are taken from the first device.
+    """
+    if len(devices) == 1:
+        return devices[0]
+
+    aggregate = dict(devices[0])
+    for name in SUMMED_STORE_FIELDS:
+        aggregate[name] = _sum_field(devices, name)
+    for name, direction in DIRECTED_STORE_FIELDS.items():
+        power, sign = _signed_sum(devices, name, direction)
+        aggregate[name] = power
+        if sign:
+            # A sum of 0 keeps the direction of the first device
+            aggregate[direction] = sign
+
+    weighted = [
+        (float(device["batEnergyPercent"]), float(device.get("batCapcity") or 0))
+        for device in devices
+        if device.get("batEnergyPercent") is not None
+    ]
+    total_capacity = sum(capacity for _, capacity in weighted)
+    if weighted and total_capacity:
+        aggregate["batEnergyPercent"] = sum(percent * capacity for percent, capacity in weighted) / total_capacity
+    elif weighted:
+        aggregate["batEnergyPercent"] = sum(percent for percent, _ in weighted) / len(weighted)
+    return aggregate
+
+
+def aggregate_meter_chart_data(charts):
+    """Combine the getPlantMeterChartData of several Sec modules into plant totals.
+
+    Energy counters in viewBean and every dataCountList series are summed,
+    rates are taken from the first module. A series point is None when no
+    module has a value for it, a shorter series of a module counts as None
+    for the points it misses.
+    """
+    if len(charts) == 1:
+        return charts[0]
+
+    aggregate = dict(charts[0])
+    viewBeans = [chart.get("viewBean") or {} for chart in charts]
+    aggregate["viewBean"] = dict(viewBeans[0])
+    for name in SUMMED_METER_FIELDS:
+        aggregate["viewBean"][name] = _sum_field(viewBeans, name)
+
+    seriesLists = [chart.get("dataCountList") or [] for chart in charts]
+    aggregate["dataCountList"] = [
+        [
+            _sum_values(values)
+            for values in zip_longest(*(series[index] for series in seriesLists if index < len(series)))
+        ]
+        for index in range(max(len(series) for series in seriesLists))
+    ]
+    return aggregate
+
+
+class SAJeSolarMeterData(DataUpdateCoordinator):
+    """Fetch the eSolar data once per interval and push it to all sensors."""
+
+    def __init__(self, hass: HomeAssistant, esolar: EsolarSession, sensors, plant_ids, provider, endpoints=None, fields=None, trends=(), counters=()):
+        """Initialize the data object.
+
+        ``esolar`` is the portal session of the account, it can be shared with
+        other platform entries. ``plant_ids`` holds the indexes into the plant
+        list of the account to fetch, the plantuids of the plants of a config
+        entry, or PLANT_IDS_ALL. The data is a dict with the PlantData per
+        plant index or plantuid. ``endpoints`` limits the requests to
+        the endpoints the configured resources need, see planner.plan_endpoints,
+        None fetches all. ``fields`` projects the response of every endpoint to
+        the fields that are read, see projection.plan_fields, None keeps all.
+        ``trends`` names the trend resources worked out from the recent
+        samples, see history.SampleHistory. ``counters`` are the value paths
+        of the total_increasing sensors, see guard.CounterGuard.
+        """
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=MIN_TIME_BETWEEN_UPDATES,
+        )
+
+        self._provider = provider
+        self._esolar   = esolar.acquire()
+        self.username  = esolar.username
+        self.sensors   = sensors
+        self.plant_ids = plant_ids
+        self.endpoints = endpoints
+        self.fields    = fields
+        self._metadata = {}
+        self._missing = set()
+        self._schedulers = {}
+        self._results = {}
+        self.statistics = ChartStatistics(hass)
+        self._archive = async_get_archive(hass)
+        self._caught_up = {}
+        self.energy = EnergyIntegrator(hass, self.storage_key)
+        self.history = SampleHistory(sensors, trends)
+        self.guard = CounterGuard(counters)
+        self._snapshot = Store(hass, SNAPSHOT_VERSION, f"{DOMAIN}.snapshot_{self.storage_key}")
+
+    @property
+    def storage_key(self):
+        """Return the part of the storage keys that tells platform entries of an account apart."""
+        if self.plant_ids == [0]:
+            return slugify(self.username)
+        return slugify(f"{self.username} {self.plant_ids}")
+
+    async def _fetch_json(self, method, url, data=None):
+        """Request a single eSolar endpoint and return its decoded JSON, None on failure.
+
+        Only the fields that are read are kept, so the results cached between
+        polls and the plant data stay small.
+        """
+        result = await self._esolar.async_request_json(method, url, data)
+        if result is None or self.fields is None:
+            return result
+        return project(result, self.fields.get(endpoint_name(url)))
+
+    @property
+    def metrics(self):
+        """Return the request and refresh counters of the account."""
+        return self._esolar.metrics
+
+    async def async_close(self):
+        """Logout from the eSolar portal, unless another platform entry still uses the session."""
+        await async_release_account(self.hass, self._esolar)
+
+    async def async_restore(self):
+        """Restore the data of the last good poll saved before the restart.
+
+        Returns True when a snapshot for the same sensors mode and plants was
+        restored, it is not used when it is older than SNAPSHOT_MAX_AGE.
+        """
+        try:
+            snapshot = await self._snapshot.async_load()
+        except NotImplementedError:
+            # Saved by a version with another schema
+            snapshot = None
+        if not snapshot or snapshot.get("sensors") != self.sensors or snapshot.get("plant_ids") != self.plant_ids:
+            return False
+
+        saved = dt.parse_datetime(snapshot["saved"])
+        if saved is None or dt.utcnow() - saved > SNAPSHOT_MAX_AGE:
+            return False
+
+        try:
+            # JSON made the plant indexes strings, plantuids are strings already
+            if self.plant_ids == PLANT_IDS_ALL:
+                keys = {plant_id: int(plant_id) for plant_id in snapshot["data"]}
+            else:
+                keys = {str(plant_id): plant_id for plant_id in self.plant_ids}
+            self.data = {keys[plant_id]: PlantData.from_dict(plant) for plant_id, plant in snapshot["data"].items()}
+        except (KeyError, IndexError, TypeError, ValueError) as err:
+            _LOGGER.debug("Not restoring the saved eSolar data: %s", err)
+            return False
+        # The restored counters are the values the first poll is checked against
+        self.guard.apply(self.data)
+        _LOGGER.debug("Restored the eSolar data saved at %s", saved)
+        return True
+
+    def _snapshot_data(self):
+        return {
+            "saved": dt.utcnow().isoformat(),
+            "sensors": self.sensors,
+            "plant_ids": self.plant_ids,
+            "data": {plant_id: plant.as_dict() for plant_id, plant in self.data.items()},
+        }
+
+    async def _fetch_metadata(self, name, method, url, data=None):
+        """Return slow-changing plant metadata from the cache, fetching it when missing or expired."""
+        cached = self._metadata.get(name)
+        if cached is not None and dt.utcnow() - cached[0] < METADATA_TTL:
+            return cached[1]
+
+        result = await self._fetch_json(method, url, data)
+        if result is not None:
+            self._metadata[name] = (dt.utcnow(), result)
+        return result
+
+    async def _fetch_plant_list(self, clientDate):
+        """Return the plant list of the account.
+
+        It changes like the other metadata, apart from isOnline, systempower
+        and the other plant fields the resources can show. Those are only up
+        to date every poll when a resource reads them, otherwise the cached
+        list just gives the plantuids and names.
+        """
+        if self.wants("getUserPlantList"):
+            return await self._fetch_json("POST", self._provider.getPlantListUrl(), plant_list_payload(clientDate))
+        return await self._fetch_metadata("getUserPlantList", "POST", self._provider.getPlantListUrl(), plant_list_payload(clientDate))
+
+    def invalidate_metadata(self):
+        """Drop the cached plant metadata so the next poll fetches it again."""
+        self._metadata.clear()
+
+    async def _fetch_stage(self, requests, scope=None, stale=None):
+        """Run independent endpoint requests concurrently on the shared session.
+
+        ``requests`` maps a result name to a pending ``_fetch_json`` coroutine.
+        With a ``scope`` a failed request falls back to its last result in that
+        scope and its name is added to ``stale``. Returns the results under the
+        same names, or None when a request failed without a result to fall back to.
+        """
+        results = dict(zip(requests, await asyncio.gather(*requests.values())))
+        for name, result in results.items():
+            if result is not None:
+                if scope is not None:
+                    self._results[(scope, name)] = result
+            elif scope is not None and (scope, name) in self._results:
+                results[name] = self._results[(scope, name)]
+                stale.append(name)
+            else:
+                return None
+        return results
+
+    async def _async_update_data(self):
+        """Download and update data from SAJeSolar."""
+
+        retry_after = self._esolar.breaker.retry_after()
+        if retry_after is not None:
+            self.update_interval = retry_after
+            raise UpdateFailed(f"eSolar portal is unavailable, trying again in {retry_after}")
+
+        today = dt.now().date()
+        start = time.monotonic()
+        data = None
+        try:
+            data = await self._async_fetch(today)
+
+        # Error logging
+        except aiohttp.ClientError as err:
+            raise UpdateFailed(f"Cannot poll eSolar {self.metrics.last_error}: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise UpdateFailed(f"Timeout error occurred while polling eSolar {self.metrics.last_error}") from err
+        except (KeyError, IndexError, TypeError) as err:
+            # The cached plant, device or module ids no longer match what the portal returns
+            self.invalidate_metadata()
+            raise UpdateFailed(f"Unexpected response while polling eSolar, refreshing plant metadata: {err}") from err
+        except Exception as err:
+            raise UpdateFailed(f"Unknown error occurred while polling eSolar: {err}") from err
+        finally:
+            self.metrics.record_refresh(time.monotonic() - start, data is not None)
+            retry_after = self._esolar.breaker.retry_after()
+            if retry_after is not None:
+                self.update_interval = retry_after
+
+        if data is None:
+            raise UpdateFailed(f"eSolar did not return the plant data, last failed endpoint {self.metrics.last_error}")
+
+        # Hold back counter drops before anything reads the data
+        self.guard.apply(data)
+
+        # -Debug- Cookies and Data
+        _LOGGER.debug(self._esolar.cookies)
+        _LOGGER.debug(data)
+
+        self.update_interval = min(
+            self._schedulers.setdefault(plant_id, PollScheduler(self.hass)).next_interval(plant)
+            for plant_id, plant in data.items()
+        )
+        _LOGGER.debug("Next eSolar poll in %s", self.update_interval)
+
+        await self._async_finish_energy(data)
+        self.energy.integrate(data)
+        self.history.update(data)
+        self.hass.async_create_task(self._async_import_statistics(data, today))
+        self._snapshot.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY.total_seconds())
+        return data
+
+    async def _async_finish_energy(self, data):
+        """Add the rest of the charts of the day before to the energy totals once the day changed."""
+        for plant_id, plantData in data.items():
+            for day in self.energy.unfinished_days(plantData):
+                try:
+                    charts = await self.async_day_charts(plant_id, day, plantData)
+                except Exception as err:
+                    _LOGGER.debug("Fetching the charts of plant %s of %s failed: %s", plant_id, day, err)
+                    charts = None
+                if charts is None:
+                    _LOGGER.warning("Could not fetch the charts of plant %s of %s, the energy totals miss the rest of that day", plant_id, day)
+                    continue
+                self.energy.finish_day(plantData, day, charts)
+
+    async def _async_import_statistics(self, data, today):
+        """Add the new hours of the day charts of every plant to the statistics.
+
+        The hours of earlier days that were missed first come from the charts
+        of those days, the last hour of yesterday is only complete after
+        midnight and Home Assistant may not have run for a while.
+        """
+        for plant_id, plantData in data.items():
+            try:
+                await self._async_import_missed_days(plant_id, plantData, today)
+                await self.statistics.async_import_chart(
+                    plantData.plant, "getPlantDetailChart2", plantData.day_chart("getPlantDetailChart2"), today
+                )
+                if plantData.getPlantMeterChartData is not None:
+                    await self.statistics.async_import_chart(
+                        plantData.plant, "getPlantMeterChartData", plantData.day_chart("getPlantMeterChartData"), today
+                    )
+            except Exception as err:
+                _LOGGER.warning("Could not import the charts of plant %s into the statistics: %s", plant_id, err)
+
+    async def _async_import_missed_days(self, plant_id, plantData: PlantData, today):
+        """Import the days before today from the day after the last imported hour, at most CATCH_UP_DAYS."""
+        plantuid = plantData.plant['plantuid']
+        last = await self.statistics.async_last_hour(plantuid, self.day_charts)
+        if last is None:
+            # Nothing imported yet, the statistics start with today's chart
+            return
+
+        day = dt.as_local(last + HOUR).date()
+        if plantuid in self._caught_up:
+            day = max(day, self._caught_up[plantuid] + datetime.timedelta(days=1))
+        if (today - day).days > CATCH_UP_DAYS:
+            _LOGGER.warning(
+                "The statistics of plant %s miss the days from %s, importing the last %s days, "
+                "the backfill_statistics service adds the days before",
+                plantuid, day, CATCH_UP_DAYS,
+            )
+            day = today - datetime.timedelta(days=CATCH_UP_DAYS)
+
+        while day < today:
+            charts = await self.async_day_charts(plant_id, day, plantData)
+            if charts is None:
+                _LOGGER.warning("Could not fetch the charts of plant %s of %s for the statistics, trying again on the next poll", plantuid, day)
+                return
+            for chart in self.day_charts:
+                await self.statistics.async_import_chart(plantData.plant, chart, charts.get(chart), day)
+            self._caught_up[plantuid] = day
+            day += datetime.timedelta(days=1)
+
+    async def _async_fetch(self, today):
+        """Fetch the plant list and the selected plants, None when no plant could be fetched."""
+
+        clientDate = today.strftime('%Y-%m-%d')
+
+        # Get API Plant info from Esolar Portal
+        plantInfo = await self._fetch_plant_list(clientDate)
+
+        if plantInfo is None:
+            return None
+
+        indexes = self._plant_indexes(plantInfo['plantList'])
+        plant_ids = list(indexes)
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PLANTS)
+
+        async def fetch_plant(plant_id):
+            async with semaphore:
+                return await self._async_fetch_plant(plantInfo, plant_id, indexes[plant_id], today)
+
+        results = await asyncio.gather(*(fetch_plant(plant_id) for plant_id in plant_ids))
+
+        data = {}
+        previous = self.data or {}
+        for plant_id, plantData in zip(plant_ids, results):
+            if plantData is None:
+                if plant_id not in previous:
+                    continue
+                _LOGGER.warning("Keeping the previous data of plant %s, refresh failed", plant_id)
+                plantData = previous[plant_id]
+            data[plant_id] = plantData
+
+        if not any(results):
+            return None
+        return data
+
+    def _plant_indexes(self, plantList):
+        """Return the index in the plant list of every configured plant that is in it.
+
+        Plants that are no longer in the list are skipped with a warning, the
+        other plants are still fetched.
+        """
+        if self.plant_ids == PLANT_IDS_ALL:
+            return {index: index for index in range(len(plantList))}
+
+        uids = {plant.get('plantuid'): index for index, plant in enumerate(plantList) if isinstance(plant, dict)}
+        indexes = {}
+        for plant_id in self.plant_ids:
+            if isinstance(plant_id, str):
+                index = uids.get(plant_id)
+            else:
+                index = plant_id if 0 <= plant_id < len(plantList) else None
+            if index is not None:
+                indexes[plant_id] = index
+                self._missing.discard(plant_id)
+            elif plant_id not in self._missing:
+                self._missing.add(plant_id)
+                _LOGGER.warning("Plant %s is not in the plant list of %s, skipping it", plant_id, self.username)
+        return indexes
+
+    async def _async_fetch_plant(self, plantInfo, plant_id, index, today):
+        """Fetch all endpoints for one plant into a PlantData, None when an endpoint failed.
+
+        ``plant_id`` is the key of the plant in the data, ``index`` its index in the plant list.
+        """
+
+        clientDate = today.strftime('%Y-%m-%d')
+        plantuid = plantInfo['plantList'][index]['plantuid']
+
+        chartMonth = today.strftime('%Y-%m')
+        epochmilliseconds = round(int((datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds() * 1000))
+
+        # Stage 1: everything that only depends on the plantuid
+        plantStage = {
+            # Get API Plant Solar Details
+            "plantDetails": self._fetch_json(
+                "POST",
+                f"{self._provider.getBaseUrl()}/monitor/site/getPlantDetailInfo",
+                f"plantuid={plantuid}&clientDate={clientDate}",
+            ),
+        }
+        if self.wants("findDevicePageList"):
+            plantStage["devicesInfoData"] = self._fetch_metadata(
+                f"findDevicePageList_{plantuid}",
+                "POST",
+                f"{self._provider.getBaseUrl()}/cloudMonitor/device/findDevicePageList",
+                f"officeId=&pageNo=&pageSize=&orderName=1&orderType=2&plantuid={plantuid}&deviceStatus=&localDate=&localMonth=",
+            )
+
+        # Sec module
+        if self.sensors == "saj_sec":
+            if self.wants("getPlantMeterModuleList"):
+                plantStage["getPlantMeterModuleList"] = self._fetch_metadata(
+                    f"getPlantMeterModuleList_{plantuid}",
+                    "POST",
+                    f"{self._provider.getBaseUrl()}/cloudmonitor/plantMeterModule/getPlantMeterModuleList",
+                    f"pageNo=&pageSize=&plantUid={plantuid}",
+                )
+            if self.wants("findDevicePageList"):
+                plantStage["findDevicePageList"] = self._fetch_metadata(
+                    f"findDevicePageList_sec_{plantuid}",
+                    "POST",
+                    f"{self._provider.getBaseUrl()}/cloudMonitor/device/findDevicePageList",
+                    f"officeId=1&pageNo=&pageSize=&orderName=1&orderType=2&plantuid={plantuid}&deviceStatus=&localDate={chartMonth}&localMonth={chartMonth}",
+                )
+            if self.wants("getPlantMeterDetailInfo"):
+                plantStage["getPlantMeterDetailInfo"] = self._fetch_json(
+                    "POST",
+                    f"{self._provider.getBaseUrl()}/monitor/site/getPlantMeterDetailInfo",
+                    f"plantuid={plantuid}&clientDate={clientDate}",
+                )
+
+        stale = []
+        plantResults = await self._fetch_stage(plantStage, plant_id, stale)
+        if plantResults is None:
+            self.invalidate_metadata()
+            return None
+
+        plantData = PlantData(
+            index,
+            plantInfo,
+            plantResults["plantDetails"],
+            findDevicePageList=plantResults.get("devicesInfoData"),
+            secDevicePageList=plantResults.get("findDevicePageList"),
+            getPlantMeterModuleList=plantResults.get("getPlantMeterModuleList"),
+            getPlantMeterDetailInfo=plantResults.get("getPlantMeterDetailInfo"),
+            day=today.isoformat(),
+        )
+
+        # Stage 2: everything that depends on the device or module serial numbers
+        deviceStage = {}
+
+        if self.wants("getPlantDetailChart2"):
+            deviceSnArr = self._chart_device_sn(plantData)
+            elecDevicesn = deviceSnArr if self.sensors == "h1" else ""
+            # getPlantDetailChart2
+            deviceStage["plantcharts"] = self._fetch_plant_chart(plantuid, today, deviceSnArr, elecDevicesn)
+
+        # H1 Module, every storage device
+        if self.sensors == "h1" and self.wants("getStoreOrAcDevicePowerInfo"):
+            storageSnList = self._storage_sn_list(plantData)
+            for devicesn in storageSnList:
+                deviceStage[f"getStoreOrAcDevicePowerInfo_{devicesn}"] = self._fetch_json(
+                    "POST",
+                    f"{self._provider.getBaseUrl()}/monitor/site/getStoreOrAcDevicePowerInfo?plantuid=&devicesn={devicesn}&_={epochmilliseconds}",
+                )
+
+        # Sec module, every meter module
+        meterEndpoints = [
+            endpoint
+            for endpoint in ("getPlantMeterEnergyPreviewInfo", "getPlantMeterChartData")
+            if self.sensors == "saj_sec" and self.wants(endpoint)
+        ]
+        if meterEndpoints:
+            moduleSnList = [module['moduleSn'] for module in plantResults["getPlantMeterModuleList"]['moduleList']]
+            if not moduleSnList:
+                raise IndexError(f"plant {plantuid} has no Sec module")
+
+            # -Debug- Sec module serial numbers
+            _LOGGER.debug(moduleSnList)
+
+            for moduleSn in moduleSnList:
+                if "getPlantMeterEnergyPreviewInfo" in meterEndpoints:
+                    deviceStage[f"getPlantMeterEnergyPreviewInfo_{moduleSn}"] = self._fetch_json(
+                        "GET",
+                        f"{self._provider.getBaseUrl()}/monitor/site/getPlantMeterEnergyPreviewInfo?plantuid={plantuid}&moduleSn={moduleSn}&_={epochmilliseconds}",
+                    )
+                if "getPlantMeterChartData" in meterEndpoints:
+                    # Get Sec Meter details
+                    deviceStage[f"getPlantMeterChartData_{moduleSn}"] = self._fetch_meter_chart(plantuid, today, moduleSn)
+
+        deviceResults = await self._fetch_stage(deviceStage, plant_id, stale)
+        if deviceResults is None:
+            # A stale serial number from the cached device or module list also ends up here
+            self.invalidate_metadata()
+            return None
+
+        # Keep the last results of failed endpoints, unless nothing new came in at all
+        telemetry = [name for name in (*plantStage, *deviceStage) if name not in METADATA_RESULTS]
+        if stale:
+            if all(name in stale for name in telemetry):
+                return None
+            _LOGGER.warning("Using the previous results of %s for plant %s", ", ".join(stale), plant_id)
+
+        plantData.getPlantDetailChart2 = deviceResults.get("plantcharts")
+
+        if self.sensors == "h1" and self.wants("getStoreOrAcDevicePowerInfo"):
+            devices = {
+                devicesn: deviceResults[f"getStoreOrAcDevicePowerInfo_{devicesn}"]
+                for devicesn in storageSnList
+            }
+            plantData.getStoreOrAcDevicePowerInfo = dict(
+                devices[storageSnList[0]],
+                storeDevicePower=aggregate_store_device_power(
+                    [device["storeDevicePower"] for device in devices.values()]
+                ),
+            )
+            plantData.devices = devices
+            _LOGGER.debug(devices)
+
+        if meterEndpoints:
+            modules = {
+                moduleSn: {
+                    endpoint: deviceResults[f"{endpoint}_{moduleSn}"]
+                    for endpoint in meterEndpoints
+                }
+                for moduleSn in moduleSnList
+            }
+            if "getPlantMeterEnergyPreviewInfo" in meterEndpoints:
+                plantData.getPlantMeterEnergyPreviewInfo = modules[moduleSnList[0]]["getPlantMeterEnergyPreviewInfo"]
+            if "getPlantMeterChartData" in meterEndpoints:
+                plantData.getPlantMeterChartData = aggregate_meter_chart_data(
+                    [module["getPlantMeterChartData"] for module in modules.values()]
+                )
+            plantData.modules = modules
+
+        plantData.stale_results = stale
+        return plantData
+
+    def wants(self, endpoint):
+        """Return True when the configured resources need ``endpoint``."""
+        return self.endpoints is None or endpoint in self.endpoints
+
+    @property
+    def day_charts(self):
+        """Return the day charts fetched for the configured resources."""
+        charts = []
+        if self.wants("getPlantDetailChart2"):
+            charts.append("getPlantDetailChart2")
+        if self.sensors == "saj_sec" and self.wants("getPlantMeterChartData"):
+            charts.append("getPlantMeterChartData")
+        return tuple(charts)
+
+    def _storage_sn_list(self, plantData: PlantData):
+        """Return the serial numbers of the storage devices of an H1 plant."""
+        return [
+            item['devicesn']
+            for item in plantData.findDevicePageList["list"]
+            if item["type"] == DEVICE_TYPES["Battery"]
+        ] or plantData.detail["snList"][:1]
+
+    def _chart_device_sn(self, plantData: PlantData):
+        """Return the serial number the day chart of a plant is asked for."""
+        if self.sensors == "h1":
+            return self._storage_sn_list(plantData)[0]
+        return plantData.detail["snList"][0]
+
+    def _fetch_plant_chart(self, plantuid, day, deviceSnArr, elecDevicesn, clientDate=None):
+        """Request the getPlantDetailChart2 day chart of a plant."""
+        epochmilliseconds = round(int((datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds() * 1000))
+        return self._fetch_json(
+            "POST",
+            f"{self._provider.getBaseUrl()}/monitor/site/getPlantDetailChart2?plantuid={plantuid}&{chart_query(day, deviceSnArr, clientDate)}&elecDevicesn={elecDevicesn}&_={epochmilliseconds}",
+        )
+
+    def _fetch_meter_chart(self, plantuid, day, moduleSn, clientDate=None):
+        """Request the getPlantMeterChartData day chart of a Sec module."""
+        epochmilliseconds = round(int((datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds() * 1000))
+        return self._fetch_json(
+            "POST",
+            f"{self._provider.getBaseUrl()}/monitor/site/getPlantMeterChartData?plantuid={plantuid}&{chart_query(day, '', clientDate)}&moduleSn={moduleSn}&_={epochmilliseconds}",
+        )
+
+    async def async_fetch_day_charts(self, plant_id, day, plantData: PlantData | None = None):
+        """Fetch the day charts of an earlier day for a plant that was polled before.
+
+        Returns the dataCountList per chart like the live poll merges them,
+        and under "modules" the dataCountList of getPlantMeterChartData per Sec
+        module. None when a chart could not be fetched. ``plantData`` is the
+        data of the plant the serial numbers are taken from, the last polled
+        data by default.
+        """
+        plantData = plantData or self.data[plant_id]
+        plantuid = plantData.plant['plantuid']
+        clientDate = dt.now().date()
+
+        requests = {}
+        if self.wants("getPlantDetailChart2"):
+            deviceSnArr = self._chart_device_sn(plantData)
+            elecDevicesn = deviceSnArr if self.sensors == "h1" else ""
+            requests["getPlantDetailChart2"] = self._fetch_plant_chart(plantuid, day, deviceSnArr, elecDevicesn, clientDate)
+        meterCharts = self.sensors == "saj_sec" and self.wants("getPlantMeterChartData")
+        if meterCharts:
+            for moduleSn in plantData.modules:
+                requests[f"getPlantMeterChartData_{moduleSn}"] = self._fetch_meter_chart(plantuid, day, moduleSn, clientDate)
+
+        results = await self._fetch_stage(requests)
+        if results is None:
+            return None
+
+        charts = {}
+        if "getPlantDetailChart2" in results:
+            charts["getPlantDetailChart2"] = results["getPlantDetailChart2"].get("dataCountList")
+        if meterCharts:
+            charts["getPlantMeterChartData"] = aggregate_meter_chart_data(
+                [results[f"getPlantMeterChartData_{moduleSn}"] for moduleSn in plantData.modules]
+            ).get("dataCountList")
+            charts["modules"] = {
+                moduleSn: results[f"getPlantMeterChartData_{moduleSn}"].get("dataCountList")
+                for moduleSn in plantData.modules
+            }
+        return charts
+
+    async def async_day_charts(self, plant_id, day, plantData: PlantData | None = None):
+        """Return the day charts of an earlier day from the chart archive, fetching and archiving them when missing.
+
+        Like async_fetch_day_charts, None when a chart could not be fetched.
+        """
+        plantData = plantData or self.data[plant_id]
+        plantuid = plantData.plant['plantuid']
+        needed = self.day_charts + (("modules",) if "getPlantMeterChartData" in self.day_charts else ())
+        archived = (await self._archive.async_load_month(plantuid, day.strftime("%Y-%m"))).get(day.isoformat())
+        if archived is not None and all(chart in archived for chart in needed):
+            return archived
+
+        charts = await self.async_fetch_day_charts(plant_id, day, plantData)
+        if charts is not None:
+            await self._archive.async_save_days(plantuid, {day: charts})
+        return charts
+
+    @property
+    def latest_data(self):
+        """Return the latest data object."""
+        return self.data
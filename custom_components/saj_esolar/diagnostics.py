@@ -0,0 +1,50 @@
+"""Diagnostics of the SAJ eSolar config entries."""
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PLANTS, DOMAIN
+
+TO_REDACT = {
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    # The key of a config entry plant is its plantuid
+    "plant_id",
+    "plantuid",
+    "plantname",
+    "address",
+    "latitude",
+    "longitude",
+    "devicesn",
+    "deviceSn",
+}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return the settings, the poller metrics and the held back counters of an account."""
+    data = hass.data[DOMAIN]["entries"][entry.entry_id]
+    config = dict(entry.data)
+    if CONF_PLANTS in config:
+        # The plants are keyed by plantuid, only values are redacted
+        config[CONF_PLANTS] = list(config[CONF_PLANTS].values())
+    return {
+        "entry": async_redact_data(config, TO_REDACT),
+        "options": dict(entry.options),
+        "endpoints": sorted(data.endpoints) if data.endpoints is not None else None,
+        "metrics": data.metrics.as_dict(),
+        "plants": async_redact_data(
+            [
+                {
+                    "plant_id": plant_id,
+                    "day": plantData.day,
+                    # The results of devices and modules end in their serial number, keep the endpoint
+                    "stale_results": [name.partition("_")[0] for name in plantData.stale_results],
+                }
+                for plant_id, plantData in (data.data or {}).items()
+            ],
+            TO_REDACT,
+        ),
+        "counter_guard": async_redact_data(data.guard.as_dict(), TO_REDACT),
+    }
@@ -0,0 +1,149 @@
+"""Integrate the power series of the day charts into energy totals."""
+
+import datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY
+from .model import PlantData
+from .statistics import CHART_SERIES, DAY
+
+STORAGE_VERSION = 1
+
+# Stale result names of the charts, see SAJeSolarMeterData._async_fetch_plant
+STALE_CHARTS = {
+    "getPlantDetailChart2": "plantcharts",
+    "getPlantMeterChartData": "getPlantMeterChartData_",
+}
+
+
+def integrate_series(values, day_start, now, start=0):
+    """Return the kWh of the points of a day series from index ``start``, and the index to continue from.
+
+    Like hourly_buckets the points are spread evenly over the day and hold
+    the mean power in W of their part of it. Only points that are over at
+    ``now`` are added, up to the last point with a value, as the logger may
+    not have uploaded the later ones yet. Negative power counts as 0.
+    """
+    if not values:
+        return 0.0, start
+
+    width = DAY / len(values)
+    filled = max((index + 1 for index, value in enumerate(values) if value is not None), default=0)
+    complete = min(filled, max(0, int((now - day_start) / width)))
+
+    energy = 0.0
+    for value in values[start:complete]:
+        if value is not None:
+            energy += max(0.0, float(value)) * (width / datetime.timedelta(hours=1)) / 1000
+    return energy, max(start, complete)
+
+
+def _day_energy(total, values, day_start):
+    """Return the kWh added to a total for its day.
+
+    Totals saved by an earlier version hold the index of the next point instead.
+    """
+    if "next" in total:
+        width = DAY / len(values) if values else DAY
+        total["energy"], _ = integrate_series(values, day_start, day_start + total.pop("next") * width)
+    return total["energy"]
+
+
+class EnergyIntegrator(object):
+    """Running energy totals of the chart power series of the plants of an account.
+
+    Every refresh integrates today's charts and adds what they hold more than
+    before, so the totals follow the 5 minute series of the portal instead of
+    the samples the entities get, also when points are filled in later. When
+    the day changed the rest of the day before is added from its chart first,
+    see finish_day. The totals and the energy added for the day are saved, so
+    they continue after a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, key):
+        """Initialize the totals, ``key`` tells the stores of the platform entries apart."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.energy_{key}")
+        self._totals = {}
+
+    async def async_load(self):
+        """Load the totals saved before the restart."""
+        self._totals = await self._store.async_load() or {}
+
+    def unfinished_days(self, plantData: PlantData):
+        """Return the earlier days the totals of a plant were last added for, their charts are not finished yet."""
+        if plantData.day is None:
+            return []
+        totals = self._totals.get(plantData.plant["plantuid"], {})
+        return sorted({
+            datetime.date.fromisoformat(total["day"])
+            for total in totals.values()
+            if total["day"] is not None and total["day"] < plantData.day
+        })
+
+    def finish_day(self, plantData: PlantData, day, charts):
+        """Add the rest of the charts of an earlier day to the totals that were added for that day.
+
+        ``charts`` are the dataCountList per chart of the day, like
+        SAJeSolarMeterData.async_fetch_day_charts returns them.
+        """
+        totals = self._totals.get(plantData.plant["plantuid"], {})
+        day_start = dt.start_of_local_day(day)
+        for chart, series in CHART_SERIES.items():
+            dataCountList = charts.get(chart) or []
+            for index, name in series.items():
+                total = totals.get(name)
+                if total is None or total["day"] != day.isoformat() or index >= len(dataCountList):
+                    continue
+                energy, _ = integrate_series(dataCountList[index], day_start, day_start + DAY)
+                added = _day_energy(total, dataCountList[index], day_start)
+                if energy > added:
+                    total["total"] += energy - added
+                    total["energy"] = energy
+        self._store.async_delay_save(lambda: self._totals, SNAPSHOT_SAVE_DELAY.total_seconds())
+
+    def integrate(self, data, now=None):
+        """Add the new chart points of every plant and set their totals on the PlantData."""
+        now = now or dt.utcnow()
+        changed = False
+        for plantData in data.values():
+            changed |= self._integrate_plant(plantData, now)
+        if changed:
+            self._store.async_delay_save(lambda: self._totals, SNAPSHOT_SAVE_DELAY.total_seconds())
+
+    def _integrate_plant(self, plantData: PlantData, now):
+        if plantData.day is None:
+            return False
+
+        day_start = dt.start_of_local_day(datetime.date.fromisoformat(plantData.day))
+        totals = self._totals.setdefault(plantData.plant["plantuid"], {})
+        changed = False
+        for chart, series in CHART_SERIES.items():
+            dataCountList = plantData.day_chart(chart)
+            if not dataCountList or any(name.startswith(STALE_CHARTS[chart]) for name in plantData.stale_results):
+                continue
+
+            for index, name in series.items():
+                if index >= len(dataCountList):
+                    continue
+                total = totals.setdefault(name, {"day": None, "energy": 0.0, "total": 0.0})
+                if total["day"] != plantData.day:
+                    if total["day"] is not None and total["day"] > plantData.day:
+                        # The chart of a plant kept from an earlier day
+                        continue
+                    total["day"] = plantData.day
+                    total.pop("next", None)
+                    total["energy"] = 0.0
+                    changed = True
+
+                energy, _ = integrate_series(dataCountList[index], day_start, now)
+                added = _day_energy(total, dataCountList[index], day_start)
+                if energy > added:
+                    total["total"] += energy - added
+                    total["energy"] = energy
+                    changed = True
+
+        plantData.energy = {name: round(total["total"], 3) for name, total in totals.items()}
+        return changed
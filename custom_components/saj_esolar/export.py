@@ -0,0 +1,242 @@
+"""Export the day chart series of the plants to compressed CSV files."""
+
+import asyncio
+import csv
+import datetime
+import gzip
+import logging
+import os
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt, slugify
+
+from .archive import async_get_archive
+from .backfill import RateLimiter
+from .const import (
+    ATTR_END_DATE,
+    ATTR_START_DATE,
+    BACKFILL_CONCURRENCY,
+    BACKFILL_REQUEST_INTERVAL,
+    DOMAIN,
+    SERVICE_EXPORT_HISTORY,
+)
+from .coordinator import SAJeSolarMeterData
+from .statistics import CHART_SERIES, DAY
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_END_DATE): cv.date,
+    }
+)
+
+
+def _open(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return gzip.open(path, "wt", newline="")
+
+
+def _write_rows(file, rows):
+    csv.writer(file).writerows(rows)
+
+
+def _close(file, path, complete):
+    file.close()
+    if complete:
+        os.replace(f"{path}.tmp", path)
+    else:
+        os.remove(f"{path}.tmp")
+
+
+def _months(start, end):
+    """Yield the days from ``start`` to ``end`` grouped per month."""
+    day = start
+    while day <= end:
+        month = []
+        while day <= end and (not month or day.month == month[0].month):
+            month.append(day)
+            day += datetime.timedelta(days=1)
+        yield month
+
+
+def series_columns(charts, modules=()):
+    """Return the CSV columns of the series of the charts as (header, chart, module, index).
+
+    The plant totals of the charts are named after their series, the series
+    of every Sec module get the serial number in front.
+    """
+    columns = []
+    for chart in charts:
+        for index, name in CHART_SERIES[chart].items():
+            columns.append((name, chart, None, index))
+    if "getPlantMeterChartData" in charts:
+        for moduleSn in modules:
+            for index, name in CHART_SERIES["getPlantMeterChartData"].items():
+                columns.append((f"{moduleSn}_{name}", "getPlantMeterChartData", moduleSn, index))
+    return columns
+
+
+def day_rows(day, charts, columns, now):
+    """Return the rows of a day, a local time and the value of every column per chart point.
+
+    The points are spread evenly over the day like in hourly_buckets, the
+    rows follow the longest series and stop at the points that are not over
+    at ``now``.
+    """
+    series = []
+    for _, chart, moduleSn, index in columns:
+        dataCountList = charts.get("modules", {}).get(moduleSn) if moduleSn else charts.get(chart)
+        series.append(dataCountList[index] if dataCountList and index < len(dataCountList) else None)
+
+    points = max((len(values) for values in series if values), default=0)
+    if not points:
+        return []
+
+    day_start = dt.start_of_local_day(day)
+    width = DAY / points
+    rows = []
+    for position in range(points):
+        start = day_start + width * position
+        if start + width > now:
+            break
+        row = [start.isoformat()]
+        for values in series:
+            value = values[position * len(values) // points] if values else None
+            row.append(value)
+        rows.append(row)
+    return rows
+
+
+class HistoryExport(object):
+    """Write the day chart series of the plants of a coordinator to a CSV file per plant.
+
+    The days are taken from the chart archive, only the days that are not
+    archived are fetched from the portal and archived. A month is read,
+    fetched and written at a time, so the memory use does not grow with the
+    length of the range. The file is gzipped and renamed into place when it
+    is complete. Accounts with the same plant export to the same file, only
+    one of them writes it at a time.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: SAJeSolarMeterData):
+        """Initialize the export."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._archive = async_get_archive(hass)
+        self._limiter = RateLimiter(BACKFILL_REQUEST_INTERVAL)
+        # The paths being written by the exports of every account
+        self._running = hass.data.setdefault(DOMAIN, {}).setdefault("export_paths", set())
+        self._task = None
+
+    def async_start(self, start, end):
+        """Start an export from ``start`` to ``end`` in the background."""
+        if self._task is not None and not self._task.done():
+            _LOGGER.warning("An export for %s is already running", self._coordinator.username)
+            return
+        self._task = self._hass.async_create_task(self.async_export(start, end))
+
+    async def async_export(self, start, end):
+        """Export every plant of the coordinator."""
+        if not self._coordinator.data or not self._coordinator.day_charts:
+            _LOGGER.warning("Cannot export, the plant data or the chart resources are not available")
+            return
+
+        for plant_id in sorted(self._coordinator.data):
+            await self._async_export_plant(plant_id, start, end)
+
+    async def _async_export_plant(self, plant_id, start, end):
+        plantData = self._coordinator.data[plant_id]
+        plantuid = plantData.plant["plantuid"]
+        charts = self._coordinator.day_charts
+        columns = series_columns(charts, plantData.modules)
+        needed = charts + (("modules",) if "getPlantMeterChartData" in charts else ())
+        path = self._hass.config.path(DOMAIN, f"export_{slugify(plantuid)}_{start}_{end}.csv.gz")
+        if path in self._running:
+            _LOGGER.warning("The charts of plant %s from %s to %s are already being exported", plantuid, start, end)
+            return
+
+        _LOGGER.info("Exporting the charts of plant %s from %s to %s", plantuid, start, end)
+        self._running.add(path)
+        try:
+            if await self._async_write(plant_id, plantuid, path, columns, needed, start, end):
+                _LOGGER.info("Exported the charts of plant %s to %s", plantuid, path)
+        finally:
+            self._running.discard(path)
+
+    async def _async_write(self, plant_id, plantuid, path, columns, needed, start, end):
+        """Write the rows of a plant to ``path``, returns False when the portal did not return the charts."""
+        file = await self._hass.async_add_executor_job(_open, f"{path}.tmp")
+        complete = False
+        try:
+            await self._hass.async_add_executor_job(_write_rows, file, [["time"] + [column[0] for column in columns]])
+            for days in _months(start, end):
+                archived = await self._archive.async_load_month(plantuid, days[0].strftime("%Y-%m"))
+                missing = [
+                    day for day in days
+                    if not all(chart in archived.get(day.isoformat(), {}) for chart in needed)
+                ]
+                fetched = await self._async_fetch_days(plant_id, missing)
+                if fetched is None:
+                    _LOGGER.warning("Export of plant %s stopped in %s, the portal did not return the charts", plantuid, days[0].strftime("%Y-%m"))
+                    return False
+
+                today = dt.now().date()
+                await self._archive.async_save_days(plantuid, {day: dayCharts for day, dayCharts in fetched.items() if day < today})
+
+                now = dt.utcnow()
+                rows = []
+                for day in days:
+                    dayCharts = fetched[day] if day in fetched else archived[day.isoformat()]
+                    rows.extend(day_rows(day, dayCharts, columns, now))
+                await self._hass.async_add_executor_job(_write_rows, file, rows)
+            complete = True
+        finally:
+            await self._hass.async_add_executor_job(_close, file, path, complete)
+        return True
+
+    async def _async_fetch_days(self, plant_id, days):
+        """Fetch the charts of days from the portal, None when one of them failed."""
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+        async def fetch_day(day):
+            async with semaphore:
+                await self._limiter.async_wait()
+                return await self._coordinator.async_fetch_day_charts(plant_id, day)
+
+        results = await asyncio.gather(*(fetch_day(day) for day in days), return_exceptions=True)
+        if any(charts is None or isinstance(charts, Exception) for charts in results):
+            return None
+        return dict(zip(days, results))
+
+
+def async_register_export(hass: HomeAssistant, export: HistoryExport):
+    """Register the export service, it runs for every configured account.
+
+    Returns a callback that removes the export again, for unloading a config entry.
+    """
+    exports = hass.data.setdefault(DOMAIN, {}).setdefault("exports", [])
+    exports.append(export)
+
+    @callback
+    def async_remove():
+        exports.remove(export)
+
+    if hass.services.has_service(DOMAIN, SERVICE_EXPORT_HISTORY):
+        return async_remove
+
+    async def async_handle_export(call: ServiceCall):
+        start = call.data[ATTR_START_DATE]
+        end = min(call.data.get(ATTR_END_DATE, dt.now().date()), dt.now().date())
+        if end < start:
+            raise HomeAssistantError(f"The end date {end} is before the start date {start}")
+        for export in hass.data[DOMAIN]["exports"]:
+            export.async_start(start, end)
+
+    hass.services.async_register(DOMAIN, SERVICE_EXPORT_HISTORY, async_handle_export, schema=EXPORT_SCHEMA)
+    return async_remove
@@ -0,0 +1,153 @@
+"""Hold back implausible drops of the counters of total_increasing sensors."""
+
+from collections import deque
+import logging
+
+from homeassistant.util import dt
+
+from .const import COUNTER_GUARD_EVENTS, COUNTER_HOLD_MAX
+from .model import DEVICE_CONTAINERS, PlantData, field_path
+
+_LOGGER = logging.getLogger(__name__)
+
+# Counters the portal starts again from 0 every clientDate, matched on the last step of the value path
+DAILY_COUNTERS = {"useElec", "buyElec", "sellElec", "chargeElec", "dischargeElec"}
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _replace(container, steps, value):
+    """Return a copy of a container with the value at ``steps`` replaced.
+
+    Only the containers along the path are copied, the responses can be
+    shared with the cached results of the coordinator.
+    """
+    copy = list(container) if isinstance(container, list) else dict(container)
+    copy[steps[0]] = value if len(steps) == 1 else _replace(container[steps[0]], steps[1:], value)
+    return copy
+
+
+def describe_counter(path):
+    """Return the counter of a value path, with the serial number of a device counter apart."""
+    if path[0] in DEVICE_CONTAINERS.values():
+        return {"counter": "/".join(str(step) for step in path[2:]), "devicesn": path[1]}
+    return {"counter": "/".join(str(step) for step in path)}
+
+
+def replace_value(plantData: PlantData, path, value):
+    """Set the value at a value path of the plant data, copying what it is in."""
+    name, path = field_path(path)
+    if not path:
+        setattr(plantData, name, value)
+        return
+    setattr(plantData, name, _replace(getattr(plantData, name), path, value))
+
+
+class CounterGuard(object):
+    """Check the counters of every refresh against the values accepted before.
+
+    A counter is only allowed to go up, a drop is held back and the last
+    accepted value is published in its place until the drop lasted
+    COUNTER_HOLD_MAX, then it is taken as a real reset. A drop to 0 is
+    never taken. The daily counters start again on a new clientDate, the
+    first value of the day is only held when it is not below the last value
+    of yesterday, the portal still returns yesterday's total then. The held
+    values are recorded for the diagnostics.
+    """
+
+    def __init__(self, counters=()):
+        """Initialize the guard, ``counters`` are the value paths of the counters."""
+        self.counters = tuple(tuple(path) for path in counters)
+        self.events = deque(maxlen=COUNTER_GUARD_EVENTS)
+        self._accepted = {}
+
+    def _paths(self, plantData: PlantData):
+        """Yield the value paths of the counters, for the plant and every device of it."""
+        for path in self.counters:
+            yield path
+            container = DEVICE_CONTAINERS.get(path[0])
+            if container is None:
+                continue
+            devices = getattr(plantData, container)
+            if len(devices) < 2:
+                continue
+            for serial in devices:
+                yield (container, serial) + path
+
+    def apply(self, data, now=None):
+        """Check the counters of every plant, held values are replaced in the PlantData."""
+        if not self.counters:
+            return
+        now = now or dt.utcnow()
+        for plant_id, plantData in data.items():
+            for path in self._paths(plantData):
+                raw = plantData.value(path)
+                value = _as_float(raw)
+                if value is None:
+                    continue
+                reason = self._check((plant_id, path), value, plantData.day, now)
+                if reason is None:
+                    self._accepted[(plant_id, path)] = {"raw": raw, "value": value, "day": plantData.day, "held_since": None}
+                    continue
+
+                accepted = self._accepted[(plant_id, path)]
+                replace_value(plantData, path, accepted["raw"])
+                self.events.append({
+                    "time": now.isoformat(),
+                    "plant_id": plant_id,
+                    **describe_counter(path),
+                    "value": raw,
+                    "published": accepted["raw"],
+                    "reason": reason,
+                })
+                _LOGGER.debug("Holding back %s of plant %s at %s: %s", path, plant_id, accepted["raw"], reason)
+
+    def _check(self, key, value, day, now):
+        """Return why a value is held back, None when it is accepted."""
+        accepted = self._accepted.get(key)
+        if accepted is None:
+            return None
+
+        if key[1][-1] in DAILY_COUNTERS and day is not None and accepted["day"] is not None and day != accepted["day"]:
+            if day < accepted["day"]:
+                reason = "earlier day"
+            elif value >= accepted["value"] and value > 0:
+                reason = "yesterday's total on a new day"
+            else:
+                return None
+        elif value >= accepted["value"]:
+            return None
+        else:
+            reason = "drop"
+
+        if accepted["held_since"] is None:
+            accepted["held_since"] = now
+        elif value > 0 and now - accepted["held_since"] >= COUNTER_HOLD_MAX:
+            _LOGGER.warning(
+                "Counter %s of plant %s went from %s to %s for %s, taking it as a reset",
+                "/".join(str(step) for step in key[1]), key[0], accepted["value"], value, COUNTER_HOLD_MAX,
+            )
+            return None
+        return reason
+
+    def as_dict(self):
+        """Return the held values and the counters that are held back now, for the diagnostics."""
+        return {
+            "counters": ["/".join(str(step) for step in path) for path in self.counters],
+            "held": [
+                {
+                    "plant_id": plant_id,
+                    **describe_counter(path),
+                    "published": accepted["raw"],
+                    "held_since": accepted["held_since"].isoformat(),
+                }
+                for (plant_id, path), accepted in self._accepted.items()
+                if accepted["held_since"] is not None
+            ],
+            "events": list(self.events),
+        }
@@ -0,0 +1,299 @@
+"""Recent samples of the plant values in ring buffers, and the trends worked out from them."""
+
+from array import array
+
+from homeassistant.util import dt
+
+from .const import HISTORY_SIZE, TREND_WINDOW
+from .model import PlantData
+from .statistics import CHART_SERIES, DAY
+
+# Value paths of the polled values that are sampled, per sensors mode
+POLL_SAMPLES = {
+    "None": {
+        "nowPower": ("plantDetail", "nowPower"),
+    },
+    "h1": {
+        "nowPower": ("plantDetail", "nowPower"),
+        "batEnergyPercent": ("storeDevicePower", "batEnergyPercent"),
+        "exportPower": ("storeDevicePower", "gridPower"),
+    },
+    "saj_sec": {
+        "nowPower": ("plantDetail", "nowPower"),
+    },
+}
+
+# Samples that only count while a direction value has the given value and are 0 otherwise
+SAMPLE_DIRECTIONS = {
+    "h1": {
+        # gridPower is unsigned, gridDirection 1 is exporting
+        "exportPower": (("storeDevicePower", "gridDirection"), 1),
+    },
+}
+
+# Value paths of the day chart series, their points are sampled as well
+CHART_PATHS = {
+    "getPlantDetailChart2": ("dataCountList",),
+    "getPlantMeterChartData": ("getPlantMeterChartData", "dataCountList"),
+}
+SERIES_SAMPLES = {
+    name: (chart, index)
+    for chart, series in CHART_SERIES.items()
+    for index, name in series.items()
+}
+SERIES_MODES = {
+    "getPlantMeterChartData": ("saj_sec",),
+}
+
+# The sample every trend is worked out from
+TREND_SAMPLES = {
+    "nowPowerAverage": "nowPower",
+    "homeLoadPowerAverage": "homeLoadPower",
+    "batteryRate": "batEnergyPercent",
+    "batteryTimeToFull": "batEnergyPercent",
+    "batteryTimeToEmpty": "batEnergyPercent",
+    "exportPowerPeak": "exportPower",
+}
+
+# Battery rates in %/h closer to 0 count as idle, without a time to full or empty
+BATTERY_IDLE_RATE = 0.5
+
+
+def _series_allowed(chart, sensors):
+    return sensors in SERIES_MODES.get(chart, (sensors,))
+
+
+def sample_paths(trends, sensors):
+    """Return the value paths the samples of the trends are read from, to plan the requests.
+
+    Polled values are preferred, the chart series of a sample are only
+    requested when it is not polled. They are sampled whenever the chart is
+    requested for other resources.
+    """
+    paths = []
+    for trend in trends:
+        sample = TREND_SAMPLES[trend]
+        if sample in POLL_SAMPLES[sensors]:
+            paths.append(POLL_SAMPLES[sensors][sample])
+            if sample in SAMPLE_DIRECTIONS.get(sensors, {}):
+                paths.append(SAMPLE_DIRECTIONS[sensors][sample][0])
+        elif sample in SERIES_SAMPLES and _series_allowed(SERIES_SAMPLES[sample][0], sensors):
+            chart, index = SERIES_SAMPLES[sample]
+            paths.append(CHART_PATHS[chart] + (index,))
+    return paths
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RingBuffer(object):
+    """The last ``size`` samples of a value, timestamps and values in two fixed arrays.
+
+    Appending overwrites the oldest sample once the buffer is full, so the
+    memory use stays the same however long Home Assistant runs.
+    """
+
+    __slots__ = ("_times", "_values", "_start", "_count")
+
+    def __init__(self, size):
+        """Initialize an empty buffer."""
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size(self):
+        """Return the number of samples the buffer holds."""
+        return len(self._times)
+
+    @property
+    def last(self):
+        """Return the newest (timestamp, value), None when empty."""
+        if not self._count:
+            return None
+        index = (self._start + self._count - 1) % self.size
+        return self._times[index], self._values[index]
+
+    def append(self, time, value):
+        """Add a sample, ``time`` is a POSIX timestamp newer than the last one."""
+        index = (self._start + self._count) % self.size
+        self._times[index] = time
+        self._values[index] = value
+        if self._count < self.size:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.size
+
+    def window(self, since):
+        """Yield the (timestamp, value) samples from ``since`` on, newest first."""
+        for offset in range(self._count - 1, -1, -1):
+            index = (self._start + offset) % self.size
+            if self._times[index] < since:
+                return
+            yield self._times[index], self._values[index]
+
+    def mean(self, since):
+        """Return the mean of the samples from ``since`` on, None without samples."""
+        values = [value for _, value in self.window(since)]
+        if not values:
+            return None
+        return sum(values) / len(values)
+
+    def slope(self, since):
+        """Return the least squares change per second of the samples from ``since`` on.
+
+        None with fewer than two samples or when they all have the same time.
+        """
+        samples = list(self.window(since))
+        if len(samples) < 2:
+            return None
+        meanTime = sum(time for time, _ in samples) / len(samples)
+        meanValue = sum(value for _, value in samples) / len(samples)
+        spread = sum((time - meanTime) ** 2 for time, _ in samples)
+        if not spread:
+            return None
+        return sum((time - meanTime) * (value - meanValue) for time, value in samples) / spread
+
+
+class SampleHistory(object):
+    """Recent samples of the plants of a coordinator and the trends of the configured resources.
+
+    Every refresh adds the new points of the day charts and the polled values
+    whose lastUploadTime changed, each in a buffer of their own: the chart
+    points are means of a part of the day and arrive later than the polls.
+    The trends are worked out in memory from the last TREND_WINDOW of
+    samples and set on the PlantData, from the polled samples when there are
+    any in the window and from the chart points otherwise. Nothing is saved,
+    after a restart the buffers fill again from today's charts.
+    """
+
+    def __init__(self, sensors, trends=()):
+        """Initialize the history, ``trends`` are the names of the configured trend resources."""
+        self.sensors = sensors
+        self.trends = tuple(trends)
+        self.samples = {TREND_SAMPLES[trend] for trend in self.trends}
+        self._buffers = {}
+        self._uploads = {}
+        self._peaks = {}
+
+    def buffer(self, plant_id, sample, source) -> RingBuffer:
+        """Return the buffer of a sample of a plant, ``source`` is "polled" or "series"."""
+        key = (plant_id, sample, source)
+        if key not in self._buffers:
+            self._buffers[key] = RingBuffer(HISTORY_SIZE)
+        return self._buffers[key]
+
+    def _window_buffer(self, plant_id, sample, since) -> RingBuffer:
+        """Return the polled buffer of a sample when it has samples from ``since`` on, the series buffer otherwise."""
+        polled = self.buffer(plant_id, sample, "polled")
+        if next(polled.window(since), None) is not None:
+            return polled
+        return self.buffer(plant_id, sample, "series")
+
+    def update(self, data, now=None):
+        """Add the new samples of every plant and set their trends on the PlantData."""
+        if not self.trends:
+            return
+        now = now or dt.utcnow()
+        for plant_id, plantData in data.items():
+            self._add_series(plant_id, plantData, now)
+            self._add_polled(plant_id, plantData, now)
+            plantData.trends = self._plant_trends(plant_id, now)
+
+    def _add(self, plant_id, sample, source, time, value):
+        buffer = self.buffer(plant_id, sample, source)
+        last = buffer.last
+        if last is not None and time <= last[0]:
+            return
+        buffer.append(time, value)
+
+        day = dt.as_local(dt.utc_from_timestamp(time)).date()
+        peak = self._peaks.get((plant_id, sample))
+        if peak is None or peak[0] != day or value > peak[1]:
+            self._peaks[(plant_id, sample)] = (day, value)
+
+    def _add_series(self, plant_id, plantData: PlantData, now):
+        """Add the points of today's charts that are over and newer than the last sample."""
+        if plantData.day is None:
+            return
+        day_start = dt.start_of_local_day(dt.parse_date(plantData.day))
+        for sample in self.samples:
+            if sample not in SERIES_SAMPLES:
+                continue
+            chart, index = SERIES_SAMPLES[sample]
+            if not _series_allowed(chart, self.sensors):
+                continue
+            values = plantData.value(CHART_PATHS[chart] + (index,))
+            if not values:
+                continue
+
+            width = DAY / len(values)
+            for position, value in enumerate(values):
+                # A point holds the mean of its part of the day, it is complete at the end of it
+                end = day_start + width * (position + 1)
+                if end > now:
+                    break
+                value = _as_float(value)
+                if value is not None:
+                    self._add(plant_id, sample, "series", end.timestamp(), value)
+
+    def _add_polled(self, plant_id, plantData: PlantData, now):
+        """Add the polled values, once per upload of the logger."""
+        upload = plantData.detail.get("lastUploadTime")
+        if upload is not None and self._uploads.get(plant_id) == upload:
+            return
+        self._uploads[plant_id] = upload
+
+        polled = POLL_SAMPLES[self.sensors]
+        directions = SAMPLE_DIRECTIONS.get(self.sensors, {})
+        for sample in self.samples:
+            if sample not in polled:
+                continue
+            value = _as_float(plantData.value(polled[sample]))
+            if value is None:
+                continue
+            if sample in directions:
+                path, direction = directions[sample]
+                if plantData.value(path) != direction:
+                    value = 0.0
+            self._add(plant_id, sample, "polled", now.timestamp(), value)
+
+    def _plant_trends(self, plant_id, now):
+        since = (now - TREND_WINDOW).timestamp()
+        trends = {}
+        for trend in self.trends:
+            sample = TREND_SAMPLES[trend]
+            buffer = self._window_buffer(plant_id, sample, since)
+            if trend.endswith("Average"):
+                value = buffer.mean(since)
+                trends[trend] = round(value, 1) if value is not None else None
+            elif trend == "exportPowerPeak":
+                peak = self._peaks.get((plant_id, sample))
+                trends[trend] = peak[1] if peak is not None and peak[0] == dt.as_local(now).date() else None
+            else:
+                trends[trend] = self._battery(trend, buffer, since)
+        return trends
+
+    def _battery(self, trend, buffer: RingBuffer, since):
+        """Return the charge rate in %/h or the minutes until the battery is full or empty."""
+        slope = buffer.slope(since)
+        if slope is None:
+            return None
+        rate = slope * 3600
+        if trend == "batteryRate":
+            return round(rate, 2)
+
+        _, percent = buffer.last
+        if trend == "batteryTimeToFull" and rate > BATTERY_IDLE_RATE:
+            return round(max(0.0, 100 - percent) / rate * 60)
+        if trend == "batteryTimeToEmpty" and rate < -BATTERY_IDLE_RATE:
+            return round(max(0.0, percent) / -rate * 60)
+        return None
@@ -0,0 +1,133 @@
+"""Latency and error counters of the requests to the eSolar portal."""
+
+from collections import Counter
+import math
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+# Endpoints called for every sensors mode, for the diagnostic entities
+MODE_ENDPOINTS = {
+    None: (
+        "login",
+        "getUserPlantList",
+        "getPlantDetailInfo",
+        "findDevicePageList",
+        "getPlantDetailChart2",
+    ),
+    "h1": (
+        "getStoreOrAcDevicePowerInfo",
+    ),
+    "saj_sec": (
+        "getPlantMeterModuleList",
+        "getPlantMeterDetailInfo",
+        "getPlantMeterEnergyPreviewInfo",
+        "getPlantMeterChartData",
+    ),
+}
+
+
+def endpoint_name(url):
+    """Return the endpoint name of a portal url, the last part of its path."""
+    return str(url).split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+
+
+def mode_endpoints(sensors):
+    """Return the endpoints called for a sensors mode."""
+    return MODE_ENDPOINTS[None] + MODE_ENDPOINTS.get(sensors, ())
+
+
+class EndpointMetrics(object):
+    """Counters of the requests to a single endpoint."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.statuses = Counter()
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = None
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+
+    @property
+    def latency_mean(self):
+        """Return the mean latency in seconds, None before the first request."""
+        if not self.requests:
+            return None
+        return self.latency_total / self.requests
+
+    def record(self, status, seconds, size=0):
+        """Count a request that answered with ``status``, an int or an error name."""
+        self.requests += 1
+        self.statuses[str(status)] += 1
+        if status != 200:
+            self.errors += 1
+        self.bytes += size
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+        self.latency_last = seconds
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.histogram[index] += 1
+                break
+
+    def as_dict(self):
+        """Return the counters as plain data."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "statuses": dict(self.statuses),
+            "latency_mean": self.latency_mean,
+            "latency_max": self.latency_max,
+            "latency_last": self.latency_last,
+            "histogram": {
+                f"le_{bound}": count
+                for bound, count in zip(LATENCY_BUCKETS, self.histogram)
+            },
+        }
+
+
+class PortalMetrics(object):
+    """Counters of the requests and refreshes of one eSolar account."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.endpoints = {}
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refresh_last = None
+        self.refresh_max = 0.0
+        self.last_error = None
+
+    def endpoint(self, name):
+        """Return the counters of an endpoint."""
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointMetrics()
+        return self.endpoints[name]
+
+    def record_refresh(self, seconds, success):
+        """Count a coordinator refresh that took ``seconds``."""
+        self.refreshes += 1
+        if not success:
+            self.refresh_failures += 1
+        self.refresh_last = seconds
+        self.refresh_max = max(self.refresh_max, seconds)
+
+    def as_dict(self):
+        """Return the counters as plain data."""
+        return {
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "refresh_last": self.refresh_last,
+            "refresh_max": self.refresh_max,
+            "last_error": self.last_error,
+            "endpoints": {
+                name: endpoint.as_dict()
+                for name, endpoint in sorted(self.endpoints.items())
+            },
+        }
@@ -0,0 +1,112 @@
+"""Typed container of the responses of one plant from a refresh."""
+
+from dataclasses import asdict, dataclass, field, fields
+
+from .planner import PATH_ENDPOINTS
+
+# Value path heads that are the name of a PlantData field
+FIELD_HEADS = {
+    "devices": "devices",
+    "modules": "modules",
+    "energy": "energy",
+    "trends": "trends",
+    "findDevicePageList": "secDevicePageList",
+    "getPlantMeterModuleList": "getPlantMeterModuleList",
+    "getPlantMeterDetailInfo": "getPlantMeterDetailInfo",
+    "getPlantMeterEnergyPreviewInfo": "getPlantMeterEnergyPreviewInfo",
+    "getPlantMeterChartData": "getPlantMeterChartData",
+}
+
+# A value path step that stands for the index of the plant in the plant list
+PLANT_INDEX = "<plant index>"
+
+# Per-device payloads in the plant data, keyed by the payload the plant totals are in
+DEVICE_CONTAINERS = {
+    "storeDevicePower": "devices",
+    "getPlantMeterChartData": "modules",
+}
+
+
+@dataclass(slots=True)
+class PlantData:
+    """The responses of one plant, each endpoint in its own field.
+
+    The responses are kept apart, so keys like ``list``, ``status`` and
+    ``viewBean`` that several endpoints answer with do not overwrite each
+    other. Fields of endpoints that are not requested stay None. The H1 and
+    Sec fields hold the plant totals, ``devices`` and ``modules`` the
+    responses per storage device and Sec module.
+    """
+
+    # The index of the plant in the plant list
+    plant_id: int
+    getUserPlantList: dict
+    getPlantDetailInfo: dict
+    findDevicePageList: dict | None = None
+    getPlantDetailChart2: dict | None = None
+    getStoreOrAcDevicePowerInfo: dict | None = None
+    # The findDevicePageList of office 1, requested for Sec plants
+    secDevicePageList: dict | None = None
+    getPlantMeterModuleList: dict | None = None
+    getPlantMeterDetailInfo: dict | None = None
+    getPlantMeterEnergyPreviewInfo: dict | None = None
+    getPlantMeterChartData: dict | None = None
+    devices: dict = field(default_factory=dict)
+    modules: dict = field(default_factory=dict)
+    stale_results: list = field(default_factory=list)
+    # The day of the charts, an ISO date
+    day: str | None = None
+    # kWh totals of the chart power series, see energy.EnergyIntegrator
+    energy: dict = field(default_factory=dict)
+    # Averages, rates and peaks of the recent samples, see history.SampleHistory
+    trends: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        """Check the responses every plant needs, a KeyError or TypeError when they do not fit."""
+        if not isinstance(self.getUserPlantList["plantList"][self.plant_id], dict):
+            raise TypeError(f"plant {self.plant_id} in the plant list is not an object")
+        if not isinstance(self.getPlantDetailInfo["plantDetail"], dict):
+            raise TypeError(f"the details of plant {self.plant_id} are not an object")
+
+    @property
+    def plant(self) -> dict:
+        """Return the entry of the plant in the plant list."""
+        return self.getUserPlantList["plantList"][self.plant_id]
+
+    @property
+    def detail(self) -> dict:
+        """Return the plantDetail of getPlantDetailInfo."""
+        return self.getPlantDetailInfo["plantDetail"]
+
+    def value(self, path):
+        """Return the value at a value path, None when it is missing."""
+        name, path = field_path(path)
+        value = getattr(self, name)
+        for step in path:
+            try:
+                value = value[step]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return value
+
+    def day_chart(self, name) -> list | None:
+        """Return the dataCountList of getPlantDetailChart2 or the Sec plant totals of getPlantMeterChartData."""
+        return (getattr(self, name) or {}).get("dataCountList")
+
+    def as_dict(self):
+        """Return the plant data as plain data, for the snapshot."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Return the plant data saved with as_dict, ignoring unknown fields."""
+        names = {plantField.name for plantField in fields(cls)}
+        return cls(**{name: value for name, value in data.items() if name in names})
+
+
+def field_path(path):
+    """Return the PlantData field a value path reads and the path within that field."""
+    head = path[0]
+    if head in FIELD_HEADS:
+        return FIELD_HEADS[head], tuple(path[1:])
+    return PATH_ENDPOINTS[head], tuple(path)
@@ -0,0 +1,64 @@
+"""Work out which portal endpoints the configured resources need."""
+
+from .statistics import CHART_SERIES
+
+# The endpoint behind the first key of a sensor value path
+PATH_ENDPOINTS = {
+    "plantList": "getUserPlantList",
+    "plantDetail": "getPlantDetailInfo",
+    "isAlarm": "getPlantDetailInfo",
+    "list": "findDevicePageList",
+    "findDevicePageList": "findDevicePageList",
+    "peakPower": "getPlantDetailChart2",
+    "status": "getPlantDetailChart2",
+    "viewBean": "getPlantDetailChart2",
+    "dataCountList": "getPlantDetailChart2",
+    "storeDevicePower": "getStoreOrAcDevicePowerInfo",
+    "devices": "getStoreOrAcDevicePowerInfo",
+    "getPlantMeterModuleList": "getPlantMeterModuleList",
+    "getPlantMeterDetailInfo": "getPlantMeterDetailInfo",
+    "getPlantMeterEnergyPreviewInfo": "getPlantMeterEnergyPreviewInfo",
+    "getPlantMeterChartData": "getPlantMeterChartData",
+    "modules": "getPlantMeterChartData",
+}
+
+# The chart behind the energy total of a power series, for value paths starting with "energy"
+ENERGY_ENDPOINTS = {
+    name: chart
+    for chart, series in CHART_SERIES.items()
+    for name in series.values()
+}
+
+# Endpoints that take serial numbers from the results of other endpoints
+DEPENDENCIES = {
+    "getPlantDetailChart2": ("getPlantDetailInfo",),
+    "getStoreOrAcDevicePowerInfo": ("getPlantDetailInfo", "findDevicePageList"),
+    "getPlantMeterEnergyPreviewInfo": ("getPlantMeterModuleList",),
+    "getPlantMeterChartData": ("getPlantMeterModuleList",),
+}
+H1_DEPENDENCIES = {
+    # The chart of an H1 plant is asked for the battery serial number
+    "getPlantDetailChart2": ("getPlantDetailInfo", "findDevicePageList"),
+}
+
+# getPlantDetailInfo has the upload times the poll scheduler needs. The plantuids come from
+# the plant list, it is only requested every poll when a resource reads its live fields
+ALWAYS = ("getPlantDetailInfo",)
+
+
+def plan_endpoints(value_paths, sensors):
+    """Return the endpoints needed for the value paths of the configured resources."""
+    endpoints = set(ALWAYS)
+    for path in value_paths:
+        if path and path[0] == "energy":
+            endpoints.add(ENERGY_ENDPOINTS[path[1]])
+        elif path and path[0] == "trends":
+            # Planned with the value paths of their samples, see history.sample_paths
+            continue
+        elif path:
+            endpoints.add(PATH_ENDPOINTS[path[0]])
+
+    dependencies = dict(DEPENDENCIES, **(H1_DEPENDENCIES if sensors == "h1" else {}))
+    for endpoint in list(endpoints):
+        endpoints.update(dependencies.get(endpoint, ()))
+    return frozenset(endpoints)
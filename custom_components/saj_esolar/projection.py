@@ -0,0 +1,100 @@
+"""Project the portal responses down to the fields the integration reads."""
+
+from .model import PLANT_INDEX, field_path
+from .statistics import CHART_SERIES
+
+# A projection step that stands for every element of a list
+EACH = "*"
+
+# PlantData fields that are not named after the endpoint of their response
+FIELD_ENDPOINTS = {
+    "secDevicePageList": "findDevicePageList",
+}
+
+# Fields the coordinator, poll scheduler and statistics read, whatever the resources
+REQUIRED_FIELDS = {
+    "getUserPlantList": (
+        ("plantList", EACH, "plantuid"),
+        ("plantList", EACH, "plantname"),
+    ),
+    "getPlantDetailInfo": (
+        ("plantDetail", "lastUploadTime"),
+        ("plantDetail", "nowPower"),
+        ("plantDetail", "runningState"),
+        ("plantDetail", "snList"),
+    ),
+    "findDevicePageList": (
+        ("list", EACH, "devicesn"),
+        ("list", EACH, "type"),
+    ),
+    "getPlantMeterModuleList": (
+        ("moduleList", EACH, "moduleSn"),
+    ),
+    **{
+        chart: tuple(("dataCountList", index) for index in series)
+        for chart, series in CHART_SERIES.items()
+    },
+}
+
+
+def response_path(path):
+    """Return the endpoint of a value path and the path within its response.
+
+    The plant index becomes EACH, the responses are shared by every plant.
+    """
+    name, path = field_path(path)
+    return FIELD_ENDPOINTS.get(name, name), tuple(EACH if step == PLANT_INDEX else step for step in path)
+
+
+def _add_path(spec, path):
+    """Add a path to a projection, an empty path or a list index keeps the whole value."""
+    for position, step in enumerate(path):
+        if spec.get(step, {}) is None:
+            return
+        if isinstance(step, int) or position == len(path) - 1:
+            spec[step] = None
+            return
+        spec = spec.setdefault(step, {})
+
+
+def plan_fields(value_paths):
+    """Return the projection of the response of every endpoint for the value paths of the resources.
+
+    A projection maps the keys to keep to the projection of their value, None
+    keeps the whole value. EACH applies to every element of a list, an int
+    keeps that list element and empties the others.
+    """
+    fields = {}
+    paths = [
+        (endpoint, path)
+        for endpoint, required in REQUIRED_FIELDS.items()
+        for path in required
+    ]
+    # The energy totals are worked out from the chart series in REQUIRED_FIELDS,
+    # the trends from the value paths of their samples
+    paths.extend(response_path(path) for path in value_paths if path and path[0] not in ("energy", "trends"))
+
+    for endpoint, path in paths:
+        if not path:
+            # The whole response is read
+            fields[endpoint] = None
+        elif fields.get(endpoint, {}) is not None:
+            _add_path(fields.setdefault(endpoint, {}), path)
+    return fields
+
+
+def project(value, spec):
+    """Return the part of a decoded response that ``spec`` keeps."""
+    if spec is None:
+        return value
+    if isinstance(value, dict):
+        return {key: project(value[key], sub) for key, sub in spec.items() if key in value}
+    if isinstance(value, list):
+        if EACH in spec:
+            return [project(item, spec[EACH]) for item in value]
+        # Keep the positions, the sensors read series by index
+        return [
+            item if index in spec or index - len(value) in spec else ([] if isinstance(item, list) else None)
+            for index, item in enumerate(value)
+        ]
+    return value
@@ -0,0 +1,252 @@
+"""Serve the plant values and poller metrics in the Prometheus text format."""
+
+import logging
+import math
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt
+
+from .const import DOMAIN
+from .coordinator import SAJeSolarMeterData
+from .metrics import LATENCY_BUCKETS
+from .model import PlantData
+from .scheduler import parse_upload_time
+from .statistics import CHART_SERIES
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Type and help of every metric family, in the order they are served
+FAMILIES = {
+    "saj_esolar_up": ("gauge", "1 when the last refresh of the account succeeded."),
+    "saj_esolar_refresh_duration_seconds": ("gauge", "Duration of the last refresh of the account."),
+    "saj_esolar_refreshes_total": ("counter", "Refreshes of the account."),
+    "saj_esolar_refresh_failures_total": ("counter", "Refreshes of the account that failed."),
+    "saj_esolar_endpoint_requests_total": ("counter", "Requests to an eSolar endpoint."),
+    "saj_esolar_endpoint_errors_total": ("counter", "Requests to an eSolar endpoint that did not answer with 200."),
+    "saj_esolar_endpoint_retries_total": ("counter", "Retried requests to an eSolar endpoint."),
+    "saj_esolar_endpoint_latency_seconds": ("histogram", "Latency of the requests to an eSolar endpoint."),
+    "saj_esolar_last_upload_timestamp_seconds": ("gauge", "Time of the last upload of the plant logger."),
+    "saj_esolar_last_upload_age_seconds": ("gauge", "Seconds since the last upload of the plant logger."),
+    "saj_esolar_stale_results": ("gauge", "Endpoints of the plant that kept their previous result in the last refresh."),
+    "saj_esolar_plant_value": ("gauge", "Numeric value of the plant details."),
+    "saj_esolar_series_power_watts": ("gauge", "Last point of a day chart power series of the plant."),
+    "saj_esolar_energy_kwh_total": ("counter", "Energy worked out from a day chart power series of the plant."),
+    "saj_esolar_device_value": ("gauge", "Numeric value of a storage device."),
+    "saj_esolar_module_power_watts": ("gauge", "Last point of a meter chart power series of a Sec module."),
+}
+
+
+def _number(value):
+    """Return a value as float, None when it is not a number."""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _last_point(values):
+    """Return the last point with a value of a chart series."""
+    for value in reversed(values or []):
+        number = _number(value)
+        if number is not None:
+            return number
+    return None
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def account_samples(coordinator: SAJeSolarMeterData):
+    """Return the poller samples of the account of a coordinator as (family, labels, value)."""
+    account = {"account": coordinator.username}
+    metrics = coordinator.metrics
+    samples = [
+        ("saj_esolar_up", account, 1 if coordinator.last_update_success else 0),
+        ("saj_esolar_refreshes_total", account, metrics.refreshes),
+        ("saj_esolar_refresh_failures_total", account, metrics.refresh_failures),
+    ]
+    if metrics.refresh_last is not None:
+        samples.append(("saj_esolar_refresh_duration_seconds", account, metrics.refresh_last))
+
+    for name, endpoint in sorted(metrics.endpoints.items()):
+        labels = dict(account, endpoint=name)
+        samples.append(("saj_esolar_endpoint_requests_total", labels, endpoint.requests))
+        samples.append(("saj_esolar_endpoint_errors_total", labels, endpoint.errors))
+        samples.append(("saj_esolar_endpoint_retries_total", labels, endpoint.retries))
+        count = 0
+        for bound, bucket in zip(LATENCY_BUCKETS, endpoint.histogram):
+            count += bucket
+            samples.append(("saj_esolar_endpoint_latency_seconds_bucket", dict(labels, le=_format(bound)), count))
+        samples.append(("saj_esolar_endpoint_latency_seconds_sum", labels, endpoint.latency_total))
+        samples.append(("saj_esolar_endpoint_latency_seconds_count", labels, endpoint.requests))
+    return samples
+
+
+def plant_labels(plantData: PlantData):
+    """Return the labels every sample of a plant has."""
+    return {"plant": plantData.plant.get("plantuid"), "plant_name": plantData.plant.get("plantname")}
+
+
+def plant_samples(plantData: PlantData):
+    """Return the samples of the values of a plant as (family, labels, value).
+
+    Only the fields the configured resources read are in the responses, see
+    projection.plan_fields, so only those are served.
+    """
+    plant = plant_labels(plantData)
+    samples = [("saj_esolar_stale_results", plant, len(plantData.stale_results))]
+
+    for field, value in sorted(plantData.detail.items()):
+        number = _number(value)
+        if number is not None:
+            samples.append(("saj_esolar_plant_value", dict(plant, field=field), number))
+
+    for chart, series in CHART_SERIES.items():
+        dataCountList = plantData.day_chart(chart) or []
+        for index, name in series.items():
+            if index < len(dataCountList):
+                number = _last_point(dataCountList[index])
+                if number is not None:
+                    samples.append(("saj_esolar_series_power_watts", dict(plant, series=name), number))
+
+    for name, total in sorted(plantData.energy.items()):
+        samples.append(("saj_esolar_energy_kwh_total", dict(plant, series=name), total))
+
+    for devicesn, device in sorted(plantData.devices.items()):
+        for field, value in sorted((device.get("storeDevicePower") or {}).items()):
+            number = _number(value)
+            if number is not None:
+                samples.append(("saj_esolar_device_value", dict(plant, device=devicesn, field=field), number))
+
+    for moduleSn, module in sorted(plantData.modules.items()):
+        dataCountList = (module.get("getPlantMeterChartData") or {}).get("dataCountList") or []
+        for index, name in CHART_SERIES["getPlantMeterChartData"].items():
+            if index < len(dataCountList):
+                number = _last_point(dataCountList[index])
+                if number is not None:
+                    samples.append(("saj_esolar_module_power_watts", dict(plant, module=moduleSn, series=name), number))
+    return samples
+
+
+class PrometheusExporter(object):
+    """The samples of a coordinator, worked out again after every refresh.
+
+    A scrape only formats the samples of the last refresh, it never makes
+    the coordinator request the portal.
+    """
+
+    def __init__(self, coordinator: SAJeSolarMeterData):
+        """Initialize the exporter."""
+        self._coordinator = coordinator
+        self.samples = []
+        self.uploads = []
+
+    @callback
+    def async_update(self):
+        """Work out the samples from the data of the coordinator."""
+        samples = account_samples(self._coordinator)
+        uploads = []
+        for plant_id in sorted(self._coordinator.data or {}):
+            plantData = self._coordinator.data[plant_id]
+            samples.extend(plant_samples(plantData))
+            upload = parse_upload_time(plantData.detail.get("lastUploadTime"))
+            if upload is not None:
+                uploads.append((plant_labels(plantData), upload))
+        self.samples = samples
+        self.uploads = uploads
+
+    def scrape_samples(self, now):
+        """Return the samples, with the upload ages at ``now``."""
+        samples = list(self.samples)
+        for plant, upload in self.uploads:
+            samples.append(("saj_esolar_last_upload_timestamp_seconds", plant, upload.timestamp()))
+            samples.append(("saj_esolar_last_upload_age_seconds", plant, (now - upload).total_seconds()))
+        return samples
+
+
+def render(exporters, now):
+    """Return the samples of the exporters in the Prometheus text format, grouped per family.
+
+    Platform entries of the same account share its poller metrics, a sample
+    is only served once.
+    """
+    families = {name: [] for name in FAMILIES}
+    seen = set()
+    for exporter in exporters:
+        for name, labels, value in exporter.scrape_samples(now):
+            key = (name, tuple(labels.items()))
+            if key in seen:
+                continue
+            seen.add(key)
+            family = name
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name[: -len(suffix)] in FAMILIES:
+                    family = name[: -len(suffix)]
+            families[family].append((name, labels, value))
+
+    lines = []
+    for family, samples in families.items():
+        if not samples:
+            continue
+        kind, description = FAMILIES[family]
+        lines.append(f"# HELP {family} {description}")
+        lines.append(f"# TYPE {family} {kind}")
+        for name, labels, value in samples:
+            text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items() if label is not None)
+            lines.append(f"{name}{{{text}}} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class SAJeSolarMetricsView(HomeAssistantView):
+    """The metrics of every account that has the Prometheus endpoint enabled."""
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+    requires_auth = True
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics."""
+        hass = request.app["hass"]
+        exporters = hass.data.get(DOMAIN, {}).get("prometheus", [])
+        return web.Response(text=render(exporters, dt.utcnow()), content_type=CONTENT_TYPE, charset="utf-8")
+
+
+def async_register_prometheus(hass: HomeAssistant, coordinator: SAJeSolarMeterData):
+    """Serve the metrics of a coordinator, the view is registered for the first one.
+
+    Returns a callback that stops serving them again, for unloading a config entry.
+    """
+    data = hass.data.setdefault(DOMAIN, {})
+    if "prometheus" not in data:
+        if getattr(hass, "http", None) is None:
+            _LOGGER.warning("The Prometheus endpoint needs the http integration")
+            return lambda: None
+        hass.http.register_view(SAJeSolarMetricsView())
+    exporters = data.setdefault("prometheus", [])
+
+    exporter = PrometheusExporter(coordinator)
+    exporter.async_update()
+    exporters.append(exporter)
+    remove_listener = coordinator.async_add_listener(exporter.async_update)
+
+    @callback
+    def async_remove():
+        remove_listener()
+        exporters.remove(exporter)
+
+    return async_remove
@@ -0,0 +1,109 @@
+"""Adaptive poll scheduling based on the logger uploads of the plant."""
+
+from collections import deque
+import datetime
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.sun import is_up
+from homeassistant.util import dt
+
+from .const import (
+    IDLE_BEFORE_NIGHT,
+    MIN_POLL_INTERVAL,
+    MIN_TIME_BETWEEN_UPDATES,
+    NIGHT_POLL_INTERVAL,
+    OFFLINE_AFTER,
+    OFFLINE_POLL_INTERVAL,
+    UPLOAD_GAPS,
+    UPLOAD_GRACE,
+    UPLOAD_INTERVAL,
+)
+from .model import PlantData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_upload_time(value):
+    """Parse lastUploadTime, the portal reports it in the local time of the plant."""
+    if not value:
+        return None
+    parsed = dt.parse_datetime(str(value))
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.DEFAULT_TIME_ZONE)
+    return dt.as_utc(parsed)
+
+
+class PollScheduler(object):
+    """Pick the interval until the next poll from the last plant payload.
+
+    The portal only has new inverter data after the logger uploaded, so the
+    next poll is timed just after the expected next upload. Polling backs off
+    to NIGHT_POLL_INTERVAL once the inverter has been idle for
+    IDLE_BEFORE_NIGHT while the sun is down, and to OFFLINE_POLL_INTERVAL
+    while the logger has not uploaded for OFFLINE_AFTER. Both are read from
+    getPlantDetailInfo, which is requested every poll.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the scheduler."""
+        self._hass = hass
+        self.upload_interval = UPLOAD_INTERVAL
+        self._gaps = deque(maxlen=UPLOAD_GAPS)
+        self._last_upload = None
+        self._idle_since = None
+
+    def _is_offline(self, last_upload, now):
+        return last_upload is not None and now - last_upload > OFFLINE_AFTER
+
+    def _is_idle(self, detail):
+        try:
+            return float(detail.get('nowPower') or 0) == 0 and not int(detail.get('runningState') or 0)
+        except (TypeError, ValueError):
+            return False
+
+    def _track_upload(self, last_upload):
+        """Learn the upload period of the logger from consecutive uploads.
+
+        The period is the smallest of the last UPLOAD_GAPS gaps, a missed
+        upload gives a gap of twice the period and is outweighed by the
+        others. A logger that really uploads less often takes over once its
+        gaps are all that is left.
+        """
+        if last_upload is None:
+            return
+        if self._last_upload is not None and last_upload > self._last_upload:
+            gap = last_upload - self._last_upload
+            if MIN_POLL_INTERVAL <= gap <= NIGHT_POLL_INTERVAL:
+                self._gaps.append(gap)
+                self.upload_interval = min(self._gaps)
+        self._last_upload = last_upload
+
+    def next_interval(self, plant: PlantData, now=None) -> datetime.timedelta:
+        """Return the time to wait before the next poll."""
+        now = now or dt.utcnow()
+        detail = plant.detail
+
+        if self._is_idle(detail):
+            if self._idle_since is None:
+                self._idle_since = now
+            if now - self._idle_since >= IDLE_BEFORE_NIGHT and not is_up(self._hass, now):
+                return NIGHT_POLL_INTERVAL
+        else:
+            self._idle_since = None
+
+        last_upload = parse_upload_time(detail.get('lastUploadTime'))
+        if self._is_offline(last_upload, now):
+            return OFFLINE_POLL_INTERVAL
+
+        self._track_upload(last_upload)
+        if last_upload is None or last_upload > now:
+            return MIN_TIME_BETWEEN_UPDATES
+
+        # Skip to the first expected upload that has not happened yet
+        missed = (now - last_upload) // self.upload_interval
+        next_upload = last_upload + (missed + 1) * self.upload_interval
+        interval = next_upload + UPLOAD_GRACE - now
+        return max(MIN_POLL_INTERVAL, min(interval, self.upload_interval + UPLOAD_GRACE))
@@ -3,17 +3,12 @@ Alternative for the SAJ local API sensor. Unfortunally there is no public api.
 This Sensor will read the private api of the eSolar portal at https://fop.saj-electric.com/
 """
 
-import asyncio
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from collections.abc import Callable
+from dataclasses import dataclass, field
 import datetime
-import calendar
-
-from functools import reduce
 import logging
-from typing import Final
+from typing import Any, Final
 
-import aiohttp
-import async_timeout
 import voluptuous as vol
 
 from homeassistant.components.sensor import (
@@ -23,50 +18,57 @@ from homeassistant.components.sensor import (
     SensorEntity,
     SensorEntityDescription,
 )
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_RESOURCES,
     CONF_USERNAME,
     CONF_PASSWORD,
     CONF_SENSORS,
+    EVENT_HOMEASSISTANT_STOP,
     PERCENTAGE,
+    EntityCategory,
     UnitOfEnergy,
     UnitOfPower,
+    UnitOfTime,
 )
-
-CONF_PLANT_ID: Final = "plant_id"
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import PlatformNotReady
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.entity import Entity
-from homeassistant.util import Throttle, dt
-
-def add_months(sourcedate, months):
-    month = sourcedate.month - 1 + months
-    year = sourcedate.year + month // 12
-    month = month % 12 + 1
-    day = min(sourcedate.day, calendar.monthrange(year,month)[1])
-    return datetime.date(year, month, day)
-
-def add_years(d, years):
-    try:
-        return d.replace(year = d.year + years)
-    except ValueError:
-        return d + (datetime.date(d.year + years, 1, 1) - datetime.date(d.year, 1, 1))
-
-BASE_URL = 'https://fop.saj-electric.com/saj/login'
-_LOGGER = logging.getLogger(__name__)
-
-DEVICE_TYPES = {
-    "Inverter": 0,
-    "Meter": 1,  # TODO: Pending to confirm
-    "Battery": 2,
-    0: "Inverter",
-    1: "Meter",  # TODO: Pending to confirm
-    2: "Battery",
-}
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt
+
+from .accounts import async_get_account
+from .api import EsolarProvider
+from .backfill import StatisticsBackfill, async_register_backfill
+from .const import (
+    CONF_FORCE_REFRESH,
+    CONF_PLANT_ID,
+    CONF_PLANT_IDS,
+    CONF_PLANTS,
+    CONF_PROMETHEUS,
+    CONF_PROVIDER_DOMAIN,
+    CONF_PROVIDER_PATH,
+    CONF_PROVIDER_PROTOCOL,
+    CONF_PROVIDER_SSL,
+    DEFAULT_PROVIDER_DOMAIN,
+    DEFAULT_PROVIDER_PATH,
+    DEFAULT_PROVIDER_PROTOCOL,
+    DOMAIN,
+    PLANT_IDS_ALL,
+    SENSOR_PREFIX,
+)
+from .coordinator import SAJeSolarMeterData
+from .export import HistoryExport, async_register_export
+from .history import sample_paths
+from .metrics import mode_endpoints
+from .model import DEVICE_CONTAINERS, PLANT_INDEX, field_path
+from .planner import plan_endpoints
+from .projection import plan_fields
+from .prometheus import async_register_prometheus
 
-MIN_TIME_BETWEEN_UPDATES = datetime.timedelta(minutes=5)
+_LOGGER = logging.getLogger(__name__)
 
-SENSOR_PREFIX = 'esolar '
 ATTR_MEASUREMENT = "measurement"
 ATTR_SECTION = "section"
 
@@ -139,395 +141,791 @@ SENSOR_LIST = {
     "pvDirection",
     "pvPower",
     "solarPower",
+    #energy worked out from the day chart power series
+    "nowPowerEnergy",
+    "homeLoadPowerEnergy",
+    "solarLoadPowerEnergy",
+    "exportPowerEnergy",
+    "gridLoadPowerEnergy",
+    #trends of the recent samples
+    "nowPowerAverage",
+    "homeLoadPowerAverage",
+    "batteryRate",
+    "batteryTimeToFull",
+    "batteryTimeToEmpty",
+    "exportPowerPeak",
 }
 
-SENSOR_TYPES: Final[tuple[SensorEntityDescription, ...]] = (
-    SensorEntityDescription(
+def _as_yes_no(value):
+    """Convert a 0/1 portal flag into Yes/No."""
+    return "Yes" if int(value) else "No"
+
+def _as_battery_direction(value):
+    """Convert the H1 battery direction into a readable state."""
+    if value == 0:
+        return "Standby"
+    if value == 1:
+        return "Discharging"
+    if value == -1:
+        return "Charging"
+    return f'Unknown: {value}'
+
+def _as_power_direction(label):
+    """Return a converter for the H1 grid/output/pv power directions."""
+    def convert(value):
+        if value == 1:
+            return "Exporting"
+        if value == -1:
+            return "Importing"
+        _LOGGER.error(f"{label} unknown value: {value}")
+        return value
+    return convert
+
+def resolve_value_path(description, sensors, device=None):
+    """Return the value path of a description for the configured sensors mode.
+
+    ``device`` is a (container, serial number) pair from DEVICE_CONTAINERS,
+    the path then points into the payload of that single device or module.
+    """
+    path = description.mode_value_paths.get(sensors, description.value_path)
+    if path and device is not None:
+        path = (device[0], device[1]) + tuple(path)
+    return path
+
+def compile_value_path(path):
+    """Resolve a value path once into a getter for the PlantData of a plant.
+
+    The first step picks the PlantData field, see model.field_path, and
+    PLANT_INDEX in the path is replaced with the index of the plant in the
+    plant list of that poll. The getter returns None when any step of the
+    path is missing.
+    """
+    name, steps = field_path(path)
+
+    def getter(plantData):
+        data = getattr(plantData, name)
+        try:
+            for step in steps:
+                data = data[plantData.plant_id if step == PLANT_INDEX else step]
+        except (KeyError, IndexError, TypeError):
+            return None
+        return data
+
+    return getter
+
+
+@dataclass(frozen=True)
+class SAJeSolarSensorEntityDescription(SensorEntityDescription):
+    """Describes an eSolar sensor and where its value lives in the plant data.
+
+    ``value_path`` is used for every sensors mode unless ``mode_value_paths``
+    has a path for the configured mode (h1, saj_sec). Sensors without a path
+    for the configured mode keep an unknown state.
+    """
+
+    value_path: tuple | None = None
+    mode_value_paths: dict[str, tuple] = field(default_factory=dict)
+    value_fn: Callable[[Any], Any] | None = None
+
+SENSOR_TYPES: Final[tuple[SAJeSolarSensorEntityDescription, ...]] = (
+    SAJeSolarSensorEntityDescription(
         key="nowPower",
         name="nowPower",
         icon="mdi:solar-power",
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.ENERGY,
+        value_path=("plantDetail", "nowPower"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="runningState",
         name="runningState",
         icon="mdi:solar-panel",
+        value_path=("plantDetail", "runningState"),
+        value_fn=_as_yes_no,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="devOnlineNum",
         name="devOnlineNum",
         icon="mdi:solar-panel",
+        value_path=("plantDetail", "devOnlineNum"),
+        value_fn=_as_yes_no,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="todayElectricity",
         name="todayElectricity",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
+        value_path=("plantDetail", "todayElectricity"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="monthElectricity",
         name="monthElectricity",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
+        value_path=("plantDetail", "monthElectricity"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="yearElectricity",
         name="yearElectricity",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
+        value_path=("plantDetail", "yearElectricity"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalElectricity",
         name="totalElectricity",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        value_path=("plantDetail", "totalElectricity"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="selfUseRate",
         name="selfUseRate",
         icon="mdi:solar-panel",
+        value_path=("plantDetail", "selfUseRate"),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalBuyElec",
         name="totalBuyElec",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        value_path=("plantDetail", "totalBuyElec"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalConsumpElec",
         name="totalConsumpElec",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
+        value_path=("plantDetail", "totalConsumpElec"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalSellElec",
         name="totalSellElec",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        value_path=("plantDetail", "totalSellElec"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="todayGridIncome",
         name="todayGridIncome",
         icon="mdi:currency-eur",
+        value_path=("plantDetail", "todayGridIncome"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="income",
         name="income",
         icon="mdi:currency-eur",
+        value_path=("plantDetail", "income"),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="lastUploadTime",
         name="lastUploadTime",
         icon="mdi:timer-sand",
+        value_path=("plantDetail", "lastUploadTime"),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalPlantTreeNum",
         name="totalPlantTreeNum",
         icon="mdi:tree",
+        value_path=("plantDetail", "totalPlantTreeNum"),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalReduceCo2",
         name="totalReduceCo2",
         icon="mdi:molecule-co2",
+        value_path=("plantDetail", "totalReduceCo2"),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="isAlarm",
         name="isAlarm",
         icon="mdi:alarm",
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="plantuid",
         name="plantuid",
         icon="mdi:api",
+        value_path=("plantList", PLANT_INDEX, "plantuid"),
+        entity_category=EntityCategory.DIAGNOSTIC,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="plantname",
         name="plantname",
         icon="mdi:api",
+        value_path=("plantList", PLANT_INDEX, "plantname"),
+        entity_category=EntityCategory.DIAGNOSTIC,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="currency",
         name="currency",
         icon="mdi:solar-panel",
+        value_path=("plantList", PLANT_INDEX, "currency"),
+        entity_category=EntityCategory.DIAGNOSTIC,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="address",
         name="address",
         icon="mdi:solar-panel",
+        value_path=("plantList", PLANT_INDEX, "address"),
+        entity_category=EntityCategory.DIAGNOSTIC,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="isOnline",
         name="isOnline",
         icon="mdi:api",
+        value_path=("plantList", PLANT_INDEX, "isOnline"),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="status",
         name="status",
         icon="mdi:api",
+        value_path=("status",),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="peakPower",
         name="peakPower",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.ENERGY,
+        value_path=("peakPower",),
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="systemPower",
         name="systemPower",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.ENERGY,
+        value_path=("plantList", PLANT_INDEX, "systempower"),
+        entity_category=EntityCategory.DIAGNOSTIC,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="pvElec",
         name="pvElec",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
+        mode_value_paths={
+            "h1": ("viewBean", "pvElec"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "pvElec"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="useElec",
         name="useElec",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "h1": ("viewBean", "useElec"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "useElec"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="buyElec",
         name="buyElec",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "h1": ("viewBean", "buyElec"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "buyElec"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="sellElec",
         name="sellElec",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "h1": ("viewBean", "sellElec"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "sellElec"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="buyRate",
         name="buyRate",
         icon="mdi:solar-panel",
+        mode_value_paths={
+            "h1": ("viewBean", "buyRate"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "buyRate"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="sellRate",
         name="sellRate",
         icon="mdi:solar-panel",
+        mode_value_paths={
+            "h1": ("viewBean", "sellRate"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "sellRate"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="selfConsumedRate1",
         name="selfConsumedRate1",
         icon="mdi:solar-panel",
+        mode_value_paths={
+            "h1": ("viewBean", "selfConsumedRate1"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "selfConsumedRate1"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="selfConsumedRate2",
         name="selfConsumedRate2",
         icon="mdi:solar-panel",
+        mode_value_paths={
+            "h1": ("viewBean", "selfConsumedRate2"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "selfConsumedRate2"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="selfConsumedEnergy1",
         name="selfConsumedEnergy1",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
+        mode_value_paths={
+            "h1": ("viewBean", "selfConsumedEnergy1"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "selfConsumedEnergy1"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="selfConsumedEnergy2",
         name="selfConsumedEnergy2",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
+        mode_value_paths={
+            "h1": ("viewBean", "selfConsumedEnergy2"),
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "selfConsumedEnergy2"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="plantTreeNum",
         name="plantTreeNum",
         icon="mdi:tree",
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "plantTreeNum"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="reduceCo2",
         name="reduceCo2",
         icon="mdi:molecule-co2",
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "viewBean", "reduceCo2"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalGridPower",
         name="totalGridPower",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "dataCountList", 3, -1),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalLoadPower",
         name="totalLoadPower",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.ENERGY,
+        mode_value_paths={
+            "h1": ("storeDevicePower", "totalLoadPower"),
+            "saj_sec": ("getPlantMeterChartData", "dataCountList", 2, -1),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalPvgenPower",
         name="totalPvgenPower",
         icon="mdi:solar-panel",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "dataCountList", 4, -1),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="gridLoadPower",
         name="gridLoadPower",
         icon="mdi:transmission-tower-import",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "dataCountList", 4, -1),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="solarLoadPower",
         name="solarLoadPower",
         icon="mdi:solar-power",
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.ENERGY,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "dataCountList", 2, -1),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="homeLoadPower",
         name="homeLoadPower",
         icon="mdi:home-lightning-bolt-outline",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "dataCountList", 1, -1),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="exportPower",
         name="exportPower",
         icon="mdi:transmission-tower-export",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterChartData", "dataCountList", 3, -1),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalPvEnergy",
         name="totalPvEnergy",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterDetailInfo", "plantDetail", "totalPvEnergy"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalLoadEnergy",
         name="totalLoadEnergy",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterDetailInfo", "plantDetail", "totalLoadEnergy"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalBuyEnergy",
         name="totalBuyEnergy",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterDetailInfo", "plantDetail", "totalBuyEnergy"),
+        },
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="totalSellEnergy",
         name="totalSellEnergy",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("getPlantMeterDetailInfo", "plantDetail", "totalSellEnergy"),
+        },
     ),
     #h1
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="batCapcity",
         name="batCapcity",
         icon="mdi:solar-panel-large",
-        native_unit_of_measurement="A⋅h"
+        native_unit_of_measurement="A⋅h",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "batCapcity"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="isStorageAlarm",
         name="isStorageAlarm",
         icon="mdi:alarm",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "isStorageAlarm"),
+        },
+        value_fn=int,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="batCurr",
         name="batCurr",
         icon="mdi:solar-panel-large",
-        native_unit_of_measurement="A⋅h"
+        native_unit_of_measurement="A⋅h",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "batCurr"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="batEnergyPercent",
         name="batEnergyPercent",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=PERCENTAGE,
+        mode_value_paths={
+            "h1": ("storeDevicePower", "batEnergyPercent"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="batteryDirection",
         name="batteryDirection",
         icon="mdi:solar-panel-large",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "batteryDirection"),
+        },
+        value_fn=_as_battery_direction,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="batteryPower",
         name="batteryPower",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "h1": ("storeDevicePower", "batteryPower"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="gridPower",
         name="gridPower",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "h1": ("storeDevicePower", "gridPower"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="gridDirection",
         name="gridDirection",
-        icon="mdi:solar-panel-large"
+        icon="mdi:solar-panel-large",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "gridDirection"),
+        },
+        value_fn=_as_power_direction("Grid Direction"),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="h1Online",
         name="h1Online",
         icon="mdi:solar-panel-large",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "isOnline"),
+        },
+        value_fn=_as_yes_no,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="outPower",
         name="outPower",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfPower.WATT,
+        mode_value_paths={
+            "h1": ("storeDevicePower", "outPower"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="outPutDirection",
         name="outPutDirection",
         icon="mdi:solar-panel-large",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "outPutDirection"),
+        },
+        value_fn=_as_power_direction("outPut Direction"),
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="pvPower",
         name="pvPower",
         icon="mdi:solar-panel-large",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "pvPower"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="solarPower",
         name="solarPower",
         icon="mdi:solar-panel-large",
+        mode_value_paths={
+            "h1": ("storeDevicePower", "solarPower"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="chargeElec",
         name="chargeElec",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "h1": ("viewBean", "chargeElec"),
+        },
+        value_fn=float,
     ),
-    SensorEntityDescription(
+    SAJeSolarSensorEntityDescription(
         key="dischargeElec",
         name="dischargeElec",
         icon="mdi:solar-panel-large",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "h1": ("viewBean", "dischargeElec"),
+        },
+        value_fn=float,
+    ),
+    #energy worked out from the day chart power series
+    SAJeSolarSensorEntityDescription(
+        key="nowPowerEnergy",
+        name="nowPowerEnergy",
+        icon="mdi:solar-power",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_path=("energy", "nowPower"),
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="homeLoadPowerEnergy",
+        name="homeLoadPowerEnergy",
+        icon="mdi:home-lightning-bolt-outline",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("energy", "homeLoadPower"),
+        },
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="solarLoadPowerEnergy",
+        name="solarLoadPowerEnergy",
+        icon="mdi:solar-power",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("energy", "solarLoadPower"),
+        },
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="exportPowerEnergy",
+        name="exportPowerEnergy",
+        icon="mdi:transmission-tower-export",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("energy", "exportPower"),
+        },
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="gridLoadPowerEnergy",
+        name="gridLoadPowerEnergy",
+        icon="mdi:transmission-tower-import",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        mode_value_paths={
+            "saj_sec": ("energy", "gridLoadPower"),
+        },
+    ),
+    #trends of the recent samples
+    SAJeSolarSensorEntityDescription(
+        key="nowPowerAverage",
+        name="nowPowerAverage",
+        icon="mdi:solar-power",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_path=("trends", "nowPowerAverage"),
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="homeLoadPowerAverage",
+        name="homeLoadPowerAverage",
+        icon="mdi:home-lightning-bolt-outline",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        mode_value_paths={
+            "saj_sec": ("trends", "homeLoadPowerAverage"),
+        },
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="batteryRate",
+        name="batteryRate",
+        icon="mdi:battery-sync-outline",
+        native_unit_of_measurement="%/h",
+        state_class=SensorStateClass.MEASUREMENT,
+        mode_value_paths={
+            "h1": ("trends", "batteryRate"),
+        },
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="batteryTimeToFull",
+        name="batteryTimeToFull",
+        icon="mdi:battery-arrow-up-outline",
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_class=SensorDeviceClass.DURATION,
+        mode_value_paths={
+            "h1": ("trends", "batteryTimeToFull"),
+        },
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="batteryTimeToEmpty",
+        name="batteryTimeToEmpty",
+        icon="mdi:battery-arrow-down-outline",
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_class=SensorDeviceClass.DURATION,
+        mode_value_paths={
+            "h1": ("trends", "batteryTimeToEmpty"),
+        },
+    ),
+    SAJeSolarSensorEntityDescription(
+        key="exportPowerPeak",
+        name="exportPowerPeak",
+        icon="mdi:transmission-tower-export",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        mode_value_paths={
+            "h1": ("trends", "exportPowerPeak"),
+            "saj_sec": ("trends", "exportPowerPeak"),
+        },
     ),
 )
 
@@ -540,747 +938,343 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         ),
         vol.Optional(CONF_SENSORS, default="None"): cv.string, # type: ignore
         vol.Optional(CONF_PLANT_ID, default=0): cv.positive_int, # type: ignore
-        vol.Optional("provider_domain",default="fop.saj-electric.com"): cv.string,
-        vol.Optional("provider_path", default="saj"):cv.string,
-        vol.Optional("provider_protocol", default="https"):cv.string,
-        vol.Optional("provider_ssl", default=True):cv.boolean,
+        vol.Optional(CONF_PLANT_IDS): vol.Any(
+            PLANT_IDS_ALL, vol.All(cv.ensure_list, [cv.positive_int])
+        ),
+        vol.Optional(CONF_FORCE_REFRESH): cv.time_period,
+        vol.Optional(CONF_PROMETHEUS, default=False): cv.boolean,
+        vol.Optional(CONF_PROVIDER_DOMAIN, default=DEFAULT_PROVIDER_DOMAIN): cv.string,
+        vol.Optional(CONF_PROVIDER_PATH, default=DEFAULT_PROVIDER_PATH):cv.string,
+        vol.Optional(CONF_PROVIDER_PROTOCOL, default=DEFAULT_PROVIDER_PROTOCOL):cv.string,
+        vol.Optional(CONF_PROVIDER_SSL, default=True):cv.boolean,
 
 
     }
 )
 
+def _create_coordinator(hass, config):
+    """Create the coordinator of a platform entry or config entry.
+
+    Returns the coordinator, the descriptions of the configured resources and
+    whether this is the first entry of the account.
+    """
+    provider= EsolarProvider(config.get(CONF_PROVIDER_DOMAIN),config.get(CONF_PROVIDER_PATH),config.get(CONF_PROVIDER_PROTOCOL))
+    # Platform entries for the same account share the login, rate limit and in-flight requests
+    esolar = async_get_account(hass, provider, config.get(CONF_USERNAME), config.get(CONF_PASSWORD), config.get(CONF_PROVIDER_SSL))
+    # Config entries store their plants by plantuid
+    plant_ids = list(config[CONF_PLANTS]) if CONF_PLANTS in config else config.get(CONF_PLANT_IDS, [config.get(CONF_PLANT_ID)])
+    sensors = config.get(CONF_SENSORS)
+    descriptions = [description for description in SENSOR_TYPES if description.key in config[CONF_RESOURCES]]
+
+    # Only request the endpoints the configured resources are read from
+    # and keep only the fields they read from the responses
+    value_paths = [resolve_value_path(description, sensors) for description in descriptions]
+    trends = [path[1] for path in value_paths if path and path[0] == "trends"]
+    counters = [
+        path for description, path in zip(descriptions, value_paths)
+        if description.state_class == SensorStateClass.TOTAL_INCREASING and path and path[0] not in ("energy", "trends")
+    ]
+    value_paths.extend(sample_paths(trends, sensors))
+    endpoints = plan_endpoints(value_paths, sensors)
+    first_entry = esolar.users == 0
+    data = SAJeSolarMeterData(hass, esolar, sensors, plant_ids, provider, endpoints, plan_fields(value_paths), trends, counters)
+    return data, descriptions, first_entry
+
+def _create_entities(data: SAJeSolarMeterData, descriptions, plants, force_refresh, first_entry):
+    """Create the entities of the plants, ``plants`` maps the key of a plant in the data to its plant list entry or None."""
+    entities = []
+    for plant_id, plant in plants.items():
+        for description in descriptions:
+            entities.append(SAJeSolarMeterSensor(description, data, data.sensors, plant_id, plant, force_refresh=force_refresh))
+
+    # Request timings of the account, the per endpoint ones are disabled by default.
+    # They are shared by the platform entries of the account, the first one adds them
+    if first_entry:
+        entities.append(SAJeSolarRefreshSensor(data))
+        for endpoint in mode_endpoints(data.sensors):
+            # The plant list is requested for the plantuids whatever the resources
+            if endpoint not in ("login", "getUserPlantList") and not data.wants(endpoint):
+                continue
+            entities.append(SAJeSolarEndpointSensor(data, endpoint))
+    return entities
+
+@callback
+def _async_track_devices(data: SAJeSolarMeterData, descriptions, plants, force_refresh, async_add_entities):
+    """Add entities per device once the data shows a plant has several storage devices or Sec modules.
+
+    The plant entities then show the totals. Returns the callback that stops tracking.
+    """
+    known = set()
+
+    @callback
+    def async_add_devices():
+        entities = []
+        for plant_id, plant in plants.items():
+            plantData = (data.data or {}).get(plant_id)
+            if plantData is None:
+                continue
+            for description in descriptions:
+                path = resolve_value_path(description, data.sensors)
+                container = DEVICE_CONTAINERS.get(path[0]) if path else None
+                devices = getattr(plantData, container) if container else {}
+                if len(devices) < 2:
+                    continue
+                for serial in devices:
+                    if (plant_id, description.key, serial) not in known:
+                        known.add((plant_id, description.key, serial))
+                        entities.append(SAJeSolarMeterSensor(description, data, data.sensors, plant_id, plant, (container, serial), force_refresh))
+        if entities:
+            async_add_entities(entities)
+
+    async_add_devices()
+    return data.async_add_listener(async_add_devices)
+
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
 
     """Setup the SAJ eSolar sensors."""
 
-    session = async_create_clientsession(hass,verify_ssl=config.get("provider_ssl")) #some providers have broken SSL chains
-    provider= EsolarProvider(config.get("provider_domain"),config.get("provider_path"),config.get("provider_protocol"))
-    data = SAJeSolarMeterData(session, config.get(CONF_USERNAME), config.get(CONF_PASSWORD), config.get(CONF_SENSORS), config.get(CONF_PLANT_ID), provider)
-    await data.async_update()
-
-    entities = []
-    for description in SENSOR_TYPES:
-        if description.key in config[CONF_RESOURCES]:
-            sensor = SAJeSolarMeterSensor(description, data, config.get(CONF_SENSORS), config.get(CONF_PLANT_ID))
-            entities.append(sensor)
-    async_add_entities(entities, True)
+    data, descriptions, first_entry = _create_coordinator(hass, config)
+    plant_ids = data.plant_ids
+
+    # Start from the data saved before the restart and poll the portal in the background,
+    # without a snapshot the entities have to wait for the first poll
+    await data.energy.async_load()
+    restored = await data.async_restore()
+    if not restored:
+        await data.async_refresh()
+
+    # A single plant keeps the entity names and unique ids it always had
+    multi_plant = plant_ids == PLANT_IDS_ALL or len(plant_ids) > 1
+    if multi_plant and not data.data:
+        await data.async_close()
+        raise PlatformNotReady("The eSolar plant list is needed to set up multiple plants")
+
+    async def async_logout(event):
+        """Logout from the eSolar portal when Home Assistant stops."""
+        await data.async_close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_logout)
+
+    # Continue a statistics backfill that was interrupted by a restart
+    backfill = StatisticsBackfill(hass, data)
+    async_register_backfill(hass, backfill)
+    if data.data:
+        backfill.async_start()
+    async_register_export(hass, HistoryExport(hass, data))
+    if config[CONF_PROMETHEUS]:
+        async_register_prometheus(hass, data)
+
+    if multi_plant:
+        plants = {plant_id: data.data[plant_id].plant for plant_id in sorted(data.data)}
+    else:
+        plants = {plant_id: None for plant_id in plant_ids}
+    force_refresh = config.get(CONF_FORCE_REFRESH)
+    async_add_entities(_create_entities(data, descriptions, plants, force_refresh, first_entry))
+    _async_track_devices(data, descriptions, plants, force_refresh, async_add_entities)
+
+    if restored:
+        hass.async_create_task(data.async_refresh())
     return True
 
-class EsolarProvider(object):
-    """Handless the information of the url of a particular esolar provider (e.g. saj, greenheiss)"""
-    def __init__(self,host,path,protocol):
-         self.host=host
-         self.path=path
-         self.protocol=protocol
-
-    def getBaseDomain(self):
-        return f"{self.protocol}://{self.host}"
-
-    def getBaseUrl(self):
-        return f"{self.getBaseDomain()}/{self.path}"
-
-    def getLoginUrl(self):
-        return f"{self.getBaseUrl()}/login"
-
-
-
-class SAJeSolarMeterData(object):
-    """Handle eSolar object and limit updates."""
-
-    def __init__(self, session: aiohttp.ClientSession, username, password, sensors, plant_id, provider):
-        """Initialize the data object."""
-
-        self._session  = session
-        self._provider = provider
-        self.username  = username
-        self.password  = password
-        self.sensors   = sensors
-        self.plant_id  = plant_id
-        self._data     = None
-
-
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    async def async_update(self):
-        """Download and update data from SAJeSolar."""
-
-        try:
-
-            today = datetime.date.today()
-            clientDate = today.strftime('%Y-%m-%d')
-
-            # Login to eSolar API
-            url = self._provider.getLoginUrl()
-            payload = {
-                'lang': 'en',
-                'username': self.username,
-                'password': self.password,
-                'rememberMe': 'true'
-            }
-            headers_login = {
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Accept-Language': 'nl-NL,nl;q=0.9,en-US;q=0.8,en;q=0.7',
-                'Cache-Control': 'max-age=0',
-                'Connection': 'keep-alive',
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'Cookie': 'org.springframework.web.servlet.i18n.CookieLocaleResolver.LOCALE=en; op_esolar_lang=en',
-                'DNT': '1',
-                'Host': self._provider.host,
-                'Origin': self._provider.host,
-                'Referer': self._provider.getLoginUrl(),
-                'sec-ch-ua': '" Not;A Brand";v="99", "Google Chrome";v="91", "Chromium";v="91"',
-                'sec-ch-ua-mobile': '?0',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-                'User-Agent'
-                : 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
-            }
-            response = await self._session.post(url, headers=headers_login, data=payload)
-
-            if response.status != 200:
-                _LOGGER.error(f"{response.url} returned {response.status}")
-                return
-
-
-            # Get API Plant info from Esolar Portal
-            url2 = f"{self._provider.getBaseUrl()}/monitor/site/getUserPlantList"
-            headers = {
-                'Connection': 'keep-alive',
-                'sec-ch-ua': '" Not;A Brand";v="99", "Google Chrome";v="91", "Chromium";v="91"',
-                'Accept': 'application/json, text/javascript, */*; q=0.01',
-                'DNT': '1',
-                'X-Requested-With': 'XMLHttpRequest',
-                'sec-ch-ua-mobile': '?0',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.106 Safari/537.36',
-                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                'Origin': self._provider.host,
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Dest': 'empty',
-                'Referer': f"{self._provider.getBaseUrl()}/monitor/home/index",
-                'Accept-Language': 'nl-NL,nl;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
-
-            payload2= f"pageNo=&pageSize=&orderByIndex=&officeId=&clientDate={clientDate}&runningState=&selectInputType=1&plantName=&deviceSn=&type=&countryCode=&isRename=&isTimeError=&systemPowerLeast=&systemPowerMost="
-            response2 = await self._session.post(url2, headers=headers, data=payload2)
-
-            if response2.status != 200:
-                _LOGGER.error(f"{response2.url} returned {response2.status}")
-                return
-
-            plantInfo = await response2.json()
-            plantuid = plantInfo['plantList'][self.plant_id]['plantuid']
-
-            # Get API Plant Solar Details
-            url3 =  f"{self._provider.getBaseUrl()}/monitor/site/getPlantDetailInfo"
-            payload3= f"plantuid={plantuid}&clientDate={clientDate}"
-
-            response3 = await self._session.post(url3, headers=headers, data=payload3)
-
-            if response3.status != 200:
-                _LOGGER.error(f"{response3.url} returned {response3.status}")
-                return
-
-            plantDetails = await response3.json()
-            #_LOGGER.error(f"PlantDetails: {plantDetails}")
-            plantDetails.update(plantInfo)
-
-            devicesInfoUrl = f"{self._provider.getBaseUrl()}/cloudMonitor/device/findDevicePageList"
-            devicesInfoPayload = f"officeId=&pageNo=&pageSize=&orderName=1&orderType=2&plantuid={plantuid}&deviceStatus=&localDate=&localMonth="
-            deviceInfoReponse = await self._session.post(
-                devicesInfoUrl, headers=headers, data=devicesInfoPayload
-            )
-            if deviceInfoReponse.status != 200:
-                _LOGGER.error(
-                    "{deviceInfoReponse.url} returned {deviceInfoReponse.status}"
-                )
-                return
-
-            devicesInfoData = await deviceInfoReponse.json()
-            plantDetails.update(devicesInfoData)
-            if self.sensors == "h1":
-                deviceSnArr = next(
-                    (
-                        item['devicesn']
-                        for item in plantDetails["list"]
-                        if item["type"] == DEVICE_TYPES["Battery"]
-                    ),
-                    plantDetails["plantDetail"]["snList"][0],
-                )
-            else:
-                deviceSnArr = plantDetails["plantDetail"]["snList"][0]
-
-
-            # getPlantDetailChart2
-            previousChartDay = today - datetime.timedelta(days=1)
-            nextChartDay = today + datetime.timedelta(days = 1)
-            chartDay = today.strftime('%Y-%m-%d')
-            previousChartMonth = add_months(today,-1).strftime('%Y-%m')
-            nextChartMonth = add_months(today, 1).strftime('%Y-%m')
-            chartMonth = today.strftime('%Y-%m')
-            previousChartYear = add_years(today, -1).strftime('%Y')
-            nextChartYear = add_years(today, 1).strftime('%Y')
-            chartYear = today.strftime('%Y')
-            epochmilliseconds = round(int((datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds() * 1000))
-            elecDevicesn = deviceSnArr if self.sensors == "h1" else ""
-            url4 = f"{self._provider.getBaseUrl()}/monitor/site/getPlantDetailChart2?plantuid={plantuid}&chartDateType=1&energyType=0&clientDate={clientDate}&deviceSnArr={deviceSnArr}&chartCountType=2&previousChartDay={previousChartDay}&nextChartDay={nextChartDay}&chartDay={chartDay}&previousChartMonth={previousChartMonth}&nextChartMonth={nextChartMonth}&chartMonth={chartMonth}&previousChartYear={previousChartYear}&nextChartYear={nextChartYear}&chartYear={chartYear}&elecDevicesn={elecDevicesn}&_={epochmilliseconds}"
-            # _LOGGER.error(f"PlantCharts URL: {url4}")
-            response4 = await self._session.post(url4, headers=headers)
-
-            if response4.status != 200:
-                _LOGGER.error(f"{response4.url} returned {response4.status}")
-                return
-
-            plantcharts = await response4.json()
-            # _LOGGER.error(f"PlantCharts: {plantcharts}")
-            plantDetails.update(plantcharts)
-
-
-            # H1 Module
-            if self.sensors == "h1":
-                # getStoreOrAcDevicePowerInfo
-                url_getStoreOrAcDevicePowerInfo = f"{self._provider.getBaseUrl()}/monitor/site/getStoreOrAcDevicePowerInfo?plantuid=&devicesn={deviceSnArr}&_={epochmilliseconds}"
-
-                response_getStoreOrAcDevicePowerInfo = await self._session.post(url_getStoreOrAcDevicePowerInfo, headers=headers)
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
+    """Set up the SAJ eSolar sensors of a config entry.
 
-                if response_getStoreOrAcDevicePowerInfo.status != 200:
-                    _LOGGER.error(f"{response_getStoreOrAcDevicePowerInfo.url} returned {response_getStoreOrAcDevicePowerInfo.status}")
-                    return
+    The plants were picked in the config flow, so the entities are added right
+    away from the saved data and the first poll runs in the background
+    instead of delaying the start of Home Assistant.
+    """
+    config = {CONF_RESOURCES: list(SENSOR_LIST), **entry.data, **entry.options}
+    data, descriptions, first_entry = _create_coordinator(hass, config)
+    hass.data[DOMAIN].setdefault("entries", {})[entry.entry_id] = data
 
-                result_getStoreOrAcDevicePowerInfo = await response_getStoreOrAcDevicePowerInfo.json()
-                #_LOGGER.error(f"{result_getStoreOrAcDevicePowerInfo}")
-                plantDetails.update(result_getStoreOrAcDevicePowerInfo)
-                _LOGGER.debug(result_getStoreOrAcDevicePowerInfo)
+    await data.energy.async_load()
+    await data.async_restore()
 
-            elif self.sensors == "None":
-                self._data = plantDetails
-            else:
-                # Data = plantdetails
-                self._data = plantDetails
+    async def async_logout(event):
+        """Logout from the eSolar portal when Home Assistant stops."""
+        await data.async_close()
 
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_logout))
 
+    backfill = StatisticsBackfill(hass, data)
+    entry.async_on_unload(async_register_backfill(hass, backfill))
+    if data.data:
+        backfill.async_start()
+    entry.async_on_unload(async_register_export(hass, HistoryExport(hass, data)))
+    if config.get(CONF_PROMETHEUS):
+        entry.async_on_unload(async_register_prometheus(hass, data))
 
-            # Sec module
-            if self.sensors == "saj_sec":
+    # The entity names and unique ids are always scoped to the plant, several accounts can be set up
+    plants = dict(entry.data[CONF_PLANTS])
+    force_refresh = datetime.timedelta(minutes=config[CONF_FORCE_REFRESH]) if config.get(CONF_FORCE_REFRESH) else None
+    async_add_entities(_create_entities(data, descriptions, plants, force_refresh, first_entry))
+    entry.async_on_unload(_async_track_devices(data, descriptions, plants, force_refresh, async_add_entities))
 
-                # getPlantMeterModuleList
-                url_module = f"{self._provider.getBaseUrl()}/cloudmonitor/plantMeterModule/getPlantMeterModuleList"
+    entry.async_create_background_task(hass, data.async_refresh(), f"{DOMAIN} first refresh {entry.title}")
 
-                payload_module = f"pageNo=&pageSize=&plantUid={plantuid}"
-
-                response_module = await self._session.post(url_module, headers=headers, data=payload_module)
-
-                if response_module.status != 200:
-                    _LOGGER.error(f"{response_module.url} returned {response_module.status}")
-                    return
-
-                getPlantMeterModuleList = await response_module.json()
-
-                temp_getPlantMeterModuleList = dict()
-                temp_getPlantMeterModuleList["getPlantMeterModuleList"] = getPlantMeterModuleList
-
-                plantDetails.update(temp_getPlantMeterModuleList)
-
-                moduleSn = plantDetails["getPlantMeterModuleList"]['moduleList'][0]['moduleSn']
-
-                # -Debug- Sec module serial number
-                _LOGGER.debug(moduleSn)
-
-                # findDevicePageList
-                url_findDevicePageList = f"{self._provider.getBaseUrl()}/cloudMonitor/device/findDevicePageList"
-
-                payload_findDevicePageList = f"officeId=1&pageNo=&pageSize=&orderName=1&orderType=2&plantuid={plantuid}&deviceStatus=&localDate={chartMonth}&localMonth={chartMonth}"
-
-                response_findDevicePageList = await self._session.post(url_findDevicePageList, headers=headers, data=payload_findDevicePageList)
-
-                if response_findDevicePageList.status != 200:
-                    _LOGGER.error(f"{response_findDevicePageList.url} returned {response_findDevicePageList.status}")
-                    return
-
-                findDevicePageList = await response_findDevicePageList.json()
-
-                temp_findDevicePageList = dict()
-                temp_findDevicePageList["findDevicePageList"] = findDevicePageList
-
-                plantDetails.update(temp_findDevicePageList)
-
-                # getPlantMeterDetailInfo
-                url_getPlantMeterDetailInfo = f"{self._provider.getBaseUrl()}/monitor/site/getPlantMeterDetailInfo"
-
-                payload_getPlantMeterDetailInfo = f"plantuid={plantuid}&clientDate={clientDate}"
-
-                response_getPlantMeterDetailInfo = await self._session.post(url_getPlantMeterDetailInfo, headers=headers, data=payload_getPlantMeterDetailInfo)
-
-                if response_getPlantMeterDetailInfo.status != 200:
-                    _LOGGER.error(f"{response_getPlantMeterDetailInfo.url} returned {response_getPlantMeterDetailInfo.status}")
-                    return
-
-                getPlantMeterDetailInfo = await response_getPlantMeterDetailInfo.json()
-
-                temp_getPlantMeterDetailInfo = dict()
-                temp_getPlantMeterDetailInfo["getPlantMeterDetailInfo"] = getPlantMeterDetailInfo
-
-                plantDetails.update(temp_getPlantMeterDetailInfo)
-
-                # getPlantMeterEnergyPreviewInfo
-                url_getPlantMeterEnergyPreviewInfo = f"{self._provider.getBaseUrl()}/monitor/site/getPlantMeterEnergyPreviewInfo?plantuid={plantuid}&moduleSn={moduleSn}&_={epochmilliseconds}"
-
-                response_getPlantMeterEnergyPreviewInfo = await self._session.get(url_getPlantMeterEnergyPreviewInfo, headers=headers)
-
-                if response_getPlantMeterEnergyPreviewInfo.status != 200:
-                    _LOGGER.error(f"{response_getPlantMeterEnergyPreviewInfo.url} returned {response_getPlantMeterEnergyPreviewInfo.status}")
-                    return
-
-                getPlantMeterEnergyPreviewInfo = await response_getPlantMeterEnergyPreviewInfo.json()
-
-                temp_getPlantMeterEnergyPreviewInfo = dict()
-                temp_getPlantMeterEnergyPreviewInfo["getPlantMeterEnergyPreviewInfo"] = getPlantMeterEnergyPreviewInfo
+class SAJeSolarMeterSensor(CoordinatorEntity[SAJeSolarMeterData], SensorEntity):
+    """Collecting data and return sensor entity."""
 
-                plantDetails.update(temp_getPlantMeterEnergyPreviewInfo)
+    entity_description: SAJeSolarSensorEntityDescription
 
-                # Get Sec Meter details
-                url_getPlantMeterChartData = f"{self._provider.getBaseUrl()}/monitor/site/getPlantMeterChartData?plantuid={plantuid}&chartDateType=1&energyType=0&clientDate={clientDate}&deviceSnArr=&chartCountType=2&previousChartDay={previousChartDay}&nextChartDay={nextChartDay}&chartDay={chartDay}&previousChartMonth={previousChartMonth}&nextChartMonth={nextChartMonth}&chartMonth={chartMonth}&previousChartYear={previousChartYear}&nextChartYear={nextChartYear}&chartYear={chartYear}&moduleSn={moduleSn}&_={epochmilliseconds}"
+    def __init__(self, description: SAJeSolarSensorEntityDescription, data: SAJeSolarMeterData, sensors, plant_id, plant=None, device=None, force_refresh=None):
+        """Initialize the sensor.
 
-                response_getPlantMeterChartData = await self._session.post(url_getPlantMeterChartData, headers=headers)
+        ``plant`` is the plant list entry when several plants or a config
+        entry are set up, the entity name and unique id are then scoped to
+        that plant. ``device`` is
+        a (container, serial number) pair for the entities of a single storage
+        device or Sec module. The state is only written when it changed, or
+        when it was last written longer than ``force_refresh`` ago.
+        """
+        super().__init__(data)
+        self.entity_description = description
 
-                if response_getPlantMeterChartData.status != 200:
-                    _LOGGER.error(f"{response_getPlantMeterChartData.url} returned {response_getPlantMeterChartData.status}")
-                    return
+        self._state = None
+        self.sensors = sensors
+        self.plant_id = plant_id
+        self._type = self.entity_description.key
+        self._attr_icon = self.entity_description.icon
+        if device is not None:
+            self._attr_name = f"{SENSOR_PREFIX}{device[1]} {self.entity_description.name}"
+            self._attr_unique_id = f"{SENSOR_PREFIX}_{device[1]}_{self._type}"
+        elif plant is None:
+            self._attr_name = f"{SENSOR_PREFIX}{self.entity_description.name}"
+            self._attr_unique_id = f"{SENSOR_PREFIX}_{self._type}"
+        else:
+            self._attr_name = f"{SENSOR_PREFIX}{plant['plantname']} {self.entity_description.name}"
+            self._attr_unique_id = f"{SENSOR_PREFIX}_{plant['plantuid']}_{self._type}"
+        self._attr_state_class = self.entity_description.state_class
+        self._attr_native_unit_of_measurement = self.entity_description.native_unit_of_measurement
+        self._attr_device_class = self.entity_description.device_class
 
-                getPlantMeterChartData = await response_getPlantMeterChartData.json()
+        value_path = resolve_value_path(description, sensors, device)
+        self._get_value = compile_value_path(value_path) if value_path else None
+        self._convert = description.value_fn
 
-                temp_getPlantMeterChartData = dict()
-                temp_getPlantMeterChartData["getPlantMeterChartData"] = getPlantMeterChartData
+        self._discovery = False
+        self._dev_id = {}
+        self._force_refresh = force_refresh
+        self._published = None
+        self._published_at = None
 
-                plantDetails.update(temp_getPlantMeterChartData)
+        if data.data and plant_id in data.data:
+            self.update_from_data(data.data[plant_id])
 
-                # Data = plantdetails including Sec module
-                self._data = plantDetails
-            elif self.sensors == "None":
-                self._data = plantDetails
-            else:
-                # Data = plantdetails Wtihout Sec module
-                self._data = plantDetails
+    @property
+    def state(self):
+        """Return the state of the sensor. (total/current power consumption/production or total gas used)"""
+        return self._state
 
-        # Error logging
-        except aiohttp.ClientError:
-            _LOGGER.error("Cannot poll eSolar using url: %s")
-            return
-        except asyncio.TimeoutError:
-            _LOGGER.error("Timeout error occurred while polling eSolar using url: %s")
-            return
-        except Exception as err:
-            _LOGGER.error("Unknown error occurred while polling eSolar: %s", err)
-            self._data = None
+    def update_from_data(self, energy):
+        """Update the sensor state from the PlantData of the plant."""
+        if self._get_value is None:
             return
 
+        value = self._get_value(energy)
+        if value is not None:
+            self._state = self._convert(value) if self._convert else value
 
-        # -Debug- Cookies and Data
-        _LOGGER.debug(self._session.cookie_jar.filter_cookies(self._provider.getBaseDomain()))
-        _LOGGER.debug(self._data)
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the sensor state from the data pushed by the coordinator."""
+        energy = (self.coordinator.data or {}).get(self.plant_id)
 
+        if energy:
+            self.update_from_data(energy)
 
-        # logout session
-        url_logout =  f"{self._provider.getBaseUrl()}/logout"
-        response_logout = await self._session.post(url_logout, headers=headers)
+            # -Debug- adding sensor
+            _LOGGER.debug(f"Device: {self._type} State: {self._state}")
 
-        if response_logout.status != 200:
-            _LOGGER.error(f"{response_logout.url} returned {response_logout.status}")
+        # Skip writing a state that did not change, static values and power at night mostly do not
+        now = dt.utcnow()
+        published = (self._state, self.available)
+        if published == self._published and (
+            self._force_refresh is None or now - self._published_at < self._force_refresh
+        ):
             return
 
+        self._published = published
+        self._published_at = now
+        super()._handle_coordinator_update()
 
-        # Clear session and cookies
-        self._session.cookie_jar.clear()
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._published = (self._state, self.available)
+        self._published_at = dt.utcnow()
 
-    @property
-    def latest_data(self):
-        """Return the latest data object."""
-        if self._data:
-            return self._data
 
-        _LOGGER.error("return data NONE")
-        return None
+class SAJeSolarRefreshSensor(CoordinatorEntity[SAJeSolarMeterData], SensorEntity):
+    """Duration of the last refresh of an eSolar account."""
 
-class SAJeSolarMeterSensor(SensorEntity):
-    """Collecting data and return sensor entity."""
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
 
-    def __init__(self, description: SensorEntityDescription, data, sensors, plant_id):
+    def __init__(self, data: SAJeSolarMeterData):
         """Initialize the sensor."""
-        self.entity_description = description
-        self._data = data
-
-        self._state = None
-        self.sensors = sensors
-        self.plant_id = plant_id
-        self._type = self.entity_description.key
-        self._attr_icon = self.entity_description.icon
-        self._attr_name = f"{SENSOR_PREFIX}{self.entity_description.name}"
-        self._attr_state_class = self.entity_description.state_class
-        self._attr_native_unit_of_measurement = self.entity_description.native_unit_of_measurement
-        self._attr_device_class = self.entity_description.device_class
-        self._attr_unique_id = f"{SENSOR_PREFIX}_{self._type}"
-
-        self._discovery = False
-        self._dev_id = {}
+        super().__init__(data)
+        self._attr_name = f"{SENSOR_PREFIX}refreshDuration"
+        self._attr_unique_id = f"{SENSOR_PREFIX}_{data.username}_refreshDuration"
 
     @property
-    def state(self):
-        """Return the state of the sensor. (total/current power consumption/production or total gas used)"""
-        return self._state
+    def available(self) -> bool:
+        """Stay available when a refresh fails, that is what it reports on."""
+        return True
 
-    async def async_update(self):
-        """Get the latest data and use it to update our sensor state."""
+    @property
+    def native_value(self):
+        """Return the duration of the last refresh."""
+        if self.coordinator.metrics.refresh_last is None:
+            return None
+        return round(self.coordinator.metrics.refresh_last, 3)
 
-        await self._data.async_update()
-        energy = self._data.latest_data
+    @property
+    def extra_state_attributes(self):
+        """Return the refresh counters."""
+        metrics = self.coordinator.metrics
+        return {
+            "refreshes": metrics.refreshes,
+            "refresh_failures": metrics.refresh_failures,
+            "refresh_max": round(metrics.refresh_max, 3),
+            "last_error": metrics.last_error,
+        }
+
+
+class SAJeSolarEndpointSensor(CoordinatorEntity[SAJeSolarMeterData], SensorEntity):
+    """Mean latency and request counters of one eSolar endpoint."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(self, data: SAJeSolarMeterData, endpoint):
+        """Initialize the sensor."""
+        super().__init__(data)
+        self.endpoint = endpoint
+        self._attr_name = f"{SENSOR_PREFIX}{endpoint} latency"
+        self._attr_unique_id = f"{SENSOR_PREFIX}_{data.username}_{endpoint}_latency"
 
-        if energy:
-            if self._type == 'devOnlineNum':
-                if 'devOnlineNum' in energy['plantDetail']:
-                    if energy['plantDetail']["devOnlineNum"] is not None:
-                        self._state = "Yes" if int(energy['plantDetail']["devOnlineNum"]) else "No"
-            if self._type == 'nowPower':
-                if 'nowPower' in energy['plantDetail']:
-                    if energy['plantDetail']["nowPower"] is not None:
-                        self._state = float(energy['plantDetail']["nowPower"])
-            if self._type == 'runningState':
-                if 'runningState' in energy['plantDetail']:
-                    if energy['plantDetail']["runningState"] is not None:
-                        self._state = "Yes" if int(energy['plantDetail']["runningState"]) else "No"
-            if self._type == 'todayElectricity':
-                if 'todayElectricity' in energy['plantDetail']:
-                    if energy['plantDetail']["todayElectricity"] is not None:
-                        self._state = float(energy['plantDetail']["todayElectricity"])
-            if self._type == 'monthElectricity':
-                if 'monthElectricity' in energy['plantDetail']:
-                    if energy['plantDetail']["monthElectricity"] is not None:
-                        self._state = float(energy['plantDetail']["monthElectricity"])
-            if self._type == 'yearElectricity':
-                if 'yearElectricity' in energy['plantDetail']:
-                    if energy['plantDetail']["yearElectricity"] is not None:
-                        self._state = float(energy['plantDetail']["yearElectricity"])
-            if self._type == 'totalElectricity':
-                if 'totalElectricity' in energy['plantDetail']:
-                    if energy['plantDetail']["totalElectricity"] is not None:
-                        self._state = float(energy['plantDetail']["totalElectricity"])
-            if self._type == 'todayGridIncome':
-                if 'todayGridIncome' in energy['plantDetail']:
-                    if energy['plantDetail']["todayGridIncome"] is not None:
-                        self._state = float(energy['plantDetail']["todayGridIncome"])
-            if self._type == 'income':
-                if 'income' in energy['plantDetail']:
-                    if energy['plantDetail']["income"] is not None:
-                        self._state = float(energy['plantDetail']["income"])
-            if self._type == 'selfUseRate':
-                if 'selfUseRate' in energy['plantDetail']:
-                    if energy['plantDetail']["selfUseRate"] is not None:
-                        self._state = energy['plantDetail']["selfUseRate"]
-            if self._type == 'totalBuyElec':
-                if 'totalBuyElec' in energy['plantDetail']:
-                    if energy['plantDetail']["totalBuyElec"] is not None:
-                        self._state = float(energy['plantDetail']["totalBuyElec"])
-            if self._type == 'totalConsumpElec':
-                if 'totalConsumpElec' in energy['plantDetail']:
-                    if energy['plantDetail']["totalConsumpElec"] is not None:
-                        self._state = float(energy['plantDetail']["totalConsumpElec"])
-            if self._type == 'totalSellElec':
-                if 'totalSellElec' in energy['plantDetail']:
-                    if energy['plantDetail']["totalSellElec"] is not None:
-                        self._state = float(energy['plantDetail']["totalSellElec"])
-            if self._type == 'lastUploadTime':
-                if 'lastUploadTime' in energy['plantDetail']:
-                    if energy['plantDetail']["lastUploadTime"] is not None:
-                        self._state = (energy['plantDetail']["lastUploadTime"])
-            if self._type == 'totalPlantTreeNum':
-                if 'totalPlantTreeNum' in energy['plantDetail']:
-                    if energy['plantDetail']["totalPlantTreeNum"] is not None:
-                        self._state = (energy['plantDetail']["totalPlantTreeNum"])
-            if self._type == 'totalReduceCo2':
-                if 'totalReduceCo2' in energy['plantDetail']:
-                    if energy['plantDetail']["totalReduceCo2"] is not None:
-                        self._state = (energy['plantDetail']["totalReduceCo2"])
-
-            if self._type == 'currency':
-                if 'currency' in energy['plantList'][self.plant_id]:
-                    if energy['plantList'][self.plant_id]["currency"] is not None:
-                        self._state = (energy['plantList'][self.plant_id]["currency"])
-            if self._type == 'plantuid':
-                if 'plantuid' in energy['plantList'][self.plant_id]:
-                    if energy['plantList'][self.plant_id]["plantuid"] is not None:
-                        self._state = (energy['plantList'][self.plant_id]["plantuid"])
-            if self._type == 'plantname':
-                if 'plantname' in energy['plantList'][self.plant_id]:
-                    if energy['plantList'][self.plant_id]["plantname"] is not None:
-                        self._state = (energy['plantList'][self.plant_id]["plantname"])
-            if self._type == 'currency':
-                if 'currency' in energy['plantList'][self.plant_id]:
-                    if energy['plantList'][self.plant_id]["currency"] is not None:
-                        self._state = (energy['plantList'][self.plant_id]["currency"])
-            if self._type == 'isOnline':
-                if 'isOnline' in energy['plantList'][self.plant_id]:
-                    if energy['plantList'][self.plant_id]["isOnline"] is not None:
-                        self._state = (energy['plantList'][self.plant_id]["isOnline"])
-            if self._type == 'address':
-                if 'address' in energy['plantList'][self.plant_id]:
-                    if energy['plantList'][self.plant_id]["address"] is not None:
-                        self._state = (energy['plantList'][self.plant_id]["address"])
-            if self._type == 'systemPower':
-                if 'systempower' in energy['plantList'][self.plant_id]:
-                    if energy['plantList'][self.plant_id]["systempower"] is not None:
-                        self._state = (energy['plantList'][self.plant_id]["systempower"])
-
-            if self._type == 'peakPower':
-                if 'peakPower' in energy:
-                    if energy["peakPower"] is not None:
-                        self._state = float(energy["peakPower"])
-            if self._type == 'status':
-                if 'status' in energy:
-                    if energy["status"] is not None:
-                        self._state = (energy["status"])
-
-            ########################################################################## SAJ h1
-            if self.sensors == "h1":
-                if self._type == 'chargeElec':
-                    if 'chargeElec' in energy['viewBean']:
-                        if energy['viewBean']["chargeElec"] is not None:
-                            self._state = float(energy['viewBean']["chargeElec"])
-                if self._type == 'dischargeElec':
-                    if 'dischargeElec' in energy['viewBean']:
-                        if energy['viewBean']["dischargeElec"] is not None:
-                            self._state = float(energy['viewBean']["dischargeElec"])
-                if self._type == 'buyElec':
-                    if 'pvElec' in energy['viewBean']:
-                        if energy['viewBean']["buyElec"] is not None:
-                            self._state = float(energy['viewBean']["buyElec"])
-                if self._type == 'buyRate':
-                    if 'buyRate' in energy['viewBean']:
-                        if energy['viewBean']["buyRate"] is not None:
-                            self._state = energy['viewBean']["buyRate"]
-                if self._type == 'pvElec':
-                    if 'pvElec' in energy['viewBean']:
-                        if energy['viewBean']["pvElec"] is not None:
-                            self._state = float(energy['viewBean']["pvElec"])
-                if self._type == 'selfConsumedEnergy1':
-                    if 'selfConsumedEnergy1' in energy['viewBean']:
-                        if energy['viewBean']["selfConsumedEnergy1"] is not None:
-                            self._state = float(energy['viewBean']["selfConsumedEnergy1"])
-                if self._type == 'selfConsumedEnergy2':
-                    if 'selfConsumedEnergy2' in energy['viewBean']:
-                        if energy['viewBean']["selfConsumedEnergy2"] is not None:
-                            self._state = float(energy['viewBean']["selfConsumedEnergy2"])
-                if self._type == 'selfConsumedRate1':
-                    if 'selfConsumedRate1' in energy['viewBean']:
-                        if energy['viewBean']["selfConsumedRate1"] is not None:
-                            self._state = energy['viewBean']["selfConsumedRate1"]
-                if self._type == 'selfConsumedRate2':
-                    if 'selfConsumedRate2' in energy['viewBean']:
-                        if energy['viewBean']["selfConsumedRate2"] is not None:
-                            self._state = energy['viewBean']["selfConsumedRate2"]
-                if self._type == 'sellElec':
-                    if 'sellElec' in energy['viewBean']:
-                        if energy['viewBean']["sellElec"] is not None:
-                            self._state = float(energy['viewBean']["sellElec"])
-                if self._type == 'sellRate':
-                    if 'sellRate' in energy['viewBean']:
-                        if energy['viewBean']["sellRate"] is not None:
-                            self._state = energy['viewBean']["sellRate"]
-                if self._type == 'useElec':
-                    if 'useElec' in energy['viewBean']:
-                        if energy['viewBean']["useElec"] is not None:
-                            self._state = float(energy['viewBean']["useElec"])
-                # storeDevicePower
-                if self._type == 'batCapcity':
-                    if 'batCapcity' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['batCapcity'] is not None:
-                            self._state = float(energy["storeDevicePower"]["batCapcity"])
-                if self._type == 'isStorageAlarm':
-                    if 'isStorageAlarm' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['isStorageAlarm'] is not None:
-                            self._state = int(energy["storeDevicePower"]["isStorageAlarm"])
-                if self._type == 'batCurr':
-                    if 'batCurr' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['batCurr'] is not None:
-                            self._state = float(energy["storeDevicePower"]["batCurr"])
-                if self._type == 'batEnergyPercent':
-                    if 'batEnergyPercent' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['batEnergyPercent'] is not None:
-                            self._state = float(energy["storeDevicePower"]["batEnergyPercent"])
-                if self._type == 'batteryDirection':
-                    if 'batteryDirection' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['batteryDirection'] is not None:
-                            if energy["storeDevicePower"]["batteryDirection"] == 0:
-                                self._state = "Standby"
-                            elif energy["storeDevicePower"]["batteryDirection"] == 1:
-                                self._state = "Discharging"
-                            elif energy["storeDevicePower"]["batteryDirection"] == -1:
-                                self._state = "Charging"
-                            else:
-                                self._state = f'Unknown: {energy["storeDevicePower"]["batteryDirection"]}'
-                if self._type == 'batteryPower':
-                    if 'batteryPower' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['batteryPower'] is not None:
-                            self._state = float(energy["storeDevicePower"]["batteryPower"])
-                if self._type == 'gridDirection':
-                    if 'gridDirection' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['gridDirection'] is not None:
-                            if energy["storeDevicePower"]["gridDirection"] == 1:
-                                self._state = "Exporting"
-                            elif energy["storeDevicePower"]["gridDirection"] == -1:
-                                self._state = "Importing"
-                            else:
-                                self._state = energy["storeDevicePower"]["gridDirection"]
-                                _LOGGER.error(f"Grid Direction unknown value: {self._state}")
-                if self._type == 'gridPower':
-                    if 'gridPower' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['gridPower'] is not None:
-                            self._state = float(energy["storeDevicePower"]["gridPower"])
-                if self._type == 'h1Online':
-                    if 'isOnline' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['isOnline'] is not None:
-                            self._state = "Yes" if int(energy['storeDevicePower']["isOnline"]) else "No"
-                if self._type == 'outPower':
-                    if 'outPower' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['outPower'] is not None:
-                            self._state = float(energy["storeDevicePower"]["outPower"])
-                if self._type == 'outPutDirection':
-                    if 'outPutDirection' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['outPutDirection'] is not None:
-                            if energy["storeDevicePower"]["outPutDirection"] == 1:
-                                self._state = "Exporting"
-                            elif energy["storeDevicePower"]["outPutDirection"] == -1:
-                                self._state = "Importing"
-                            else:
-                                self._state = energy["storeDevicePower"]["outPutDirection"]
-                                _LOGGER.error(f"outPut Direction unknown value: {self._state}")
-                if self._type == 'pvDirection':
-                    if 'pvDirection' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['pvDirection'] is not None:
-                            if energy["storeDevicePower"]["pvDirection"] == 1:
-                                self._state = "Exporting"
-                            elif energy["storeDevicePower"]["pvDirection"] == -1:
-                                self._state = "Importing"
-                            else:
-                                self._state = energy["storeDevicePower"]["pvDirection"]
-                                _LOGGER.error(f"pv Direction unknown value: {self._state}")
-                if self._type == 'pvPower':
-                    if 'pvPower' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['pvPower'] is not None:
-                            self._state = float(energy["storeDevicePower"]["pvPower"])
-                if self._type == 'solarPower':
-                    if 'solarPower' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['solarPower'] is not None:
-                            self._state = float(energy["storeDevicePower"]["solarPower"])
-                if self._type == 'totalLoadPower':
-                    if 'totalLoadPower' in energy["storeDevicePower"]:
-                        if energy["storeDevicePower"]['totalLoadPower'] is not None:
-                            self._state = float(energy["storeDevicePower"]['totalLoadPower'])
-
-            ########################################################################## Sec module Sensors:
-            if self.sensors == "saj_sec":
-                # getPlantMeterChartData - viewBeam
-                if self._type == 'pvElec':
-                    if 'pvElec' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["pvElec"] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['viewBean']["pvElec"])
-                if self._type == 'useElec':
-                    if 'useElec' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["useElec"] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['viewBean']["useElec"])
-                if self._type == 'buyElec':
-                    if 'buyElec' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["buyElec"] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['viewBean']["buyElec"])
-                if self._type == 'sellElec':
-                    if 'sellElec' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["sellElec"] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['viewBean']["sellElec"])
-                if self._type == 'selfConsumedEnergy1':
-                    if 'selfConsumedEnergy1' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["selfConsumedEnergy1"] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['viewBean']["selfConsumedEnergy1"])
-                if self._type == 'selfConsumedEnergy2':
-                    if 'selfConsumedEnergy2' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["selfConsumedEnergy2"] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['viewBean']["selfConsumedEnergy2"])
-                if self._type == 'reduceCo2':
-                    if 'reduceCo2' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["reduceCo2"] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['viewBean']["reduceCo2"])
-                if self._type == 'buyRate':
-                    if 'buyRate' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["buyRate"] is not None:
-                            self._state = (energy["getPlantMeterChartData"]['viewBean']["buyRate"])
-                if self._type == 'sellRate':
-                    if 'sellRate' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["sellRate"] is not None:
-                            self._state = (energy["getPlantMeterChartData"]['viewBean']["sellRate"])
-                if self._type == 'selfConsumedRate1':
-                    if 'selfConsumedRate1' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["selfConsumedRate1"] is not None:
-                            self._state = (energy["getPlantMeterChartData"]['viewBean']["selfConsumedRate1"])
-                if self._type == 'selfConsumedRate2':
-                    if 'selfConsumedRate2' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["selfConsumedRate2"] is not None:
-                            self._state = (energy["getPlantMeterChartData"]['viewBean']["selfConsumedRate2"])
-                if self._type == 'plantTreeNum':
-                    if 'plantTreeNum' in energy["getPlantMeterChartData"]['viewBean']:
-                        if energy["getPlantMeterChartData"]['viewBean']["plantTreeNum"] is not None:
-                            self._state = (energy["getPlantMeterChartData"]['viewBean']["plantTreeNum"])
-
-
-                # dataCountList, deprecated since use the wrong columns
-                if self._type == 'totalGridPower':
-                    if 'dataCountList' in energy:
-                        if energy["getPlantMeterChartData"]['dataCountList'][3][-1] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['dataCountList'][3][-1])
-                if self._type == 'totalLoadPower':
-                    if 'dataCountList' in energy:
-                        if energy["getPlantMeterChartData"]['dataCountList'][2][-1] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['dataCountList'][2][-1])
-                if self._type == 'totalPvgenPower':
-                    if 'dataCountList' in energy:
-                        if energy["getPlantMeterChartData"]['dataCountList'][4][-1] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['dataCountList'][4][-1])
-
-                #dataCountList, new entities
-                if self._type == 'homeLoadPower':
-                    if 'dataCountList' in energy:
-                        if energy["getPlantMeterChartData"]['dataCountList'][1][-1] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['dataCountList'][1][-1])
-                if self._type == 'solarLoadPower':
-                    if 'dataCountList' in energy:
-                        if energy["getPlantMeterChartData"]['dataCountList'][2][-1] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['dataCountList'][2][-1])
-                if self._type == 'exportPower':
-                    if 'dataCountList' in energy:
-                        if energy["getPlantMeterChartData"]['dataCountList'][3][-1] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['dataCountList'][3][-1])
-                if self._type == 'gridLoadPower':
-                    if 'dataCountList' in energy:
-                        if energy["getPlantMeterChartData"]['dataCountList'][4][-1] is not None:
-                            self._state = float(energy["getPlantMeterChartData"]['dataCountList'][4][-1])
-
-                # getPlantMeterDetailInfo
-                if self._type == 'totalPvEnergy':
-                    if 'totalPvEnergy' in energy["getPlantMeterDetailInfo"]['plantDetail']:
-                        if energy["getPlantMeterDetailInfo"]['plantDetail']["totalPvEnergy"] is not None:
-                            self._state = (energy["getPlantMeterDetailInfo"]['plantDetail']["totalPvEnergy"])
-                if self._type == 'totalLoadEnergy':
-                    if 'totalLoadEnergy' in energy["getPlantMeterDetailInfo"]['plantDetail']:
-                        if energy["getPlantMeterDetailInfo"]['plantDetail']["totalLoadEnergy"] is not None:
-                            self._state = (energy["getPlantMeterDetailInfo"]['plantDetail']["totalLoadEnergy"])
-                if self._type == 'totalBuyEnergy':
-                    if 'totalBuyEnergy' in energy["getPlantMeterDetailInfo"]['plantDetail']:
-                        if energy["getPlantMeterDetailInfo"]['plantDetail']["totalBuyEnergy"] is not None:
-                            self._state = (energy["getPlantMeterDetailInfo"]['plantDetail']["totalBuyEnergy"])
-                if self._type == 'totalSellEnergy':
-                    if 'totalSellEnergy' in energy["getPlantMeterDetailInfo"]['plantDetail']:
-                        if energy["getPlantMeterDetailInfo"]['plantDetail']["totalSellEnergy"] is not None:
-                            self._state = (energy["getPlantMeterDetailInfo"]['plantDetail']["totalSellEnergy"])
+    @property
+    def available(self) -> bool:
+        """Stay available when a refresh fails, that is what it reports on."""
+        return True
 
+    @property
+    def native_value(self):
+        """Return the mean latency of the endpoint."""
+        endpoint = self.coordinator.metrics.endpoints.get(self.endpoint)
+        if endpoint is None or endpoint.latency_mean is None:
+            return None
+        return round(endpoint.latency_mean * 1000, 1)
 
-            # -Debug- adding sensor
-            _LOGGER.debug(f"Device: {self._type} State: {self._state}")
+    @property
+    def extra_state_attributes(self):
+        """Return the request counters and latency histogram of the endpoint."""
+        endpoint = self.coordinator.metrics.endpoints.get(self.endpoint)
+        return endpoint.as_dict() if endpoint is not None else None
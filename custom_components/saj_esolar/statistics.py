@@ -0,0 +1,243 @@
+"""Import the eSolar day charts into the long-term statistics of Home Assistant."""
+
+import asyncio
+import datetime
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+    statistics_during_period,
+)
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt, slugify
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = datetime.timedelta(hours=1)
+DAY = datetime.timedelta(days=1)
+SUMS_LOOKBACK = datetime.timedelta(days=31)
+
+# Power series in the dataCountList of each chart, by index
+CHART_SERIES = {
+    "getPlantDetailChart2": {
+        0: "nowPower",
+    },
+    "getPlantMeterChartData": {
+        1: "homeLoadPower",
+        2: "solarLoadPower",
+        3: "exportPower",
+        4: "gridLoadPower",
+    },
+}
+
+
+def statistic_id(plantuid, series, suffix=""):
+    """Return the external statistic id of a chart series of a plant."""
+    return f"{DOMAIN}:{slugify(f'{plantuid}_{series}{suffix}')}"
+
+
+def hourly_buckets(values, day_start, now):
+    """Group a day series into the hours that are complete at ``now``.
+
+    The portal spreads the series evenly over the day from local midnight,
+    whatever its length. Returns (hour start, values, bucket hours) tuples.
+    """
+    if not values:
+        return []
+
+    width = DAY / len(values)
+    hours = {}
+    for index, value in enumerate(values):
+        start = day_start + index * width
+        if start + width > now:
+            break
+        if value is None:
+            continue
+        hour = dt.as_utc(start).replace(minute=0, second=0, microsecond=0)
+        hours.setdefault(hour, []).append(float(value))
+
+    return [
+        (hour, hourValues, width / HOUR)
+        for hour, hourValues in sorted(hours.items())
+        if hour + HOUR <= now
+    ]
+
+
+def chart_statistics(plant, chart, dataCountList, day, now, last):
+    """Build the statistics of the complete hours of a day chart.
+
+    ``last`` maps statistic ids to the (start, sum) of their last imported
+    hour, hours up to that start are skipped and the energy sums continue from
+    it. It is updated with the new rows. Returns (metadata, rows) pairs.
+    """
+    day_start = dt.start_of_local_day(day)
+    plantuid = plant["plantuid"]
+    statistics = []
+
+    for index, series in CHART_SERIES[chart].items():
+        if index >= len(dataCountList or []):
+            continue
+        buckets = hourly_buckets(dataCountList[index], day_start, now)
+        if not buckets:
+            continue
+
+        powerId = statistic_id(plantuid, series)
+        energyId = statistic_id(plantuid, series, "_energy")
+        lastPower, _ = last.get(powerId, (None, 0.0))
+        lastEnergy, energySum = last.get(energyId, (None, 0.0))
+
+        power = []
+        energy = []
+        for hour, values, bucket_hours in buckets:
+            if lastPower is None or hour > lastPower:
+                power.append(StatisticData(start=hour, mean=sum(values) / len(values), min=min(values), max=max(values)))
+            if lastEnergy is None or hour > lastEnergy:
+                energySum += sum(values) * bucket_hours / 1000
+                energy.append(StatisticData(start=hour, state=energySum, sum=energySum))
+
+        name = f"{plant.get('plantname') or plantuid} {series}"
+        if power:
+            statistics.append((
+                StatisticMetaData(
+                    has_mean=True,
+                    has_sum=False,
+                    name=name,
+                    source=DOMAIN,
+                    statistic_id=powerId,
+                    unit_of_measurement=UnitOfPower.WATT,
+                ),
+                power,
+            ))
+            last[powerId] = (power[-1]["start"], 0.0)
+        if energy:
+            statistics.append((
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"{name} energy",
+                    source=DOMAIN,
+                    statistic_id=energyId,
+                    unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                ),
+                energy,
+            ))
+            last[energyId] = (energy[-1]["start"], energySum)
+
+    return statistics
+
+
+class ChartStatistics(object):
+    """Add the chart series of the plants as hourly external statistics.
+
+    Every power series becomes a mean/min/max statistic and an energy
+    statistic with a running sum for the energy dashboard. Only hours after
+    the last imported one are added, so a chart can be offered again on every
+    poll and after a restart without double counting.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the importer."""
+        self._hass = hass
+        self._lock = asyncio.Lock()
+        self._last = {}
+        self._paused = set()
+
+    @property
+    def available(self):
+        """Return True when the recorder is set up to take statistics."""
+        return "recorder" in self._hass.config.components
+
+    async def _async_load_last(self, plantuid, chart):
+        """Read the last imported hour of the statistics of a chart from the recorder."""
+        for series in CHART_SERIES[chart].values():
+            for statisticId in (statistic_id(plantuid, series), statistic_id(plantuid, series, "_energy")):
+                if statisticId in self._last:
+                    continue
+                result = await get_instance(self._hass).async_add_executor_job(
+                    get_last_statistics, self._hass, 1, statisticId, True, {"sum"}
+                )
+                if result.get(statisticId):
+                    row = result[statisticId][0]
+                    self._last[statisticId] = (dt.utc_from_timestamp(row["start"]), row.get("sum") or 0.0)
+
+    async def async_last_hour(self, plantuid, charts):
+        """Return the earliest of the last imported hours of the charts of a plant.
+
+        None when nothing was imported yet, the recorder is not set up or a
+        backfill rewrites the statistics of the plant.
+        """
+        if not self.available or plantuid in self._paused:
+            return None
+
+        async with self._lock:
+            for chart in charts:
+                await self._async_load_last(plantuid, chart)
+        hours = [
+            self._last[statisticId][0]
+            for chart in charts
+            for series in CHART_SERIES[chart].values()
+            for statisticId in (statistic_id(plantuid, series), statistic_id(plantuid, series, "_energy"))
+            if statisticId in self._last and self._last[statisticId][0] is not None
+        ]
+        return min(hours, default=None)
+
+    def async_add(self, statistics):
+        """Queue (metadata, rows) pairs in the recorder."""
+        for metadata, rows in statistics:
+            async_add_external_statistics(self._hass, metadata, rows)
+            _LOGGER.debug("Added %s hours of %s", len(rows), metadata["statistic_id"])
+
+    def pause(self, plantuid):
+        """Stop the live import of a plant while its statistics are rewritten."""
+        self._paused.add(plantuid)
+
+    def resume(self, plantuid, last=None):
+        """Continue the live import of a plant.
+
+        ``last`` holds the last hours written while the import was paused,
+        without it they are read from the recorder again.
+        """
+        self._paused.discard(plantuid)
+        prefix = f"{DOMAIN}:{slugify(plantuid)}_"
+        for statisticId in [statisticId for statisticId in self._last if statisticId.startswith(prefix)]:
+            del self._last[statisticId]
+        self._last.update(last or {})
+
+    async def async_sums_before(self, plantuid, charts, start):
+        """Return the energy sums of a plant just before ``start``, for rewriting the statistics from there.
+
+        The result is a ``last`` mapping for chart_statistics that imports
+        every hour and continues the sums of the hours before.
+        """
+        energyIds = {
+            statistic_id(plantuid, series, "_energy")
+            for chart in charts
+            for series in CHART_SERIES[chart].values()
+        }
+        result = await get_instance(self._hass).async_add_executor_job(
+            statistics_during_period, self._hass, start - SUMS_LOOKBACK, start, energyIds, "hour", None, {"sum"}
+        )
+        return {
+            statisticId: (None, rows[-1].get("sum") or 0.0)
+            for statisticId, rows in result.items()
+            if rows
+        }
+
+    async def async_import_chart(self, plant, chart, dataCountList, day, now=None):
+        """Import the complete hours of a day chart that were not imported yet.
+
+        ``plant`` is the plant list entry, ``chart`` the endpoint name in
+        CHART_SERIES and ``day`` the local date of the chart.
+        """
+        if not self.available or plant["plantuid"] in self._paused:
+            return
+
+        async with self._lock:
+            await self._async_load_last(plant["plantuid"], chart)
+            self.async_add(chart_statistics(plant, chart, dataCountList, day, now or dt.utcnow(), self._last))
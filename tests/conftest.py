@@ -0,0 +1,111 @@
+"""Fixtures of the tests, a Home Assistant instance and the portal stand-in.
+
+The repository root is on the path, so the integration is imported as
+custom_components.saj_esolar like Home Assistant loads it.
+"""
+
+import asyncio
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+from homeassistant import bootstrap, config_entries, core, loader  # noqa: E402
+from homeassistant.const import CONF_PASSWORD, CONF_SENSORS, CONF_USERNAME  # noqa: E402
+from homeassistant.helpers import recorder as recorder_helper  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+from homeassistant.util import dt  # noqa: E402
+
+from custom_components.saj_esolar import api  # noqa: E402
+from custom_components.saj_esolar.const import (  # noqa: E402
+    CONF_PLANT_IDS,
+    CONF_PROVIDER_DOMAIN,
+    CONF_PROVIDER_PATH,
+    CONF_PROVIDER_PROTOCOL,
+    CONF_PROVIDER_SSL,
+    DOMAIN,
+)
+from fake_portal import FakePortal  # noqa: E402
+
+# A zone without daylight saving time and away from UTC, the local midnight matters
+TIME_ZONE = "Asia/Tokyo"
+PASSWORD = "secret"
+
+
+@pytest.fixture
+async def hass(tmp_path):
+    """Return a started Home Assistant with its config in a temporary directory."""
+    hass = core.HomeAssistant(str(tmp_path))
+    hass.config.skip_pip = True
+    hass.config.set_time_zone(TIME_ZONE)
+    loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await bootstrap.load_registries(hass)
+    await hass.async_start()
+    yield hass
+    await hass.async_stop(force=True)
+    dt.set_default_time_zone(dt.UTC)
+
+
+@pytest.fixture
+async def recorder(hass, tmp_path):
+    """Set up the recorder on a database in the temporary directory."""
+    recorder_helper.async_initialize_recorder(hass)
+    assert await async_setup_component(
+        hass, "recorder", {"recorder": {"db_url": f"sqlite:///{tmp_path / 'recorder.db'}"}}
+    )
+    await hass.async_block_till_done()
+
+
+@pytest.fixture
+async def portal(monkeypatch):
+    """Return the portal stand-in, served on a local port."""
+    # Neither the retries of failed requests nor the requests over the rate of the account wait
+    monkeypatch.setattr(api, "retry_delay", lambda attempt: 0)
+    monkeypatch.setattr(api, "ACCOUNT_REQUEST_RATE", 1000.0)
+    fake = FakePortal(password=PASSWORD)
+    server = TestServer(fake.make_app())
+    await server.start_server()
+    # A host name, the cookie jar of the session ignores the cookies of IP addresses
+    fake.domain = f"localhost:{server.port}"
+    yield fake
+    await server.close()
+
+
+@pytest.fixture
+def user_input(portal):
+    """Return the first step of the config flow for the portal stand-in."""
+    return {
+        CONF_USERNAME: "user@example.com",
+        CONF_PASSWORD: PASSWORD,
+        CONF_SENSORS: "saj_sec",
+        CONF_PROVIDER_DOMAIN: portal.domain,
+        CONF_PROVIDER_PATH: "saj",
+        CONF_PROVIDER_PROTOCOL: "http",
+        CONF_PROVIDER_SSL: False,
+    }
+
+
+@pytest.fixture
+async def entry(hass, user_input):
+    """Add a config entry of the first plant through the config flow and return it after its first poll."""
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_PLANT_IDS: ["P1"]})
+    await hass.async_block_till_done()
+
+    # The first poll runs in the background
+    polled = asyncio.Event()
+    remove = hass.data[DOMAIN]["entries"][result["result"].entry_id].async_add_listener(polled.set)
+    await asyncio.wait_for(polled.wait(), 10)
+    remove()
+    await hass.async_block_till_done()
+
+    yield result["result"]
+    await hass.config_entries.async_unload(result["result"].entry_id)
+    await hass.async_block_till_done()
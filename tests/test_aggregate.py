@@ -0,0 +1,41 @@
+"""Tests of the plant totals of several H1 devices and Sec modules."""
+
+from custom_components.saj_esolar.coordinator import aggregate_meter_chart_data, aggregate_store_device_power
+
+
+def test_battery_and_grid_power_are_summed_by_direction():
+    aggregate = aggregate_store_device_power([
+        {"batteryPower": "500", "batteryDirection": -1, "gridPower": 100, "gridDirection": 1, "batEnergyPercent": 50, "batCapcity": 5},
+        {"batteryPower": "200", "batteryDirection": 1, "gridPower": 300, "gridDirection": -1, "batEnergyPercent": 70, "batCapcity": 5},
+    ])
+
+    # 500 W charging and 200 W discharging is 300 W charging
+    assert aggregate["batteryPower"] == 300.0
+    assert aggregate["batteryDirection"] == -1
+    assert aggregate["gridPower"] == 200.0
+    assert aggregate["gridDirection"] == -1
+    assert aggregate["batEnergyPercent"] == 60.0
+    assert aggregate["batCapcity"] == 10.0
+
+
+def test_balanced_power_keeps_the_first_direction():
+    aggregate = aggregate_store_device_power([
+        {"batteryPower": 200, "batteryDirection": 1},
+        {"batteryPower": 200, "batteryDirection": -1},
+    ])
+    assert aggregate["batteryPower"] == 0.0
+    assert aggregate["batteryDirection"] == 1
+
+
+def test_single_device_is_returned_as_is():
+    device = {"batteryPower": 200, "batteryDirection": -1}
+    assert aggregate_store_device_power([device]) is device
+
+
+def test_meter_chart_series_of_different_lengths():
+    aggregate = aggregate_meter_chart_data([
+        {"dataCountList": [[1, 2, 3], [1]], "viewBean": {"useElec": "1.5"}},
+        {"dataCountList": [[1, None], [None, 5, None]], "viewBean": {"useElec": 2}},
+    ])
+    assert aggregate["dataCountList"] == [[2.0, 2.0, 3.0], [1.0, 5.0, None]]
+    assert aggregate["viewBean"]["useElec"] == 3.5
@@ -0,0 +1,81 @@
+"""Tests of the circuit breaker of the portal client."""
+
+import datetime
+
+import pytest
+
+from custom_components.saj_esolar import api
+from custom_components.saj_esolar.const import BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN, BREAKER_THRESHOLD
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, delta: datetime.timedelta):
+        self.now += delta.total_seconds()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(api.time, "monotonic", clock)
+    return clock
+
+
+def open_breaker():
+    breaker = api.CircuitBreaker()
+    for _ in range(BREAKER_THRESHOLD):
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_the_threshold(clock):
+    breaker = api.CircuitBreaker()
+    for _ in range(BREAKER_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.retry_after() is None
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_after() == BREAKER_COOLDOWN
+
+
+def test_breaker_probe_success_closes_it(clock):
+    breaker = open_breaker()
+    clock.advance(BREAKER_COOLDOWN)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+    assert breaker.cooldown == BREAKER_COOLDOWN
+
+
+def test_breaker_probe_failure_doubles_the_cooldown(clock):
+    breaker = open_breaker()
+    clock.advance(BREAKER_COOLDOWN)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() == 2 * BREAKER_COOLDOWN
+
+    for _ in range(10):
+        clock.advance(breaker.cooldown)
+        breaker.record_failure()
+    assert breaker.cooldown == BREAKER_MAX_COOLDOWN
+
+
+def test_breaker_success_resets_the_failures(clock):
+    breaker = api.CircuitBreaker()
+    for _ in range(BREAKER_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
@@ -0,0 +1,70 @@
+"""Tests of the config and options flow against the portal stand-in."""
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_PASSWORD, CONF_RESOURCES
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.saj_esolar.const import CONF_FORCE_REFRESH, CONF_PLANT_IDS, CONF_PLANTS, CONF_PROMETHEUS, DOMAIN
+
+
+async def start(hass):
+    return await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+
+
+async def test_wrong_password_is_invalid_auth(hass, portal, user_input):
+    result = await start(hass)
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {**user_input, CONF_PASSWORD: "wrong"})
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_auth"}
+    assert portal.calls["getUserPlantList"] == 0
+
+
+async def test_failing_portal_is_cannot_connect(hass, portal, user_input):
+    portal.error_rate = 1.0
+    result = await start(hass)
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "cannot_connect"}
+
+    # The account can be added once the portal answers again
+    portal.error_rate = 0.0
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "plants"
+
+
+async def test_picked_plants_are_stored_by_plantuid(hass, portal, user_input):
+    result = await start(hass)
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_PLANT_IDS: ["P2"]})
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["data"][CONF_PLANTS] == {"P2": {"plantuid": "P2", "plantname": "Barn"}}
+    # The flow logs out of its own session
+    assert portal.calls["logout"] == 1
+
+    # The same account cannot be added twice
+    again = await start(hass)
+    again = await hass.config_entries.flow.async_configure(again["flow_id"], user_input)
+    assert again["type"] == FlowResultType.ABORT
+    assert again["reason"] == "already_configured"
+
+    await hass.config_entries.async_unload(result["result"].entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_options_flow(hass, entry):
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_RESOURCES: ["nowPower"], CONF_FORCE_REFRESH: 5, CONF_PROMETHEUS: False}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options == {CONF_RESOURCES: ["nowPower"], CONF_FORCE_REFRESH: 5, CONF_PROMETHEUS: False}
+    assert entry.state is config_entries.ConfigEntryState.LOADED
@@ -0,0 +1,22 @@
+"""Tests of the diagnostics of a config entry."""
+
+import json
+
+from custom_components.saj_esolar.const import DOMAIN
+from custom_components.saj_esolar.diagnostics import async_get_config_entry_diagnostics
+
+from conftest import PASSWORD
+
+
+async def test_diagnostics_hide_the_account_and_the_plants(hass, entry):
+    data = hass.data[DOMAIN]["entries"][entry.entry_id]
+    # A Sec module chart that was kept from the poll before
+    next(iter(data.data.values())).stale_results = ["getPlantMeterChartData_M1"]
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    dump = json.dumps(diagnostics)
+    for secret in ("user@example.com", PASSWORD, "P1", "Home", "Examplestraat", "SN1", "BAT1", "M1"):
+        assert secret not in dump
+    assert diagnostics["plants"][0]["stale_results"] == ["getPlantMeterChartData"]
+    assert diagnostics["metrics"]
@@ -0,0 +1,76 @@
+"""Tests of the energy totals over midnight."""
+
+import datetime
+
+import pytest
+from homeassistant.util import dt
+
+from custom_components.saj_esolar.const import DOMAIN
+from custom_components.saj_esolar.energy import EnergyIntegrator, integrate_series
+from custom_components.saj_esolar.model import PlantData
+from custom_components.saj_esolar.statistics import DAY
+
+from fake_portal import load_fixtures
+
+TODAY = datetime.date(2026, 10, 18)
+YESTERDAY = TODAY - datetime.timedelta(days=1)
+
+
+def plant_data(day, values):
+    return PlantData(
+        plant_id=0,
+        getUserPlantList={"plantList": [{"plantuid": "P"}]},
+        getPlantDetailInfo={"plantDetail": {}},
+        getPlantDetailChart2={"dataCountList": [values]},
+        day=day.isoformat(),
+    )
+
+
+def at(day, hour, minute=0):
+    return dt.as_utc(dt.start_of_local_day(day) + datetime.timedelta(hours=hour, minutes=minute))
+
+
+async def test_rest_of_the_day_before_is_added_after_midnight(hass):
+    energy = EnergyIntegrator(hass, "test")
+    # 600 W all day, 0.1 kWh a point of 10 minutes
+    yesterday = [600.0] * 144
+
+    energy.integrate({0: plant_data(YESTERDAY, yesterday)}, at(YESTERDAY, 23, 30))
+    assert energy._totals["P"]["nowPower"]["total"] == pytest.approx(14.1)
+
+    # The first poll of the day, the logger uploaded one point
+    today = plant_data(TODAY, [600.0] + [None] * 143)
+    assert energy.unfinished_days(today) == [YESTERDAY]
+    energy.finish_day(today, YESTERDAY, {"getPlantDetailChart2": [yesterday]})
+    energy.integrate({0: today}, at(TODAY, 0, 15))
+
+    assert today.energy["nowPower"] == pytest.approx(14.5)
+    assert energy.unfinished_days(today) == []
+
+
+async def test_points_filled_in_later_are_added(hass):
+    energy = EnergyIntegrator(hass, "test")
+    energy.integrate({0: plant_data(TODAY, [600.0, None, None] + [None] * 141)}, at(TODAY, 0, 30))
+    # The logger uploads the missed point late
+    energy.integrate({0: plant_data(TODAY, [600.0, 1200.0, 600.0] + [None] * 141)}, at(TODAY, 0, 30))
+
+    assert energy._totals["P"]["nowPower"]["total"] == pytest.approx(0.4)
+
+
+async def test_poll_after_midnight_finishes_the_day_before(hass, portal, entry):
+    data = hass.data[DOMAIN]["entries"][entry.entry_id]
+    totals = data.energy._totals["P1"]
+    yesterday = (dt.now().date() - datetime.timedelta(days=1)).isoformat()
+    # The last poll of yesterday had added 1 kWh of that day
+    totals["nowPower"] = {"day": yesterday, "energy": 1.0, "total": 5.0}
+    charts = portal.calls["getPlantDetailChart2"]
+
+    await data.async_refresh()
+
+    values = load_fixtures()["getPlantDetailChart2"]["dataCountList"][0]
+    full_day, _ = integrate_series(values, dt.start_of_local_day(), dt.start_of_local_day() + DAY)
+    total = totals["nowPower"]
+    # The total holds the rest of yesterday from its chart and what today added
+    assert total["total"] - total["energy"] == pytest.approx(5.0 + full_day - 1.0)
+    assert total["day"] == dt.now().date().isoformat()
+    assert portal.calls["getPlantDetailChart2"] > charts
@@ -0,0 +1,92 @@
+"""Tests of the counter guard."""
+
+import datetime
+
+from custom_components.saj_esolar.const import COUNTER_HOLD_MAX
+from custom_components.saj_esolar.guard import CounterGuard
+from custom_components.saj_esolar.model import PlantData
+
+NOW = datetime.datetime(2026, 10, 18, 23, 50, tzinfo=datetime.timezone.utc)
+TOTAL = ("plantDetail", "totalElectricity")
+USE = ("viewBean", "useElec")
+
+
+def plant_data(day, total, use="0"):
+    return PlantData(
+        plant_id=0,
+        getUserPlantList={"plantList": [{"plantuid": "P"}]},
+        getPlantDetailInfo={"plantDetail": {"totalElectricity": total}},
+        getPlantDetailChart2={"viewBean": {"useElec": use}},
+        day=day,
+    )
+
+
+def apply(guard, plantData, now):
+    guard.apply({0: plantData}, now)
+    return plantData
+
+
+def test_drop_is_held_until_it_lasted_the_hold_time():
+    guard = CounterGuard([TOTAL])
+    apply(guard, plant_data("2026-10-18", "100.0"), NOW)
+
+    held = apply(guard, plant_data("2026-10-18", "99"), NOW + datetime.timedelta(minutes=5))
+    assert held.value(TOTAL) == "100.0"
+    assert guard.as_dict()["held"] == [{
+        "plant_id": 0,
+        "counter": "plantDetail/totalElectricity",
+        "published": "100.0",
+        "held_since": (NOW + datetime.timedelta(minutes=5)).isoformat(),
+    }]
+    assert guard.events[-1]["reason"] == "drop"
+
+    reset = apply(guard, plant_data("2026-10-18", "99"), NOW + datetime.timedelta(minutes=5) + COUNTER_HOLD_MAX)
+    assert reset.value(TOTAL) == "99"
+    assert guard.as_dict()["held"] == []
+
+
+def test_drop_to_zero_is_never_taken():
+    guard = CounterGuard([TOTAL])
+    apply(guard, plant_data("2026-10-18", "100.0"), NOW)
+    apply(guard, plant_data("2026-10-18", "0"), NOW + datetime.timedelta(minutes=5))
+
+    held = apply(guard, plant_data("2026-10-18", "0"), NOW + 3 * COUNTER_HOLD_MAX)
+    assert held.value(TOTAL) == "100.0"
+
+
+def test_held_value_does_not_change_the_shared_response():
+    guard = CounterGuard([TOTAL])
+    apply(guard, plant_data("2026-10-18", "100.0"), NOW)
+    plantData = plant_data("2026-10-18", "99")
+    response = plantData.getPlantDetailInfo
+
+    apply(guard, plantData, NOW + datetime.timedelta(minutes=5))
+    assert plantData.value(TOTAL) == "100.0"
+    assert response["plantDetail"]["totalElectricity"] == "99"
+
+
+def test_daily_counter_on_a_new_day():
+    guard = CounterGuard([USE])
+    apply(guard, plant_data("2026-10-18", "0", "5.0"), NOW)
+
+    # The portal still returns yesterday's total just after midnight
+    held = apply(guard, plant_data("2026-10-19", "0", "5.2"), NOW + datetime.timedelta(minutes=15))
+    assert held.value(USE) == "5.0"
+    assert guard.events[-1]["reason"] == "yesterday's total on a new day"
+
+    started = apply(guard, plant_data("2026-10-19", "0", "0.1"), NOW + datetime.timedelta(minutes=20))
+    assert started.value(USE) == "0.1"
+
+    earlier = apply(guard, plant_data("2026-10-18", "0", "5.0"), NOW + datetime.timedelta(minutes=25))
+    assert earlier.value(USE) == "0.1"
+    assert guard.events[-1]["reason"] == "earlier day"
+
+
+def test_rising_counters_are_published():
+    guard = CounterGuard([TOTAL, USE])
+    apply(guard, plant_data("2026-10-18", "100.0", "5.0"), NOW)
+    plantData = apply(guard, plant_data("2026-10-18", "100.5", "5.3"), NOW + datetime.timedelta(minutes=5))
+
+    assert plantData.value(TOTAL) == "100.5"
+    assert plantData.value(USE) == "5.3"
+    assert not guard.events
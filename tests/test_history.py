@@ -0,0 +1,41 @@
+"""Tests of the sample ring buffer."""
+
+import pytest
+
+from custom_components.saj_esolar.history import RingBuffer
+
+
+def test_ring_buffer_overwrites_the_oldest_sample():
+    buffer = RingBuffer(3)
+    assert len(buffer) == 0
+    assert buffer.last is None
+
+    for time in range(1, 5):
+        buffer.append(time * 60.0, time * 10.0)
+
+    assert len(buffer) == 3
+    assert buffer.size == 3
+    assert buffer.last == (240.0, 40.0)
+    assert list(buffer.window(0)) == [(240.0, 40.0), (180.0, 30.0), (120.0, 20.0)]
+    assert list(buffer.window(150)) == [(240.0, 40.0), (180.0, 30.0)]
+
+
+def test_ring_buffer_mean_and_slope():
+    buffer = RingBuffer(10)
+    assert buffer.mean(0) is None
+    assert buffer.slope(0) is None
+
+    for time in range(5):
+        buffer.append(time * 300.0, 1000.0 + time * 30.0)
+
+    assert buffer.mean(0) == pytest.approx(1060.0)
+    assert buffer.mean(900) == pytest.approx(1105.0)
+    assert buffer.slope(0) == pytest.approx(0.1)
+    assert buffer.slope(1200) is None
+
+
+def test_ring_buffer_slope_needs_different_times():
+    buffer = RingBuffer(4)
+    buffer.append(60.0, 1.0)
+    buffer.append(60.0, 2.0)
+    assert buffer.slope(0) is None
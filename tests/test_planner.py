@@ -0,0 +1,46 @@
+"""Tests of the endpoint planning and the response projection."""
+
+from custom_components.saj_esolar.model import PLANT_INDEX
+from custom_components.saj_esolar.planner import plan_endpoints
+from custom_components.saj_esolar.projection import EACH, plan_fields, project
+
+
+def test_plan_endpoints_always_has_the_plant_details():
+    assert plan_endpoints([], "None") == {"getPlantDetailInfo"}
+    assert plan_endpoints([("plantDetail", "nowPower")], "None") == {"getPlantDetailInfo"}
+
+
+def test_plan_endpoints_adds_dependencies():
+    assert plan_endpoints([("viewBean", "peakPower")], "None") == {"getPlantDetailInfo", "getPlantDetailChart2"}
+    assert plan_endpoints([("viewBean", "peakPower")], "h1") == {
+        "getPlantDetailInfo", "getPlantDetailChart2", "findDevicePageList",
+    }
+    assert plan_endpoints([("getPlantMeterDetailInfo", "x")], "saj_sec") == {
+        "getPlantDetailInfo", "getPlantMeterDetailInfo",
+    }
+
+
+def test_plan_endpoints_energy_and_trends():
+    assert "getPlantMeterChartData" in plan_endpoints([("energy", "exportPower")], "saj_sec")
+    assert plan_endpoints([("trends", "nowPower_avg")], "None") == {"getPlantDetailInfo"}
+
+
+def test_plan_fields_maps_the_plant_index_to_every_plant():
+    fields = plan_fields([("plantList", PLANT_INDEX, "systemPower")])
+    assert fields["getUserPlantList"] == {"plantList": {EACH: {"plantuid": None, "plantname": None, "systemPower": None}}}
+
+
+def test_plan_fields_keeps_a_whole_response():
+    assert plan_fields([("getPlantMeterDetailInfo",)])["getPlantMeterDetailInfo"] is None
+
+
+def test_project_keeps_the_planned_keys():
+    response = {"plantList": [{"plantuid": "P1", "address": "x"}, {"plantuid": "P2", "address": "y"}], "total": 2}
+    assert project(response, {"plantList": {EACH: {"plantuid": None}}}) == {"plantList": [{"plantuid": "P1"}, {"plantuid": "P2"}]}
+    assert project(response, None) is response
+
+
+def test_project_keeps_list_positions():
+    response = {"dataCountList": [[1, 2], [3], [4], [5]]}
+    assert project(response, {"dataCountList": {1: None, -1: None}}) == {"dataCountList": [[], [3], [], [5]]}
+    assert project([{"a": 1}, "b"], {0: None}) == [{"a": 1}, None]
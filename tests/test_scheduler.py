@@ -0,0 +1,66 @@
+"""Tests of the adaptive poll scheduling."""
+
+import datetime
+
+from custom_components.saj_esolar.const import UPLOAD_GAPS, UPLOAD_GRACE
+from custom_components.saj_esolar.model import PlantData
+from custom_components.saj_esolar.scheduler import PollScheduler
+
+START = datetime.datetime(2026, 10, 18, 10, 0, tzinfo=datetime.timezone.utc)
+MINUTE = datetime.timedelta(minutes=1)
+
+
+def plant_data(last_upload):
+    return PlantData(
+        plant_id=0,
+        getUserPlantList={"plantList": [{"plantuid": "P"}]},
+        getPlantDetailInfo={"plantDetail": {
+            "lastUploadTime": last_upload.strftime("%Y-%m-%d %H:%M:%S"),
+            "nowPower": "1200",
+            "runningState": 1,
+        }},
+    )
+
+
+def run(uploads, until):
+    """Poll like the coordinator does, return the scheduler and the (poll time, interval) pairs."""
+    scheduler = PollScheduler(None)
+    polls = []
+    now = START + UPLOAD_GRACE
+    while now < until:
+        last_upload = max(upload for upload in uploads if upload <= now)
+        interval = scheduler.next_interval(plant_data(last_upload), now)
+        polls.append((now, interval))
+        now += interval
+    return scheduler, polls
+
+
+def test_polls_follow_the_uploads():
+    uploads = [START + index * 5 * MINUTE for index in range(48)]
+    scheduler, polls = run(uploads, START + 3 * datetime.timedelta(hours=1))
+
+    assert scheduler.upload_interval == 5 * MINUTE
+    assert all(interval == 5 * MINUTE for _, interval in polls[1:])
+
+
+def test_a_missed_upload_does_not_slow_down_polling():
+    uploads = [START + index * 5 * MINUTE for index in range(48) if index != 3]
+    scheduler, polls = run(uploads, START + 3 * datetime.timedelta(hours=1))
+
+    assert scheduler.upload_interval == 5 * MINUTE
+    later = [interval for now, interval in polls if now > START + 30 * MINUTE]
+    assert later and all(interval <= 5 * MINUTE for interval in later)
+
+
+def test_a_slower_logger_is_learned():
+    uploads = [START + index * 10 * MINUTE for index in range(3 * UPLOAD_GAPS)]
+    scheduler, polls = run(uploads, START + 5 * datetime.timedelta(hours=1))
+
+    assert scheduler.upload_interval == 10 * MINUTE
+    assert polls[-1][1] == 10 * MINUTE
+
+
+def test_offline_logger_is_polled_less_often():
+    scheduler = PollScheduler(None)
+    interval = scheduler.next_interval(plant_data(START), START + datetime.timedelta(hours=2))
+    assert interval == datetime.timedelta(minutes=15)
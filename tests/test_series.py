@@ -0,0 +1,50 @@
+"""Tests of the chart series energy totals and hourly statistics."""
+
+import datetime
+
+import pytest
+
+from custom_components.saj_esolar.energy import integrate_series
+from custom_components.saj_esolar.statistics import hourly_buckets
+
+DAY_START = datetime.datetime(2026, 10, 18, tzinfo=datetime.timezone.utc)
+
+
+def test_integrate_series_adds_the_points_that_are_over():
+    values = [1000] * 24
+
+    energy, index = integrate_series(values, DAY_START, DAY_START + datetime.timedelta(hours=3, minutes=30))
+    assert energy == pytest.approx(3.0)
+    assert index == 3
+
+    energy, index = integrate_series(values, DAY_START, DAY_START + datetime.timedelta(hours=5), index)
+    assert energy == pytest.approx(2.0)
+    assert index == 5
+
+
+def test_integrate_series_stops_at_the_last_uploaded_point():
+    values = [2000, None, -500, 1000] + [None] * 20
+
+    energy, index = integrate_series(values, DAY_START, DAY_START + datetime.timedelta(hours=23))
+    assert energy == pytest.approx(3.0)
+    assert index == 4
+
+
+def test_integrate_series_without_points():
+    assert integrate_series([], DAY_START, DAY_START + datetime.timedelta(hours=1), 7) == (0.0, 7)
+
+
+def test_hourly_buckets_keeps_the_complete_hours():
+    values = [float(index) for index in range(48)]
+    values[2] = None
+
+    buckets = hourly_buckets(values, DAY_START, DAY_START + datetime.timedelta(hours=2, minutes=15))
+    assert buckets == [
+        (DAY_START, [0.0, 1.0], 0.5),
+        (DAY_START + datetime.timedelta(hours=1), [3.0], 0.5),
+    ]
+
+
+def test_hourly_buckets_leaves_out_the_current_hour():
+    buckets = hourly_buckets([100.0] * 288, DAY_START, DAY_START + datetime.timedelta(minutes=55))
+    assert buckets == []
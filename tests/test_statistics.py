@@ -0,0 +1,92 @@
+"""Tests of the import of the day charts into the statistics over midnight."""
+
+import datetime
+
+import pytest
+from homeassistant import config_entries
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.util import dt
+
+from custom_components.saj_esolar.const import CONF_PLANT_IDS, DOMAIN
+from custom_components.saj_esolar.statistics import HOUR, ChartStatistics, statistic_id
+
+from fake_portal import load_fixtures
+
+TODAY = datetime.date(2026, 10, 18)
+PLANT = {"plantuid": "P1", "plantname": "Home"}
+POWER = statistic_id("P1", "nowPower")
+ENERGY = statistic_id("P1", "nowPower", "_energy")
+
+
+def at(day, hour, minute=0):
+    return dt.as_utc(dt.start_of_local_day(day) + datetime.timedelta(hours=hour, minutes=minute))
+
+
+async def hours(hass, start, statistic_ids):
+    """Return the imported hours of the statistics from ``start``, once the recorder wrote them."""
+    await get_instance(hass).async_block_till_done()
+    return await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, start, None, set(statistic_ids), "hour", None, {"mean", "sum"}
+    )
+
+
+async def test_last_hour_of_the_day_is_imported_after_midnight(hass, recorder):
+    statistics = ChartStatistics(hass)
+    # 600 W all day, 0.6 kWh an hour
+    chart = [[600.0] * 144]
+
+    await statistics.async_import_chart(PLANT, "getPlantDetailChart2", chart, TODAY, at(TODAY, 23, 30))
+    assert await statistics.async_last_hour("P1", ["getPlantDetailChart2"]) == at(TODAY, 22)
+
+    # The first poll after midnight offers the chart of the day before again
+    await statistics.async_import_chart(PLANT, "getPlantDetailChart2", chart, TODAY, at(TODAY, 24, 10))
+    rows = await hours(hass, at(TODAY, 0), [POWER, ENERGY])
+
+    assert [dt.utc_from_timestamp(row["start"]) for row in rows[POWER]] == [at(TODAY, hour) for hour in range(24)]
+    assert rows[ENERGY][-1]["sum"] == pytest.approx(24 * 0.6)
+
+
+async def test_missed_days_are_imported_on_the_first_poll(hass, recorder, portal, user_input):
+    today = dt.now().date()
+    missed = today - datetime.timedelta(days=3)
+    # Home Assistant stopped three days ago at 22:00
+    statistics = ChartStatistics(hass)
+    fixtures = load_fixtures()
+    for chart in ("getPlantDetailChart2", "getPlantMeterChartData"):
+        await statistics.async_import_chart(PLANT, chart, fixtures[chart]["dataCountList"], missed, at(missed, 22))
+    await get_instance(hass).async_block_till_done()
+
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_PLANT_IDS: ["P1"]})
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN]["entries"][result["result"].entry_id]
+    await data.async_refresh()
+    await hass.async_block_till_done()
+
+    ids = [
+        statistic_id("P1", series, suffix)
+        for series in ("nowPower", "homeLoadPower", "exportPower")
+        for suffix in ("", "_energy")
+    ]
+    rows = await hours(hass, at(missed, 0), ids)
+    expected = []
+    hour = at(missed, 0)
+    while hour < at(today, 0):
+        expected.append(hour)
+        hour += HOUR
+    for statisticId in ids:
+        starts = [dt.utc_from_timestamp(row["start"]) for row in rows[statisticId]]
+        assert starts[:len(expected)] == expected, statisticId
+    sums = [row["sum"] for row in rows[ENERGY]]
+    assert sums == sorted(sums)
+
+    # The days are fetched once, the next poll does not ask for them again
+    charts = portal.calls["getPlantDetailChart2"]
+    await data.async_refresh()
+    await hass.async_block_till_done()
+    assert portal.calls["getPlantDetailChart2"] - charts <= 1
+
+    await hass.config_entries.async_unload(result["result"].entry_id)
+    await hass.async_block_till_done()